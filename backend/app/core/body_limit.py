@@ -0,0 +1,69 @@
+# backend/app/core/body_limit.py
+"""
+Tope al cuerpo de los requests, antes de que nadie lo lea.
+
+Starlette guarda el multipart completo (archivos a disco pasado 1 MB) antes
+de llegar al endpoint, así que el límite por imagen de `spool_upload` llega
+tarde. Este middleware ASGI corta antes:
+
+- `Content-Length` mayor que el tope → 413 sin leer el cuerpo,
+- sin `Content-Length` (chunked) → cuenta los bytes al recibirlos y corta
+  con 413 apenas se pasa. Es un HTTPException: FastAPI lo re-lanza tal cual
+  desde el parseo del cuerpo (si no, sería un 400 genérico).
+"""
+from __future__ import annotations
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class _TooLarge(HTTPException):
+    def __init__(self, max_bytes: int) -> None:
+        super().__init__(status_code=413, detail=f"Request supera {max_bytes // (1024 * 1024)}MB")
+
+
+class BodySizeLimit:
+    def __init__(self, app: ASGIApp, max_bytes: int) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self.max_bytes <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        length = dict(scope["headers"]).get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _TooLarge(self.max_bytes)
+            return message
+
+        async def tracked_send(message: Message) -> None:
+            nonlocal started
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except _TooLarge:
+            if started:
+                raise
+            await self._reject(scope, receive, send)  # leído fuera de un endpoint
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        exc = _TooLarge(self.max_bytes)
+        response = JSONResponse({"detail": exc.detail}, status_code=413, headers={"Connection": "close"})
+        await response(scope, receive, send)
@@ -0,0 +1,171 @@
+# backend/app/core/campus_catalog.py
+"""
+Catálogo de campus en memoria para GET /auth/campuses.
+
+Son ~20 filas fijas (scripts/seed_campus.py): se cargan una vez en un
+snapshot inmutable con
+
+- índice de prefijos por palabra de `code` y `name`, sin acentos ni
+  mayúsculas ("cucei", "ciencias", "tonala" → CUTONALÁ),
+- búsqueda por subcadena (mismos resultados que el ILIKE '%q%' anterior),
+  con los aciertos por prefijo de palabra primero,
+- la respuesta JSON ya serializada y su ETag, por consulta.
+
+El endpoint no toca la base. Un lazo en el lifespan recarga cada
+CAMPUS_REFRESH_INTERVAL seg. y solo cambia el snapshot (y el ETag) si las
+filas cambiaron.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Response
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from .db import AsyncSessionLocal
+from .settings import CAMPUS_REFRESH_INTERVAL
+from ..models.campus import Campus
+from ..schemas.campus import CampusRead
+from ..utils.text import fold
+
+log = logging.getLogger(__name__)
+
+_campus_list = TypeAdapter(List[CampusRead])
+MAX_CACHED_QUERIES = 512  # respuestas serializadas por snapshot (prefijos tecleados)
+
+
+@dataclass(frozen=True)
+class CampusSnapshot:
+    rows: Tuple[CampusRead, ...]  # ordenadas por code
+    version: str
+    loaded_at: float
+    _haystacks: Tuple[str, ...] = field(repr=False)
+    _prefixes: Dict[str, Tuple[int, ...]] = field(repr=False)
+    _responses: Dict[str, Tuple[bytes, str]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def build(cls, rows: List[CampusRead]) -> "CampusSnapshot":
+        rows = sorted(rows, key=lambda r: r.code)
+        haystacks = tuple(fold(f"{r.code} {r.name}") for r in rows)
+        prefixes: Dict[str, List[int]] = {}
+        for i, hay in enumerate(haystacks):
+            for word in set(hay.split()):
+                for n in range(1, len(word) + 1):
+                    bucket = prefixes.setdefault(word[:n], [])
+                    if not bucket or bucket[-1] != i:
+                        bucket.append(i)
+        body = _campus_list.dump_json(rows)
+        return cls(
+            rows=tuple(rows),
+            version=hashlib.sha256(body).hexdigest()[:16],
+            loaded_at=time.time(),
+            _haystacks=haystacks,
+            _prefixes={k: tuple(v) for k, v in prefixes.items()},
+        )
+
+    def search(self, q: Optional[str]) -> Tuple[CampusRead, ...]:
+        key = fold(q or "")
+        if not key:
+            return self.rows
+        # primero los que tienen una palabra que empieza con `q` (lo que se está
+        # tecleando), luego el resto que lo contiene; cada grupo por code
+        first = self._prefixes.get(key, ())
+        seen = set(first)
+        rest = [i for i, hay in enumerate(self._haystacks) if i not in seen and key in hay]
+        return tuple(self.rows[i] for i in (*first, *rest))
+
+    def serialized(self, q: Optional[str]) -> Tuple[bytes, str]:
+        """(cuerpo JSON, ETag) de la consulta; se calcula una vez por snapshot."""
+        key = fold(q or "")
+        cached = self._responses.get(key)
+        if cached is None:
+            cached = (
+                _campus_list.dump_json(list(self.search(key))),
+                f'"{self.version}-{hashlib.sha256(key.encode()).hexdigest()[:8]}"',
+            )
+            if len(self._responses) < MAX_CACHED_QUERIES:
+                self._responses[key] = cached
+        return cached
+
+
+class CampusCatalog:
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        self._snapshot: Optional[CampusSnapshot] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.reloads = 0
+
+    async def _load(self) -> CampusSnapshot:
+        async with AsyncSessionLocal() as db:
+            rows = await db.execute(select(Campus.id, Campus.code, Campus.name))
+            return CampusSnapshot.build([CampusRead.model_validate(r) for r in rows.mappings()])
+
+    async def reload(self) -> bool:
+        """Relee la tabla; cambia el snapshot solo si las filas cambiaron."""
+        fresh = await self._load()
+        if self._snapshot is not None and fresh.version == self._snapshot.version:
+            return False
+        self._snapshot = fresh
+        self.reloads += 1
+        return True
+
+    async def snapshot(self) -> CampusSnapshot:
+        if self._snapshot is None:
+            async with self._lock:  # primera carga (sin lifespan): una sola consulta
+                if self._snapshot is None:
+                    await self.reload()
+        return self._snapshot
+
+    async def respond(self, q: Optional[str], if_none_match: Optional[str]) -> Response:
+        body, etag = (await self.snapshot()).serialized(q)
+        headers = {"ETag": etag, "Cache-Control": "public, max-age=60"}
+        if if_none_match and etag in [t.strip().removeprefix("W/") for t in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    # ---------- ciclo de vida ----------
+    async def start(self) -> None:
+        try:
+            await self.reload()
+        except Exception:
+            log.exception("catálogo de campus: no se pudo cargar al iniciar")
+        if self.refresh_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                if await self.reload():
+                    log.info("catálogo de campus actualizado (%s)", self._snapshot.version)
+            except Exception:
+                log.exception("catálogo de campus: recarga fallida, se mantiene el snapshot")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            "rows": len(snap.rows) if snap else 0,
+            "version": snap.version if snap else None,
+            "age_s": round(time.time() - snap.loaded_at, 1) if snap else None,
+            "cached_queries": len(snap._responses) if snap else 0,
+            "reloads": self.reloads,
+            "refresh_interval": self.refresh_interval,
+        }
+
+
+campus_catalog = CampusCatalog(CAMPUS_REFRESH_INTERVAL)
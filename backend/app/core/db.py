@@ -1,15 +1,139 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from .settings import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from .settings import (
+    DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
+
+
+def _async_url(url: str) -> str:
+    """Mismo DATABASE_URL con driver async: asyncpg (Postgres) / aiosqlite (SQLite)."""
+    u = make_url(url)
+    backend = u.get_backend_name()
+    if backend == "postgresql":
+        u = u.set(drivername="postgresql+asyncpg")
+    elif backend == "sqlite":
+        u = u.set(drivername="sqlite+aiosqlite")
+    return u.render_as_string(hide_password=False)
+
+
+# =========================
+# Métricas del pool
+# =========================
+class PoolStats:
+    """
+    Contadores de un pool: esperas al pedir conexión (checkout), timeouts y
+    pico de conexiones en uso. Lo actualiza el pool medido (`_metered_pool`).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.wait_total = 0.0
+            self.wait_max = 0.0
+            self.peak_in_use = 0
+
+    def record_checkout(self, wait: float, in_use: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, pool) -> dict:
+        if not isinstance(pool, QueuePool):
+            return {"pool": type(pool).__name__}
+        with self._lock:
+            return {
+                "pool_size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "peak_in_use": self.peak_in_use,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+            }
+
+
+def _metered_pool(base: type, stats: PoolStats) -> type:
+    """Subclase de `base` que mide cada checkout (incluye pre-ping y conexiones nuevas)."""
 
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            conn = base.connect(self)
+        except exc.TimeoutError:
+            stats.record_timeout()
+            raise
+        stats.record_checkout(time.perf_counter() - t0, self.checkedout())
+        return conn
+
+    return type(f"Metered{base.__name__}", (base,), {"connect": connect})
+
+
+def _pool_options(url: str, base: type, stats: PoolStats) -> dict:
+    # SQLite en memoria usa un pool de una sola conexión: sin tamaño que configurar
+    if make_url(url).get_backend_name() == "sqlite" and make_url(url).database in (None, "", ":memory:"):
+        return {}
+    return {
+        "poolclass": _metered_pool(base, stats),
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+# Síncrono: scripts/ y migraciones (Alembic)
 connect_args = {"check_same_thread": False} if DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(DATABASE_URL, connect_args=connect_args)
+engine = create_engine(
+    DATABASE_URL, connect_args=connect_args, **_pool_options(DATABASE_URL, QueuePool, sync_pool_stats)
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Async: la app (routers). expire_on_commit=False: tras commit los objetos
+# siguen legibles sin volver a la BD (no hay lazy-load implícito en async)
+async_engine = create_async_engine(
+    _async_url(DATABASE_URL), **_pool_options(DATABASE_URL, AsyncAdaptedQueuePool, async_pool_stats)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def pool_stats() -> dict:
+    """Estado en vivo + contadores de ambos pools (para /internal/stats/db)."""
+    return {
+        "async": async_pool_stats.snapshot(async_engine.pool),
+        "sync": sync_pool_stats.snapshot(engine.pool),
+    }
+
+
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
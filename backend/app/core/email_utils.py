@@ -1,7 +1,16 @@
-from typing import Tuple
+import asyncio
+import contextlib
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
 from email_validator import validate_email, EmailNotValidError
+import dns.asyncresolver
 import dns.resolver
 
+from .settings import MX_CACHE_TTL, MX_NEGATIVE_TTL, MX_TIMEOUT
+
+log = logging.getLogger(__name__)
+
 def normalize_and_validate_format(raw_email: str) -> Tuple[str, str]:
     """
     Normaliza y valida formato del email.
@@ -18,10 +27,137 @@ def normalize_and_validate_format(raw_email: str) -> Tuple[str, str]:
 
 def domain_has_mx(domain: str) -> bool:
     """
-    Comprueba si el dominio tiene registros MX (DNS).
+    Comprueba si el dominio tiene registros MX (DNS). Síncrona y sin caché:
+    en requests usar `mx_cache.has_mx`.
     """
     try:
         answers = dns.resolver.resolve(domain, 'MX')
         return len(answers) > 0
     except Exception:
         return False
+
+
+# =========================
+# MX con caché (async)
+# =========================
+# resolver(domain) -> True/False si hay o no MX; excepción = fallo transitorio
+MXResolver = Callable[[str], Awaitable[bool]]
+
+
+async def resolve_mx(domain: str) -> bool:
+    """Resolver por defecto: dnspython async con timeout corto (MX_TIMEOUT)."""
+    try:
+        answers = await dns.asyncresolver.resolve(domain, "MX", lifetime=MX_TIMEOUT)
+        return len(answers) > 0
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer):
+        return False
+
+
+class MXCache:
+    """
+    Resultado de MX por dominio con TTL (positivo y negativo).
+
+    - Entrada vencida: se sirve el valor anterior y se refresca en segundo
+      plano (el login no espera al DNS).
+    - Fallo transitorio (timeout, SERVFAIL): se conserva el último valor;
+      sin valor previo cuenta como "sin MX" por `negative_ttl`.
+    - `start(domains)` pre-resuelve los dominios permitidos y los refresca
+      antes de que venzan.
+    """
+
+    def __init__(
+        self,
+        resolver: MXResolver = resolve_mx,
+        ttl: float = MX_CACHE_TTL,
+        negative_ttl: float = MX_NEGATIVE_TTL,
+    ) -> None:
+        self.resolver = resolver
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[str, Tuple[bool, float]] = {}   # dominio -> (tiene_mx, vence)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._refresher: Optional[asyncio.Task] = None
+        self._refreshing: Set[asyncio.Task] = set()   # referencias fuertes: el loop solo guarda débiles
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    async def has_mx(self, domain: str) -> bool:
+        domain = domain.strip().lower()
+        entry = self._entries.get(domain)
+        if entry is not None:
+            self.hits += 1
+            if entry[1] <= time.monotonic():
+                self._refresh_soon(domain)
+            return entry[0]
+        self.misses += 1
+        return await self._resolve(domain)
+
+    def _refresh_soon(self, domain: str) -> None:
+        if domain not in self._inflight:
+            task = asyncio.ensure_future(self._resolve(domain))
+            self._refreshing.add(task)
+            task.add_done_callback(self._refresh_done)
+
+    def _refresh_done(self, task: asyncio.Task) -> None:
+        self._refreshing.discard(task)
+        if not task.cancelled():
+            task.exception()  # ya registrado en _resolve
+
+    async def _resolve(self, domain: str) -> bool:
+        # una sola consulta por dominio aunque lleguen muchos logins a la vez
+        if domain in self._inflight:
+            return await asyncio.shield(self._inflight[domain])
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[domain] = fut
+        try:
+            try:
+                ok = await self.resolver(domain)
+                self._entries[domain] = (ok, time.monotonic() + (self.ttl if ok else self.negative_ttl))
+            except Exception:
+                self.errors += 1
+                log.warning("MX de %s no resuelto (fallo transitorio)", domain, exc_info=True)
+                prev = self._entries.get(domain)
+                ok = prev[0] if prev is not None else False
+                self._entries[domain] = (ok, time.monotonic() + self.negative_ttl)
+            fut.set_result(ok)
+            return ok
+        finally:
+            del self._inflight[domain]
+            if not fut.done():  # cancelado a medias: no dejar esperando a nadie
+                fut.cancel()
+
+    async def start(self, domains: Iterable[str]) -> None:
+        domains = [d.strip().lower() for d in domains if d.strip()]
+        await asyncio.gather(*(self._resolve(d) for d in domains))
+        self._refresher = asyncio.create_task(self._refresh_loop(domains))
+
+    async def _refresh_loop(self, domains: List[str]) -> None:
+        # refresca a la mitad del TTL más corto: nunca se llega a servir vencido
+        interval = max(min(self.ttl, self.negative_ttl) / 2, 1)
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.gather(*(self._resolve(d) for d in domains))
+
+    async def stop(self) -> None:
+        if self._refresher is not None:
+            self._refresher.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._refresher
+            self._refresher = None
+        pending = list(self._refreshing)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "domains": {d: {"mx": ok, "expires_in": round(exp - now, 1)} for d, (ok, exp) in self._entries.items()},
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+        }
+
+
+mx_cache = MXCache()
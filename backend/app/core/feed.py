@@ -0,0 +1,413 @@
+# backend/app/core/feed.py
+"""
+Feed de descubrimiento precalculado (GET /feed/next).
+
+Por usuario se guarda:
+- una COLA de product_ids ya filtrados y ordenados; /feed/next saca los
+  primeros `n` (O(n)) y solo consulta esos ids por PK para devolverlos;
+- un filtro de Bloom con lo ya visto (lo que salió del feed y lo que
+  swipeó en cualquier lado), FEED_SEEN_CAPACITY elementos al 1% de falsos
+  positivos. Un falso positivo solo oculta un producto no visto: nunca
+  repite uno visto. Pasada la capacidad se ocultan más, no se repiten;
+- dos marcas de agua sobre products.id: hasta dónde se leyeron los
+  productos nuevos (`high`) y los viejos (`low`), para que cada relleno
+  lea productos que no leyó antes.
+
+El relleno (lo único que lee `products`) corre en segundo plano: cuando
+a la cola le quedan menos de FEED_LOW_WATERMARK ids, y cada
+FEED_REFRESH_INTERVAL seg. para los usuarios activos (productos nuevos).
+Filtra por campus del dueño, productos y dueños activos, no propios y no
+vistos; ordena por similitud TF-IDF con el perfil del usuario
+(core/recommender.py) y recencia. Solo el primer /feed/next de un usuario
+sin cola espera un relleno.
+
+Backends (FEED_URL):
+- MemoryFeedStore: por worker (LRU de FEED_MAX_USERS usuarios); tras un
+  reinicio los vistos se reconstruyen desde sus swipes.
+- RedisFeedStore: colas (LIST), vistos (bits con SETBIT) y marcas
+  compartidos entre workers; expiran tras FEED_TTL seg. sin uso.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import logging
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+
+from .cache import TTLCache
+from .db import AsyncSessionLocal
+from .recommender import profile_seeds, recommender
+from .settings import (
+    FEED_ACTIVE_WINDOW, FEED_LOW_WATERMARK, FEED_MAX_USERS, FEED_QUEUE_SIZE, FEED_REFRESH_INTERVAL,
+    FEED_SCAN_LIMIT, FEED_SEEN_CAPACITY, FEED_TTL, FEED_URL,
+)
+from ..models.product import Product
+from ..models.swipe import Swipe
+from ..models.user import User
+
+log = logging.getLogger(__name__)
+
+MAX_REFILL_PAGES = 5      # páginas de FEED_SCAN_LIMIT por relleno
+SIMILARITY_WEIGHT = 0.7   # el resto del puntaje es recencia
+
+
+# =========================
+# Filtro de Bloom (bits en orden de Redis: bit 0 = MSB del byte 0)
+# =========================
+def _bloom_size(capacity: int, error: float = 0.01) -> Tuple[int, int]:
+    m = max(int(-capacity * math.log(error) / (math.log(2) ** 2)), 64)
+    k = max(int(round(m / capacity * math.log(2))), 1)
+    return m, k
+
+
+BLOOM_BITS, BLOOM_HASHES = _bloom_size(FEED_SEEN_CAPACITY)
+
+
+def _positions(product_id: int) -> List[int]:
+    # doble hashing (Kirsch–Mitzenmacher) sobre un solo digest
+    d = hashlib.blake2b(product_id.to_bytes(8, "little"), digest_size=16).digest()
+    h1, h2 = int.from_bytes(d[:8], "little"), int.from_bytes(d[8:], "little") | 1
+    return [(h1 + i * h2) % BLOOM_BITS for i in range(BLOOM_HASHES)]
+
+
+def _has(bits: bytes, pos: int) -> bool:
+    byte = pos >> 3
+    return byte < len(bits) and bool(bits[byte] & (0x80 >> (pos & 7)))
+
+
+def _unseen(bits: bytes, product_ids: Iterable[int]) -> List[int]:
+    return [pid for pid in product_ids if not all(_has(bits, p) for p in _positions(pid))]
+
+
+@dataclass
+class FeedMarks:
+    high: int = 0                 # mayor products.id leído
+    low: Optional[int] = None     # menor products.id leído (None = aún nada)
+
+
+# =========================
+# Backends
+# =========================
+@dataclass
+class _UserFeed:
+    queue: deque = field(default_factory=deque)
+    bits: bytearray = field(default_factory=lambda: bytearray((BLOOM_BITS + 7) // 8))
+    marks: Optional[FeedMarks] = None
+
+
+class MemoryFeedStore:
+    def __init__(self, max_users: int) -> None:
+        self._users = TTLCache(maxsize=max_users, ttl=FEED_TTL)
+
+    def _get(self, user_id: int) -> _UserFeed:
+        feed = self._users.get(user_id)
+        if feed is None:
+            feed = _UserFeed()
+        self._users.set(user_id, feed)   # renueva TTL / posición LRU
+        return feed
+
+    async def pop(self, user_id: int, n: int) -> Tuple[List[int], int]:
+        queue = self._get(user_id).queue
+        ids = [queue.popleft() for _ in range(min(n, len(queue)))]
+        return ids, len(queue)
+
+    async def push(self, user_id: int, product_ids: List[int]) -> None:
+        self._get(user_id).queue.extend(product_ids)
+
+    async def queued(self, user_id: int) -> List[int]:
+        return list(self._get(user_id).queue)
+
+    async def unseen(self, user_id: int, product_ids: Iterable[int]) -> List[int]:
+        return _unseen(self._get(user_id).bits, product_ids)
+
+    async def add_seen(self, user_id: int, product_ids: Iterable[int]) -> None:
+        bits = self._get(user_id).bits
+        for pid in product_ids:
+            for p in _positions(pid):
+                bits[p >> 3] |= 0x80 >> (p & 7)
+
+    async def marks(self, user_id: int) -> Optional[FeedMarks]:
+        return self._get(user_id).marks
+
+    async def set_marks(self, user_id: int, marks: FeedMarks) -> None:
+        self._get(user_id).marks = marks
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        users = self._users.stats()
+        return {"type": "memory", "users": users["size"], "max_users": users["maxsize"]}
+
+
+class RedisFeedStore:
+    PREFIX = "machtrueke:feed:"
+
+    def __init__(self, url: str = "", client=None) -> None:
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:  # dependencia opcional
+                raise RuntimeError("FEED_URL=redis://... requiere `pip install redis`") from e
+            client = redis.from_url(url)
+        self._client = client
+
+    def _key(self, kind: str, user_id: int) -> str:
+        return f"{self.PREFIX}{kind}:{user_id}"
+
+    async def pop(self, user_id: int, n: int) -> Tuple[List[int], int]:
+        key = self._key("q", user_id)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.lpop(key, n)
+            pipe.llen(key)
+            ids, remaining = await pipe.execute()
+        return [int(i) for i in ids or ()], remaining
+
+    async def push(self, user_id: int, product_ids: List[int]) -> None:
+        key = self._key("q", user_id)
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.rpush(key, *product_ids)
+            pipe.expire(key, FEED_TTL)
+            await pipe.execute()
+
+    async def queued(self, user_id: int) -> List[int]:
+        return [int(i) for i in await self._client.lrange(self._key("q", user_id), 0, -1)]
+
+    async def unseen(self, user_id: int, product_ids: Iterable[int]) -> List[int]:
+        # el filtro completo son pocos KB: se trae una vez y se prueba aquí
+        return _unseen(await self._client.get(self._key("s", user_id)) or b"", product_ids)
+
+    async def add_seen(self, user_id: int, product_ids: Iterable[int]) -> None:
+        # SETBIT es atómico por bit: varios workers marcan sin pisarse
+        key = self._key("s", user_id)
+        async with self._client.pipeline(transaction=False) as pipe:
+            for pid in product_ids:
+                for p in _positions(pid):
+                    pipe.setbit(key, p, 1)
+            pipe.expire(key, FEED_TTL)
+            await pipe.execute()
+
+    async def marks(self, user_id: int) -> Optional[FeedMarks]:
+        raw = await self._client.hgetall(self._key("m", user_id))
+        if not raw:
+            return None
+        low = raw.get(b"low", b"")
+        return FeedMarks(high=int(raw[b"high"]), low=int(low) if low else None)
+
+    async def set_marks(self, user_id: int, marks: FeedMarks) -> None:
+        key = self._key("m", user_id)
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping={"high": marks.high, "low": "" if marks.low is None else marks.low})
+            pipe.expire(key, FEED_TTL)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {"type": "redis"}
+
+
+def make_store(url: str):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisFeedStore(url)
+    return MemoryFeedStore(FEED_MAX_USERS)
+
+
+# =========================
+# Feed
+# =========================
+class DiscoveryFeed:
+    def __init__(self, store, queue_size: int, low_watermark: int, scan_limit: int, refresh_interval: float) -> None:
+        self.store = store
+        self.queue_size = queue_size
+        self.low_watermark = low_watermark
+        self.scan_limit = scan_limit
+        self.refresh_interval = refresh_interval
+        self._refills: Dict[int, asyncio.Task] = {}
+        self._active: Dict[int, float] = {}   # usuario -> último /feed/next (este worker)
+        self._task: Optional[asyncio.Task] = None
+        # métricas
+        self.pops = 0
+        self.served = 0
+        self.cold_starts = 0
+        self.refills_done = 0
+        self.refill_time = 0.0
+        self.errors = 0
+
+    # ---------- lectura ----------
+    async def next(self, user_id: int, n: int) -> List[int]:
+        """Saca hasta `n` ids de la cola de `user_id` y los marca como vistos."""
+        self._active[user_id] = time.monotonic()
+        self.pops += 1
+        ids, remaining = await self.store.pop(user_id, n)
+        if not ids and await self.store.marks(user_id) is None:
+            # primera vez (o estado expirado): este request sí espera el relleno
+            self.cold_starts += 1
+            await self.refill(user_id)
+            ids, remaining = await self.store.pop(user_id, n)
+        if remaining < self.low_watermark:
+            self.schedule_refill(user_id)
+        # swipeado en otro lado después de encolarse: ya no se muestra
+        ids = await self.store.unseen(user_id, ids)
+        await self.store.add_seen(user_id, ids)
+        self.served += len(ids)
+        return ids
+
+    async def mark_seen(self, user_id: int, product_ids: Iterable[int]) -> None:
+        await self.store.add_seen(user_id, product_ids)
+
+    # ---------- relleno ----------
+    def schedule_refill(self, user_id: int) -> asyncio.Task:
+        # uno a la vez por usuario: varios /feed/next seguidos comparten el mismo
+        task = self._refills.get(user_id)
+        if task is None:
+            task = asyncio.create_task(self._run_refill(user_id))
+            self._refills[user_id] = task
+            task.add_done_callback(lambda _: self._refills.pop(user_id, None))
+        return task
+
+    async def refill(self, user_id: int) -> int:
+        """Rellena la cola hasta `queue_size` y espera. Devuelve cuántos ids encoló."""
+        return await asyncio.shield(self.schedule_refill(user_id))
+
+    async def _run_refill(self, user_id: int) -> int:
+        t0 = time.perf_counter()
+        try:
+            return await self._refill(user_id)
+        except Exception:
+            self.errors += 1
+            log.exception("feed: relleno fallido para el usuario %s", user_id)
+            return 0
+        finally:
+            self.refills_done += 1
+            self.refill_time += time.perf_counter() - t0
+
+    async def _refill(self, user_id: int) -> int:
+        marks = await self.store.marks(user_id)
+        queued = set(await self.store.queued(user_id))
+        pushed = 0
+        async with AsyncSessionLocal() as db:
+            me = (await db.execute(select(User.campus_id).where(User.id == user_id))).first()
+            if me is None:
+                return 0
+            if marks is None:
+                # estado nuevo: lo ya swipeado cuenta como visto
+                marks = FeedMarks()
+                await self.store.add_seen(user_id, (await db.scalars(
+                    select(Swipe.product_id).where(Swipe.swiper_id == user_id)
+                )).all())
+
+            owner = aliased(User)
+            swiped = select(Swipe.product_id).where(Swipe.swiper_id == user_id, Swipe.product_id == Product.id)
+            candidates = (
+                select(Product.id)
+                .join(owner, owner.id == Product.owner_id)
+                .where(
+                    Product.is_active.is_(True), owner.is_active.is_(True), Product.owner_id != user_id,
+                    # sondeo a la PK de swipes por candidato (la página, no todo products)
+                    ~swiped.exists(),
+                )
+            )
+            if me.campus_id is not None:
+                candidates = candidates.where(owner.campus_id == me.campus_id)
+            profile = recommender.profile(await profile_seeds(db, user_id))
+
+            for _ in range(MAX_REFILL_PAGES):
+                if len(queued) >= self.queue_size:
+                    break
+                if marks.low is None:
+                    # primer relleno: lo más nuevo
+                    page = (await db.scalars(candidates.order_by(Product.id.desc()).limit(self.scan_limit))).all()
+                else:
+                    # productos nuevos desde el último relleno (en orden, sin saltar
+                    # ninguno) y luego hacia atrás desde lo más viejo ya leído
+                    page = (await db.scalars(
+                        candidates.where(Product.id > marks.high).order_by(Product.id).limit(self.scan_limit)
+                    )).all()
+                    if len(page) < self.scan_limit:
+                        page += (await db.scalars(
+                            candidates.where(Product.id < marks.low)
+                            .order_by(Product.id.desc()).limit(self.scan_limit - len(page))
+                        )).all()
+                if not page:
+                    break
+                if marks.low is None:
+                    marks.low = min(page)
+                marks.high = max(marks.high, *page)
+                marks.low = min(marks.low, *page)
+
+                fresh = [pid for pid in await self.store.unseen(user_id, page) if pid not in queued]
+                ranked = self._rank(profile, fresh)
+                if ranked:
+                    await self.store.push(user_id, ranked)
+                    queued.update(ranked)
+                    pushed += len(ranked)
+        await self.store.set_marks(user_id, marks)
+        return pushed
+
+    @staticmethod
+    def _rank(profile, product_ids: List[int]) -> List[int]:
+        """Similitud con el perfil + recencia (ids más altos = más nuevos)."""
+        if not product_ids:
+            return []
+        by_age = sorted(product_ids)
+        recency = {pid: (i + 1) / len(by_age) for i, pid in enumerate(by_age)}
+        similarity = dict(zip(product_ids, recommender.scores(profile, product_ids)))
+        return sorted(
+            product_ids,
+            key=lambda pid: SIMILARITY_WEIGHT * similarity[pid] + (1 - SIMILARITY_WEIGHT) * recency[pid],
+            reverse=True,
+        )
+
+    # ---------- ciclo de vida ----------
+    async def start(self) -> None:
+        if self.refresh_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def _refresh_loop(self) -> None:
+        # usuarios activos: productos nuevos sin esperar a que se vacíe su cola
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            cutoff = time.monotonic() - FEED_ACTIVE_WINDOW
+            for user_id, last in list(self._active.items()):
+                if last < cutoff:
+                    del self._active[user_id]
+                    continue
+                await self.refill(user_id)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        for task in list(self._refills.values()):
+            task.cancel()
+        await asyncio.gather(*self._refills.values(), return_exceptions=True)
+        await self.store.close()
+
+    def stats(self) -> dict:
+        return {
+            "store": self.store.stats(),
+            "active_users": len(self._active),
+            "pops": self.pops,
+            "served": self.served,
+            "cold_starts": self.cold_starts,
+            "refills": self.refills_done,
+            "avg_refill_ms": round(self.refill_time / self.refills_done * 1000, 1) if self.refills_done else None,
+            "refilling": len(self._refills),
+            "errors": self.errors,
+            "bloom": {"bits": BLOOM_BITS, "hashes": BLOOM_HASHES, "capacity": FEED_SEEN_CAPACITY},
+        }
+
+
+feed = DiscoveryFeed(make_store(FEED_URL), FEED_QUEUE_SIZE, FEED_LOW_WATERMARK, FEED_SCAN_LIMIT, FEED_REFRESH_INTERVAL)
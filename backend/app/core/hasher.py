@@ -0,0 +1,175 @@
+# backend/app/core/hasher.py
+"""
+Hash de contraseñas (bcrypt) fuera del event loop.
+
+bcrypt es CPU puro: corrido en el worker de la API, una ráfaga de logins
+(inicio de clase) frena a todos los demás endpoints. Aquí se manda a un
+pool de procesos dedicado con:
+
+- concurrencia configurable (HASH_WORKERS; 0 = threadpool del loop con 4 a la vez,
+  p. ej. en dev o donde no se permiten subprocesos),
+- cola acotada (HASH_MAX_QUEUE): si está llena se rechaza al instante (HasherBusy),
+- timeout por operación (HASH_TIMEOUT),
+- métricas: en cola, en curso, latencia, rechazos y timeouts.
+
+El costo lo fija BCRYPT_ROUNDS; al hacer login con un hash de otro costo,
+`verify_and_update` devuelve el hash nuevo para guardarlo (rehash transparente).
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Optional, Tuple
+
+from passlib.context import CryptContext
+
+from .settings import BCRYPT_ROUNDS, HASH_MAX_QUEUE, HASH_TIMEOUT, HASH_WORKERS
+
+
+class HasherBusy(Exception):
+    """Cola del hasher llena o tiempo agotado: responder 503 y reintentar."""
+
+
+# =========================
+# Trabajo (corre en los procesos del pool)
+# =========================
+@lru_cache(maxsize=None)
+def crypt_context(rounds: int = BCRYPT_ROUNDS) -> CryptContext:
+    # min = max = default: cualquier hash con otro costo "necesita update"
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return crypt_context(rounds).hash(password)
+
+
+def _verify_and_update(password: str, hashed: str, rounds: int) -> Tuple[bool, Optional[str]]:
+    return crypt_context(rounds).verify_and_update(password, hashed)
+
+
+# =========================
+# Servicio
+# =========================
+class PasswordHasher:
+    def __init__(self, workers: int, max_queue: int, timeout: float, rounds: int) -> None:
+        self.workers = workers
+        self.concurrency = workers if workers > 0 else 4
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.rounds = rounds
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._slots: Optional[asyncio.Semaphore] = None
+        # métricas
+        self.waiting = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self._latencies: deque[float] = deque(maxlen=1000)
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            # spawn: no hereda hilos/conexiones del proceso de la API
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        if self.workers > 0 and self._executor is None:
+            with self._lock:
+                self.start()
+
+        t0 = time.perf_counter()
+        if not self._slots.locked():
+            await self._slots.acquire()  # hay hueco: no espera
+        else:
+            # el semáforo limita lo enviado al pool; lo demás espera aquí (cola medible)
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise HasherBusy("cola de hashing llena")
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout)
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                raise HasherBusy("tiempo de espera de hashing agotado")
+            finally:
+                self.waiting -= 1
+
+        self.running += 1
+        try:
+            job = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        except BaseException:
+            self._job_done(None)
+            raise
+        # el cupo se libera cuando el trabajo TERMINA en el pool, no cuando quien
+        # espera se rinde: bcrypt no se puede interrumpir y, si no, el pool
+        # acumularía trabajos huérfanos sin límite (HASH_MAX_QUEUE no serviría)
+        job.add_done_callback(self._job_done)
+        try:
+            remaining = max(self.timeout - (time.perf_counter() - t0), 0.001)
+            result = await asyncio.wait_for(asyncio.shield(job), timeout=remaining)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise HasherBusy("tiempo de espera de hashing agotado")
+        self.completed += 1
+        self._latencies.append(time.perf_counter() - t0)
+        return result
+
+    def _job_done(self, job: Optional[asyncio.Future]) -> None:
+        self.running -= 1
+        self._slots.release()
+        if job is not None and not job.cancelled():
+            job.exception()  # nadie lo espera tras un timeout: evita "exception was never retrieved"
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, self.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return (await self.verify_and_update(password, hashed))[0]
+
+    async def verify_and_update(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """(ok, hash_nuevo | None). hash_nuevo != None si `hashed` usa otro costo."""
+        return await self._run(_verify_and_update, password, hashed, self.rounds)
+
+    def stats(self) -> dict:
+        lat = sorted(self._latencies)
+        pct = lambda p: round(lat[min(int(len(lat) * p), len(lat) - 1)] * 1000, 2) if lat else 0.0
+        return {
+            "mode": "process" if self.workers > 0 else "thread",
+            "workers": self.workers,
+            "rounds": self.rounds,
+            "queue_length": self.waiting,
+            "max_queue": self.max_queue,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "latency_p50_ms": pct(0.50),
+            "latency_p95_ms": pct(0.95),
+            "latency_max_ms": round(lat[-1] * 1000, 2) if lat else 0.0,
+        }
+
+
+hasher = PasswordHasher(
+    workers=HASH_WORKERS, max_queue=HASH_MAX_QUEUE, timeout=HASH_TIMEOUT, rounds=BCRYPT_ROUNDS
+)
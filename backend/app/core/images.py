@@ -0,0 +1,157 @@
+# backend/app/core/images.py
+"""
+Variantes WebP de imágenes subidas (productos y avatares).
+
+Tras la subida, una tarea en segundo plano manda el original a un pool de
+procesos que lo decodifica UNA vez, corrige la orientación EXIF y genera
+cada ancho (de mayor a menor, reescalando desde la variante anterior) en
+WebP sin metadatos. Al terminar se registran las URLs en ProductImage /
+User; mientras tanto los clientes usan el original.
+
+Requiere Pillow (opcional: sin él no se generan variantes y todo sigue
+funcionando con los originales).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from sqlalchemy import update
+
+from .db import AsyncSessionLocal
+from .response_cache import PRODUCTS, product_tag, response_cache
+from .security import invalidate_principal
+from .settings import IMAGE_WORKERS
+from ..models.product import ProductImage
+from ..models.user import User
+
+log = logging.getLogger(__name__)
+
+# nombre -> ancho máximo (px); nunca se agranda el original
+PRODUCT_VARIANTS = {"thumb": 160, "card": 480, "full": 1280}
+AVATAR_VARIANTS = {"thumb": 96, "card": 320}
+WEBP_QUALITY = 80
+
+
+# =========================
+# Trabajo (corre en los procesos del pool)
+# =========================
+def render_variants(src: str, widths: Dict[str, int]) -> Dict[str, str]:
+    """
+    Genera `<stem>_w<ancho>.webp` junto a `src`. Devuelve {nombre: archivo}.
+    El nombre va por ancho (no por "thumb"/"card") porque producto y avatar
+    pueden compartir el mismo blob con tamaños distintos.
+    """
+    from PIL import Image, ImageOps
+
+    src_path = Path(src)
+    existing = {name: src_path.with_name(f"{src_path.stem}_w{width}.webp") for name, width in widths.items()}
+    if all(p.exists() for p in existing.values()):
+        # blob deduplicado (core/storage.py): sus variantes ya están hechas
+        return {name: p.name for name, p in existing.items()}
+
+    with Image.open(src_path) as im:
+        im = ImageOps.exif_transpose(im)  # aplica la rotación antes de descartar EXIF
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        current = im.convert("RGBA" if has_alpha else "RGB")
+
+    out = {}
+    for name, width in sorted(widths.items(), key=lambda kv: -kv[1]):
+        if current.width > width:
+            current = current.resize((width, max(round(current.height * width / current.width), 1)), Image.LANCZOS)
+        dest = existing[name]
+        tmp = dest.with_name(dest.name + ".part")
+        # sin exif=/icc_profile=: el WebP sale sin metadatos
+        current.save(tmp, format="WEBP", quality=WEBP_QUALITY, method=4)
+        tmp.replace(dest)
+        out[name] = dest.name
+    return out
+
+
+# =========================
+# Pool
+# =========================
+class VariantPipeline:
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self._executor: Optional[Executor] = None
+        self.pending = 0
+        self.done = 0
+        self.failed = 0
+
+    def start(self) -> None:
+        if self.workers > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def render(self, src: Path, widths: Dict[str, int]) -> Optional[Dict[str, str]]:
+        """Variantes de `src` o None si falló (se registra y se sigue con el original)."""
+        if self.workers > 0 and self._executor is None:
+            self.start()
+        self.pending += 1
+        try:
+            names = await asyncio.get_running_loop().run_in_executor(
+                self._executor, render_variants, str(src), widths
+            )
+        except Exception:
+            self.failed += 1
+            log.exception("no se pudieron generar variantes de %s", src)
+            return None
+        finally:
+            self.pending -= 1
+        self.done += 1
+        return names
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "pending": self.pending, "done": self.done, "failed": self.failed}
+
+
+pipeline = VariantPipeline(IMAGE_WORKERS)
+
+
+def _sibling_url(url: str, filename: str) -> str:
+    return url.rsplit("/", 1)[0] + "/" + filename
+
+
+# =========================
+# Tareas (BackgroundTasks)
+# =========================
+async def generate_product_image_variants(image_id: int, src: Path, url: str) -> None:
+    names = await pipeline.render(src, PRODUCT_VARIANTS)
+    if not names:
+        return
+    async with AsyncSessionLocal() as db:
+        product_id = await db.scalar(
+            update(ProductImage)
+            .where(ProductImage.id == image_id)
+            .values({f"{name}_url": _sibling_url(url, f) for name, f in names.items()})
+            .returning(ProductImage.product_id)
+        )
+        await db.commit()
+    if product_id is not None:
+        await response_cache.invalidate(PRODUCTS, product_tag(product_id))
+
+
+async def generate_avatar_variants(user_id: int, src: Path, avatar_url: str) -> None:
+    names = await pipeline.render(src, AVATAR_VARIANTS)
+    if not names:
+        return
+    async with AsyncSessionLocal() as db:
+        # solo si sigue siendo su avatar (pudo cambiarlo mientras tanto)
+        await db.execute(
+            update(User)
+            .where(User.id == user_id, User.avatar_url == avatar_url)
+            .values({f"avatar_{name}_url": _sibling_url(avatar_url, f) for name, f in names.items()})
+        )
+        await db.commit()
+    await invalidate_principal(user_id)
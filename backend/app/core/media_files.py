@@ -0,0 +1,86 @@
+# backend/app/core/media_files.py
+"""
+Servido de /static y /media.
+
+Todos los archivos tienen nombre único que nunca cambia (sha256 en
+static/blobs, uuid en los árboles viejos), así que se sirven con
+`Cache-Control: immutable` por un año y ETag fuerte:
+
+- blobs y sus variantes: el nombre mismo (hash del contenido),
+- resto: inode + mtime + tamaño.
+
+`If-None-Match` / `If-Modified-Since` → 304; Range / If-Range los maneja
+FileResponse (206/416). El envío es zero-copy cuando el servidor ASGI
+ofrece la extensión `http.response.pathsend`; si no, chunks de 256 KB.
+
+Con MEDIA_ACCEL_REDIRECT la API solo resuelve el archivo y valida caché, y
+responde vacío con `X-Accel-Redirect`: nginx manda los bytes (sendfile,
+Range) desde una location interna, p. ej.:
+
+    location /_protected/ {
+        internal;
+        alias /srv/machtrueke/backend/;   # <prefijo>/static/... y <prefijo>/media/...
+        sendfile on;
+    }
+"""
+from __future__ import annotations
+
+import mimetypes
+import os
+from pathlib import Path
+from typing import Union
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from .settings import MEDIA_ACCEL_REDIRECT, MEDIA_MAX_AGE
+
+CACHE_CONTROL = f"public, max-age={MEDIA_MAX_AGE}, immutable"
+
+
+class _MediaFileResponse(FileResponse):
+    chunk_size = 256 * 1024  # menos saltos al threadpool que los 64 KB por defecto
+
+
+class MediaFiles(StaticFiles):
+    def __init__(self, *, directory: Union[str, os.PathLike], url_prefix: str, **kwargs) -> None:
+        """`url_prefix`: ruta pública del montaje ("/static"), para armar el X-Accel-Redirect."""
+        super().__init__(directory=directory, **kwargs)
+        self.url_prefix = url_prefix.rstrip("/")
+
+    @staticmethod
+    def _etag(full_path: Path, stat_result: os.stat_result) -> str:
+        stem = full_path.name.split(".", 1)[0]
+        if full_path.parent.parent.name == "blobs" and len(stem.split("_", 1)[0]) == 64:
+            return f'"{stem}"'  # direccionado por contenido
+        return f'"{stat_result.st_ino:x}-{int(stat_result.st_mtime):x}-{stat_result.st_size:x}"'
+
+    def file_response(
+        self,
+        full_path: Union[str, os.PathLike],
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        full_path = Path(full_path)
+        headers = {"etag": self._etag(full_path, stat_result), "cache-control": CACHE_CONTROL}
+        if status_code != 200:  # 404.html en modo html: sin caché inmutable
+            return FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+
+        response = _MediaFileResponse(full_path, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+
+        if MEDIA_ACCEL_REDIRECT:
+            rel = full_path.relative_to(Path(self.directory).resolve()).as_posix()
+            return Response(
+                headers={
+                    **headers,
+                    "x-accel-redirect": f"{MEDIA_ACCEL_REDIRECT}{self.url_prefix}/{rel}",
+                    "last-modified": response.headers["last-modified"],
+                },
+                media_type=mimetypes.guess_type(full_path.name)[0] or "application/octet-stream",
+            )
+        return response
@@ -0,0 +1,224 @@
+# backend/app/core/realtime.py
+"""
+Entrega de chat en tiempo real por WebSocket (/chats/ws).
+
+Cada worker guarda SUS sockets en un `ChatHub`; los eventos viajan entre
+workers a través de un broker:
+
+- InMemoryBroker: un solo proceso (uvicorn sin --workers). Entrega directa.
+- RedisBroker: PUBLISH/SUBSCRIBE en un canal de Redis. Acepta cualquier
+  cliente con la interfaz de `redis.asyncio` (p. ej. fakeredis en pruebas).
+
+Se elige con CHAT_BROKER_URL (vacío = memoria).
+
+La entrega local nunca espera a un cliente: cada socket tiene una cola
+acotada (CHAT_SEND_QUEUE) y su propia tarea escritora. Si la cola se llena
+(cliente lento o sin leer) el socket se cierra con 1013 y el cliente
+reconecta y se pone al día con ?after_id; los demás eventos no se frenan.
+
+El mismo canal lleva señales de control entre workers (`hub.signal`), p. ej.
+invalidar el usuario autenticado cacheado en todos ellos; no llegan a sockets.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from fastapi import WebSocket
+
+from .settings import CHAT_BROKER_URL, CHAT_SEND_QUEUE
+
+log = logging.getLogger(__name__)
+
+# deliver(user_ids, data_json): entrega local en el worker que recibe el evento
+Deliver = Callable[[List[int], str], Awaitable[None]]
+# señal de control: handler(user_ids), síncrono y barato (corre en el lazo del broker)
+SignalHandler = Callable[[List[int]], None]
+_SIGNAL_PREFIX = '{"signal": '
+
+
+# =========================
+# Brokers
+# =========================
+class Broker(ABC):
+    """Reparte eventos (destinatarios + JSON ya serializado) a todos los workers."""
+
+    @abstractmethod
+    async def start(self, deliver: Deliver) -> None: ...
+
+    @abstractmethod
+    async def stop(self) -> None: ...
+
+    @abstractmethod
+    async def publish(self, user_ids: List[int], data: str) -> None: ...
+
+
+class InMemoryBroker(Broker):
+    def __init__(self) -> None:
+        self._deliver: Optional[Deliver] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._deliver = deliver
+
+    async def stop(self) -> None:
+        self._deliver = None
+
+    async def publish(self, user_ids: List[int], data: str) -> None:
+        if self._deliver is not None:
+            await self._deliver(user_ids, data)
+
+
+class RedisBroker(Broker):
+    CHANNEL = "machtrueke:chat"
+
+    def __init__(self, url: str = "", client=None) -> None:
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:  # dependencia opcional
+                raise RuntimeError("CHAT_BROKER_URL=redis://... requiere `pip install redis`") from e
+            client = redis.from_url(url)
+        self._client = client
+        self._pubsub = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self, deliver: Deliver) -> None:
+        self._pubsub = self._client.pubsub()
+        await self._pubsub.subscribe(self.CHANNEL)
+        self._task = asyncio.create_task(self._listen(deliver))
+
+    async def _listen(self, deliver: Deliver) -> None:
+        async for msg in self._pubsub.listen():
+            if msg.get("type") != "message":
+                continue
+            try:
+                envelope = json.loads(msg["data"])
+                await deliver(envelope["to"], envelope["data"])
+            except Exception:
+                log.exception("chat broker: evento inválido o entrega fallida")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.CHANNEL)
+            await self._pubsub.aclose()
+        await self._client.aclose()
+
+    async def publish(self, user_ids: List[int], data: str) -> None:
+        await self._client.publish(self.CHANNEL, json.dumps({"to": user_ids, "data": data}))
+
+
+def make_broker(url: str) -> Broker:
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBroker(url)
+    return InMemoryBroker()
+
+
+# =========================
+# Hub (sockets de este worker)
+# =========================
+class _Outbox:
+    """Cola acotada + tarea escritora de UN socket: entregar es encolar."""
+
+    def __init__(self, ws: WebSocket, maxsize: int) -> None:
+        self.ws = ws
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize)
+        self.task = asyncio.create_task(self._write())
+
+    async def _write(self) -> None:
+        # si el envío falla el socket ya está cerrado: su endpoint lo limpia al desconectarse
+        with contextlib.suppress(Exception):
+            while True:
+                await self.ws.send_text(await self.queue.get())
+
+    def offer(self, data: str) -> bool:
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+
+class ChatHub:
+    CLOSE_TIMEOUT = 5.0   # seg. para cerrar un socket lento (puede estar trabado en TCP)
+
+    def __init__(self, broker: Broker, send_queue: int = CHAT_SEND_QUEUE) -> None:
+        self.broker = broker
+        self.send_queue = send_queue
+        self._sockets: Dict[int, Dict[WebSocket, _Outbox]] = {}
+        self._signals: Dict[str, SignalHandler] = {}
+        self._closing: Set[asyncio.Task] = set()
+        self.evicted = 0
+
+    async def start(self) -> None:
+        await self.broker.start(self._deliver_local)
+
+    async def stop(self) -> None:
+        await self.broker.stop()
+        for sockets in self._sockets.values():
+            for box in sockets.values():
+                box.task.cancel()
+        for task in list(self._closing):
+            task.cancel()
+
+    def connect(self, user_id: int, ws: WebSocket) -> None:
+        self._sockets.setdefault(user_id, {})[ws] = _Outbox(ws, self.send_queue)
+
+    def disconnect(self, user_id: int, ws: WebSocket) -> None:
+        sockets = self._sockets.get(user_id)
+        if sockets is None:
+            return
+        box = sockets.pop(ws, None)
+        if box is not None:
+            box.task.cancel()
+        if not sockets:
+            del self._sockets[user_id]
+
+    def _evict(self, user_id: int, ws: WebSocket) -> None:
+        """Saca un socket que no consume y lo cierra en segundo plano (sin esperarlo)."""
+        self.disconnect(user_id, ws)
+        self.evicted += 1
+        task = asyncio.create_task(self._close(ws))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close(self, ws: WebSocket) -> None:
+        with contextlib.suppress(Exception):
+            await asyncio.wait_for(ws.close(code=1013), self.CLOSE_TIMEOUT)   # 1013: reintenta más tarde
+
+    @property
+    def connections(self) -> int:
+        return sum(len(s) for s in self._sockets.values())
+
+    async def publish(self, user_ids: Iterable[int], event: dict) -> None:
+        """Serializa una vez y manda el evento a los sockets de `user_ids` (en cualquier worker)."""
+        await self.broker.publish(list(user_ids), json.dumps(event, default=str))
+
+    def on_signal(self, kind: str, handler: SignalHandler) -> None:
+        self._signals[kind] = handler
+
+    async def signal(self, kind: str, user_ids: Iterable[int]) -> None:
+        """Avisa a TODOS los workers (éste incluido) que corran el handler de `kind`."""
+        await self.broker.publish(list(user_ids), json.dumps({"signal": kind}))
+
+    async def _deliver_local(self, user_ids: List[int], data: str) -> None:
+        if data.startswith(_SIGNAL_PREFIX):
+            handler = self._signals.get(json.loads(data)["signal"])
+            if handler is not None:
+                handler(user_ids)
+            return
+        # solo encola: el lazo del broker (y las señales detrás) nunca espera E/S de clientes
+        for uid in user_ids:
+            for ws, box in list(self._sockets.get(uid, {}).items()):
+                if not box.offer(data):
+                    self._evict(uid, ws)
+
+
+hub = ChatHub(make_broker(CHAT_BROKER_URL))
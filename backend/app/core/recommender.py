@@ -0,0 +1,552 @@
+# backend/app/core/recommender.py
+"""
+Recomendador TF-IDF + similitud coseno sobre productos activos
+(título + descripción).
+
+Índice base (artefacto en disco, RECOMMENDER_DIR):
+- Tokenización en español: sin acentos ni mayúsculas (utils/text.fold),
+  sin stopwords y con plurales reducidos ("cámaras" == "camara").
+  El título cuenta doble.
+- Pesos (1 + log tf) · idf, filas normalizadas L2: el producto punto ES el
+  coseno.
+- Se guarda en dos orientaciones CSR como .npy: por documento (vector de un
+  producto) y por término (índice invertido). Consultar toca solo las listas
+  de los términos del vector, no los 100k productos.
+- Los workers lo abren con mmap (np.load(mmap_mode="r")): arrancar no copia
+  el índice a memoria y el SO comparte las páginas entre procesos.
+- Cada build es un directorio versionado; CURRENT apunta al vigente y se
+  reemplaza de forma atómica.
+
+Cambios entre builds (create_product / update_product / bajas) van a un
+delta en memoria de ESTE worker: vectores nuevos con el idf del base, y las
+filas viejas del base quedan enmascaradas. El lazo del lifespan reconstruye
+cada RECOMMENDER_REBUILD_INTERVAL seg. (un solo worker a la vez, con flock)
+y los demás recargan al ver un CURRENT nuevo. Build manual:
+scripts/build_recommender.py.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import heapq
+import json
+import logging
+import math
+import os
+import re
+import shutil
+import time
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from operator import itemgetter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal
+from .settings import RECOMMENDER_DIR, RECOMMENDER_REBUILD_INTERVAL
+from ..models.chat import Conversation
+from ..models.product import Product
+from ..models.swipe import Swipe
+from ..utils.text import fold
+
+log = logging.getLogger(__name__)
+
+Vector = Dict[str, float]
+
+KEEP_VERSIONS = 2          # el vigente y el anterior (workers que aún no recargan)
+TITLE_WEIGHT = 2           # el título pesa más que la descripción, como en la búsqueda
+CHECK_INTERVAL = 60.0      # seg. entre revisiones de CURRENT en el lazo
+MAX_QUERY_TERMS = 32       # términos de más peso que se consultan por vector
+
+# ---------- Tokenización ----------
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes aqui asi aun bien cada casi
+como con contra cual cuales cuando de del desde donde dos el ella ellas ello ellos en
+entre era eres es esa esas ese eso esos esta estan estas este esto estos fue fueron
+ha hay hasta la las le les lo los mas me mi mis mucho muy nada ni no nos nuestra
+nuestro o otra otras otro otros para pero poco por porque que quien se ser si sin
+sobre solo son su sus tal tambien te tengo tiene tienen todo todos tu tus un una unas
+uno unos usted ya yo
+""".split())
+
+
+def _stem(word: str) -> str:
+    """Plural → singular, lo justo para que "cargadores" y "cargador" coincidan."""
+    if len(word) > 4 and word.endswith("ces"):
+        return word[:-3] + "z"          # lapices → lapiz
+    if len(word) > 4 and word.endswith("es") and word[-3] in "lnrdzj":
+        return word[:-2]                # cargadores → cargador
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]                # libros → libro
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        _stem(w) for w in _WORD_RE.findall(fold(text or ""))
+        if len(w) > 1 and w not in STOPWORDS
+    ]
+
+
+def term_counts(title: str, description: str) -> Counter:
+    counts = Counter(tokenize(description))
+    for term in tokenize(title):
+        counts[term] += TITLE_WEIGHT
+    return counts
+
+
+def _normalize(weights: Dict[str, float]) -> Vector:
+    norm = math.sqrt(sum(w * w for w in weights.values()))
+    return {t: w / norm for t, w in weights.items()} if norm else {}
+
+
+# =========================
+# Artefacto en disco
+# =========================
+_ARRAYS = (
+    "ids", "idf",
+    "doc_indptr", "doc_indices", "doc_data",
+    "term_indptr", "term_indices", "term_data",
+)
+
+
+@dataclass(frozen=True)
+class TfidfIndex:
+    version: str
+    built_at: float        # inicio de la lectura de productos (epoch)
+    terms: List[str]
+    term_ids: Dict[str, int]
+    ids: np.ndarray        # product_id por fila, ascendente
+    idf: np.ndarray
+    doc_indptr: np.ndarray
+    doc_indices: np.ndarray
+    doc_data: np.ndarray
+    term_indptr: np.ndarray
+    term_indices: np.ndarray
+    term_data: np.ndarray
+
+    @property
+    def n_docs(self) -> int:
+        return len(self.ids)
+
+    @property
+    def max_idf(self) -> float:
+        # idf de un término que ningún documento del base tiene
+        return math.log(1 + self.n_docs) + 1
+
+    def row(self, product_id: int) -> Optional[int]:
+        r = int(np.searchsorted(self.ids, product_id))
+        return r if r < self.n_docs and self.ids[r] == product_id else None
+
+    def rows(self, product_ids: Iterable[int]) -> np.ndarray:
+        wanted = np.fromiter(product_ids, dtype=np.int64)
+        r = np.searchsorted(self.ids, wanted)
+        ok = r < self.n_docs
+        r = r[ok]
+        return r[self.ids[r] == wanted[ok]]
+
+    def vector(self, row: int) -> Vector:
+        s, e = self.doc_indptr[row], self.doc_indptr[row + 1]
+        return {self.terms[t]: float(w) for t, w in zip(self.doc_indices[s:e], self.doc_data[s:e])}
+
+    @classmethod
+    def open(cls, path: Path) -> "TfidfIndex":
+        meta = json.loads((path / "meta.json").read_text())
+        terms = json.loads((path / "terms.json").read_text(encoding="utf-8"))
+        arrays = {name: np.load(path / f"{name}.npy", mmap_mode="r") for name in _ARRAYS}
+        return cls(
+            version=meta["version"], built_at=meta["built_at"],
+            terms=terms, term_ids={t: i for i, t in enumerate(terms)}, **arrays,
+        )
+
+
+def _current(directory: Path) -> Optional[Path]:
+    try:
+        name = (directory / "CURRENT").read_text().strip()
+    except FileNotFoundError:
+        return None
+    return directory / name if name else None
+
+
+def build_index(db: Session, directory: Path = RECOMMENDER_DIR) -> Path:
+    """
+    Lee los productos activos y escribe una versión nueva del índice;
+    CURRENT pasa a apuntarle al final (atómico). Devuelve su directorio.
+    """
+    built_at = time.time()
+    ids: List[int] = []
+    docs: List[Counter] = []
+    rows = db.execute(
+        select(Product.id, Product.title, Product.description)
+        .where(Product.is_active.is_(True))
+        .order_by(Product.id)
+        .execution_options(yield_per=2000)
+    )
+    for pid, title, description in rows:
+        ids.append(pid)
+        docs.append(term_counts(title, description))
+
+    df: Counter = Counter()
+    for counts in docs:
+        df.update(counts.keys())
+    terms = sorted(df)
+    term_ids = {t: i for i, t in enumerate(terms)}
+    n = len(ids)
+    idf = [math.log((1 + n) / (1 + df[t])) + 1 for t in terms]
+
+    # CSR por documento
+    doc_indptr = np.zeros(n + 1, dtype=np.int64)
+    doc_indices: List[int] = []
+    doc_data: List[float] = []
+    for i, counts in enumerate(docs):
+        idx = sorted(term_ids[t] for t in counts)
+        weights = [(1 + math.log(counts[terms[t]])) * idf[t] for t in idx]
+        norm = math.sqrt(sum(w * w for w in weights)) or 1.0
+        doc_indices.extend(idx)
+        doc_data.extend(w / norm for w in weights)
+        doc_indptr[i + 1] = len(doc_indices)
+    doc_indices_a = np.array(doc_indices, dtype=np.int32)
+    doc_data_a = np.array(doc_data, dtype=np.float32)
+    del docs, doc_indices, doc_data
+
+    # CSR por término (índice invertido): transponer ordenando por término
+    order = np.argsort(doc_indices_a, kind="stable")
+    doc_of_nnz = np.repeat(np.arange(n, dtype=np.int32), np.diff(doc_indptr))
+    term_indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(doc_indices_a, minlength=len(terms)), out=term_indptr[1:])
+
+    arrays = {
+        "ids": np.array(ids, dtype=np.int64),
+        "idf": np.array(idf, dtype=np.float32),
+        "doc_indptr": doc_indptr,
+        "doc_indices": doc_indices_a,
+        "doc_data": doc_data_a,
+        "term_indptr": term_indptr,
+        "term_indices": doc_of_nnz[order],
+        "term_data": doc_data_a[order],
+    }
+
+    directory = Path(directory)
+    version = f"v{int(built_at * 1000)}"
+    tmp = directory / f".{version}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+    for name, arr in arrays.items():
+        np.save(tmp / f"{name}.npy", arr)
+    (tmp / "terms.json").write_text(json.dumps(terms, ensure_ascii=False), encoding="utf-8")
+    (tmp / "meta.json").write_text(json.dumps({
+        "version": version, "built_at": built_at,
+        "docs": n, "terms": len(terms), "nnz": int(len(doc_data_a)),
+    }))
+    final = directory / version
+    tmp.rename(final)
+    pointer = directory / "CURRENT.tmp"
+    pointer.write_text(version)
+    os.replace(pointer, directory / "CURRENT")
+
+    # versiones viejas: en Linux borrar un archivo mapeado no afecta al worker que lo usa
+    old = sorted(p for p in directory.glob("v*") if p.is_dir() and p.name != version)
+    for path in old[: max(len(old) - (KEEP_VERSIONS - 1), 0)]:
+        shutil.rmtree(path, ignore_errors=True)
+    return final
+
+
+@contextlib.contextmanager
+def _build_lock(directory: Path):
+    """flock no bloqueante: True si este proceso debe construir."""
+    directory.mkdir(parents=True, exist_ok=True)
+    try:
+        import fcntl
+    except ImportError:  # Windows: sin coordinación entre procesos
+        yield True
+        return
+    with open(directory / ".lock", "w") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _build_with_lock(directory: Path, max_age: float) -> bool:
+    """Construye si la versión vigente tiene más de `max_age` seg. y nadie más lo hace."""
+    with _build_lock(directory) as acquired:
+        if not acquired:
+            return False
+        current = _current(directory)
+        if current is not None and max_age > 0:
+            with contextlib.suppress(OSError, ValueError, KeyError):
+                meta = json.loads((current / "meta.json").read_text())
+                if time.time() - meta["built_at"] < max_age:
+                    return False   # otro worker acaba de construir
+        with SessionLocal() as db:
+            build_index(db, directory)
+        return True
+
+
+# =========================
+# Recomendador (por worker)
+# =========================
+class Recommender:
+    def __init__(self, directory: Path, rebuild_interval: float) -> None:
+        self.directory = Path(directory)
+        self.rebuild_interval = rebuild_interval
+        self._index: Optional[TfidfIndex] = None
+        # delta desde el último build: product_id → (vector, cuándo)
+        self._delta: Dict[int, Tuple[Vector, float]] = {}
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._removed: Dict[int, float] = {}
+        self._masked: Optional[np.ndarray] = None   # filas del base a ignorar (perezoso)
+        self._task: Optional[asyncio.Task] = None
+        # métricas
+        self.queries = 0
+        self.query_time = 0.0
+        self.builds = 0
+        self.last_build_s: Optional[float] = None
+
+    # ---------- carga ----------
+    def load(self) -> bool:
+        """Abre la versión de CURRENT si cambió. True si se cambió de índice."""
+        path = _current(self.directory)
+        if path is None or (self._index is not None and self._index.version == path.name):
+            return False
+        index = TfidfIndex.open(path)
+        self._index = index
+        # lo escrito antes de que el build leyera productos ya está en el base
+        # (margen de 1 s por relojes/commits en vuelo)
+        cutoff = index.built_at - 1.0
+        for pid, (vec, ts) in list(self._delta.items()):
+            if ts < cutoff:
+                self._drop_delta(pid)
+        self._removed = {pid: ts for pid, ts in self._removed.items() if ts >= cutoff}
+        self._masked = None
+        return True
+
+    # ---------- mantenimiento incremental ----------
+    def vectorize(self, title: str, description: str) -> Vector:
+        counts = term_counts(title, description)
+        index = self._index
+        weights = {}
+        for term, c in counts.items():
+            if index is None:
+                idf = 1.0
+            else:
+                t = index.term_ids.get(term)
+                idf = float(index.idf[t]) if t is not None else index.max_idf
+            weights[term] = (1 + math.log(c)) * idf
+        return _normalize(weights)
+
+    def update(self, product_id: int, title: str, description: str) -> None:
+        """Producto creado o editado (y activo): reemplaza su vector."""
+        self._drop_delta(product_id)
+        self._removed.pop(product_id, None)
+        vec = self.vectorize(title, description)
+        self._delta[product_id] = (vec, time.time())
+        for term, w in vec.items():
+            self._postings[term][product_id] = w
+        self._masked = None
+
+    def remove(self, product_id: int) -> None:
+        """Producto desactivado o borrado: deja de recomendarse."""
+        self._drop_delta(product_id)
+        self._removed[product_id] = time.time()
+        self._masked = None
+
+    def _drop_delta(self, product_id: int) -> None:
+        entry = self._delta.pop(product_id, None)
+        if entry is None:
+            return
+        for term in entry[0]:
+            bucket = self._postings.get(term)
+            if bucket is not None:
+                bucket.pop(product_id, None)
+                if not bucket:
+                    del self._postings[term]
+
+    def _masked_rows(self) -> np.ndarray:
+        # filas del base reemplazadas (delta) o dadas de baja
+        if self._masked is None:
+            index = self._index
+            self._masked = index.rows([*self._delta, *self._removed]) if index is not None else np.empty(0, np.int64)
+        return self._masked
+
+    # ---------- consultas ----------
+    def vector(self, product_id: int) -> Optional[Vector]:
+        entry = self._delta.get(product_id)
+        if entry is not None:
+            return entry[0]
+        if product_id in self._removed or self._index is None:
+            return None
+        row = self._index.row(product_id)
+        return self._index.vector(row) if row is not None else None
+
+    def top(self, query: Vector, k: int, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        """Los `k` productos más similares a `query`: [(product_id, coseno)] descendente."""
+        t0 = time.perf_counter()
+        exclude = set(exclude)
+        results: Dict[int, float] = {}
+        index = self._index
+        if len(query) > MAX_QUERY_TERMS:
+            # los términos de más peso deciden el ranking; los demás solo alargan la consulta
+            query = dict(heapq.nlargest(MAX_QUERY_TERMS, query.items(), key=itemgetter(1)))
+        if index is not None and query:
+            # producto punto contra el índice invertido: una sola acumulación
+            # vectorizada sobre las listas de los términos de la consulta
+            docs, weights = [], []
+            for term, w in query.items():
+                t = index.term_ids.get(term)
+                if t is None:
+                    continue
+                s, e = index.term_indptr[t], index.term_indptr[t + 1]
+                docs.append(index.term_indices[s:e])
+                weights.append(index.term_data[s:e] * np.float32(w))
+            if docs:
+                scores = np.bincount(np.concatenate(docs), np.concatenate(weights), minlength=index.n_docs)
+            else:
+                scores = np.zeros(index.n_docs)
+            scores[self._masked_rows()] = 0
+            if exclude:
+                scores[index.rows(exclude)] = 0
+            candidates = np.flatnonzero(scores)
+            if len(candidates) > k:
+                candidates = candidates[np.argpartition(scores[candidates], -k)[-k:]]
+            results = dict(zip(index.ids[candidates].tolist(), scores[candidates].tolist()))
+
+        delta: Dict[int, float] = defaultdict(float)
+        for term, w in query.items():
+            for pid, dw in self._postings.get(term, {}).items():
+                delta[pid] += w * dw
+        for pid, score in delta.items():
+            if pid not in exclude:
+                results[pid] = score
+
+        ranked = heapq.nlargest(k, results.items(), key=itemgetter(1))
+        self.queries += 1
+        self.query_time += time.perf_counter() - t0
+        return ranked
+
+    def similar(self, product_id: int, k: int, title: str = "", description: str = "") -> List[Tuple[int, float]]:
+        # sin vector en el índice (p. ej. creado en otro worker): se calcula del texto
+        query = self.vector(product_id) or self.vectorize(title, description)
+        return self.top(query, k, exclude=(product_id,))
+
+    def profile(self, seeds: Sequence[Tuple[int, str, str]]) -> Vector:
+        """Suma normalizada de los vectores de `seeds` [(id, título, descripción)]."""
+        profile: Dict[str, float] = defaultdict(float)
+        for pid, title, description in seeds:
+            for term, w in (self.vector(pid) or self.vectorize(title, description)).items():
+                profile[term] += w
+        return _normalize(profile)
+
+    def recommend(self, seeds: Sequence[Tuple[int, str, str]], k: int, exclude: Iterable[int] = ()) -> List[Tuple[int, float]]:
+        return self.top(self.profile(seeds), k, exclude={*exclude, *(s[0] for s in seeds)})
+
+    def scores(self, query: Vector, product_ids: Iterable[int]) -> List[float]:
+        """Coseno de `query` con cada producto (0 si el índice no lo conoce)."""
+        out = []
+        for pid in product_ids:
+            vec = self.vector(pid) if query else None
+            out.append(sum(w * vec.get(t, 0.0) for t, w in query.items()) if vec else 0.0)
+        return out
+
+    # ---------- ciclo de vida ----------
+    async def start(self) -> None:
+        try:
+            await asyncio.to_thread(self.load)
+        except Exception:
+            log.exception("recomendador: no se pudo abrir el índice")
+        if self.rebuild_interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._rebuild_loop())
+
+    async def rebuild(self, max_age: float = 0) -> bool:
+        t0 = time.perf_counter()
+        built = await asyncio.to_thread(_build_with_lock, self.directory, max_age)
+        if built:
+            self.builds += 1
+            self.last_build_s = round(time.perf_counter() - t0, 2)
+        await asyncio.to_thread(self.load)
+        return built
+
+    async def _rebuild_loop(self) -> None:
+        # sin índice se construye enseguida; luego, cuando el vigente envejece
+        while True:
+            try:
+                age = self.age()
+                if age is None or age >= self.rebuild_interval:
+                    if await self.rebuild(max_age=self.rebuild_interval):
+                        log.info("recomendador: índice %s (%s docs)", self._index.version, self._index.n_docs)
+                elif await asyncio.to_thread(self.load):
+                    log.info("recomendador: cargado %s", self._index.version)
+            except Exception:
+                log.exception("recomendador: build/recarga fallida, se mantiene el índice")
+            await asyncio.sleep(min(self.rebuild_interval, CHECK_INTERVAL))
+
+    def age(self) -> Optional[float]:
+        return time.time() - self._index.built_at if self._index is not None else None
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        index = self._index
+        return {
+            "version": index.version if index else None,
+            "docs": index.n_docs if index else 0,
+            "terms": len(index.terms) if index else 0,
+            "age_s": round(self.age(), 1) if index else None,
+            "delta": len(self._delta),
+            "removed": len(self._removed),
+            "queries": self.queries,
+            "avg_query_ms": round(self.query_time / self.queries * 1000, 3) if self.queries else None,
+            "builds": self.builds,
+            "last_build_s": self.last_build_s,
+            "rebuild_interval": self.rebuild_interval,
+        }
+
+
+recommender = Recommender(RECOMMENDER_DIR, RECOMMENDER_REBUILD_INTERVAL)
+
+
+# ---------- Perfil del usuario ----------
+PROFILE_SEEDS = 20  # likes / conversaciones más recientes que forman el perfil
+
+
+async def profile_seeds(db: AsyncSession, user_id: int) -> list:
+    """
+    Productos ajenos que describen el interés de `user_id`: sus likes más
+    recientes y los productos de sus conversaciones. Filas (id, title, description).
+    """
+    cols = (Product.id, Product.title, Product.description)
+    liked = (await db.execute(
+        select(*cols)
+        .join(Swipe, Swipe.product_id == Product.id)
+        .where(Swipe.swiper_id == user_id, Swipe.liked.is_(True))
+        .order_by(Swipe.created_at.desc())
+        .limit(PROFILE_SEEDS)
+    )).all()
+    chatted = (await db.execute(
+        select(*cols)
+        .join(Conversation, Conversation.product_id == Product.id)
+        .where(
+            or_(Conversation.user1_id == user_id, Conversation.user2_id == user_id),
+            Product.owner_id != user_id,
+        )
+        .order_by(Conversation.updated_at.desc())
+        .limit(PROFILE_SEEDS)
+    )).all()
+    return list({r.id: r for r in (*liked, *chatted)}.values())[:PROFILE_SEEDS]
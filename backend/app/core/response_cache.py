@@ -0,0 +1,270 @@
+# backend/app/core/response_cache.py
+"""
+Caché de respuestas de los endpoints públicos de lectura (listado y detalle
+de productos, campus).
+
+Se guarda la respuesta YA serializada (cuerpo JSON + headers como
+X-Next-Cursor): un acierto no toca la base ni re-serializa ORM.
+
+- Clave: endpoint + parámetros normalizados + generación de cada tag.
+- Invalidación precisa por tags: cada escritura sube la generación de sus
+  tags ("products", "product:<id>") y las claves viejas quedan huérfanas
+  hasta que expiran. No hace falta listar ni borrar claves.
+- Estampida: una sola reconstrucción por clave a la vez (single-flight).
+  Tras `ttl` la entrada queda "vieja" por `stale` segundos más: el primer
+  request la reconstruye y los demás reciben la vieja mientras tanto; solo
+  esperan si no hay nada que servir.
+
+Backends:
+- MemoryBackend: LRU + TTL por worker. Las invalidaciones solo llegan al
+  worker que escribió; los demás ven datos de hasta `ttl` segundos.
+- RedisBackend: compartido entre workers (claves y generaciones en Redis).
+  Acepta cualquier cliente con la interfaz de `redis.asyncio`.
+
+Se elige con RESPONSE_CACHE_URL (vacío = memoria).
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import Response
+
+from .cache import TTLCache
+from .settings import RESPONSE_CACHE_SIZE, RESPONSE_CACHE_STALE, RESPONSE_CACHE_TTL, RESPONSE_CACHE_URL
+
+log = logging.getLogger(__name__)
+
+CACHE_HEADER = "X-Cache"
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+    fresh_until: float = 0.0  # epoch; después se sirve como "stale" mientras se reconstruye
+
+    def dumps(self) -> bytes:
+        meta = json.dumps({"h": self.headers, "f": self.fresh_until}, separators=(",", ":"))
+        return meta.encode() + b"\n" + self.body
+
+    @classmethod
+    def loads(cls, raw: bytes) -> "CachedResponse":
+        meta, body = raw.split(b"\n", 1)
+        m = json.loads(meta)
+        return cls(body=body, headers=m["h"], fresh_until=m["f"])
+
+    def to_response(self, state: str) -> Response:
+        return Response(
+            content=self.body,
+            media_type="application/json",
+            headers={**self.headers, CACHE_HEADER: state},
+        )
+
+
+# =========================
+# Backends
+# =========================
+class MemoryBackend:
+    def __init__(self, maxsize: int) -> None:
+        self._entries = TTLCache(maxsize=maxsize, ttl=RESPONSE_CACHE_TTL + RESPONSE_CACHE_STALE)
+        self._gens: Dict[str, int] = {}
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        return self._entries.get(key)
+
+    async def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        self._entries.set(key, value, ttl=ttl)
+
+    async def generations(self, tags: List[str]) -> List[int]:
+        return [self._gens.get(t, 0) for t in tags]
+
+    async def bump(self, tags: List[str]) -> None:
+        for t in tags:
+            self._gens[t] = self._gens.get(t, 0) + 1
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        entries = self._entries.stats()
+        return {"type": "memory", "size": entries["size"], "maxsize": entries["maxsize"]}
+
+
+class RedisBackend:
+    PREFIX = "machtrueke:rc:"
+
+    def __init__(self, url: str = "", client=None) -> None:
+        if client is None:
+            try:
+                import redis.asyncio as redis
+            except ImportError as e:  # dependencia opcional
+                raise RuntimeError("RESPONSE_CACHE_URL=redis://... requiere `pip install redis`") from e
+            client = redis.from_url(url)
+        self._client = client
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raw = await self._client.get(self.PREFIX + key)
+        return CachedResponse.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: CachedResponse, ttl: float) -> None:
+        await self._client.set(self.PREFIX + key, value.dumps(), px=max(int(ttl * 1000), 1))
+
+    async def generations(self, tags: List[str]) -> List[int]:
+        raw = await self._client.mget([self.PREFIX + "gen:" + t for t in tags])
+        return [int(v) if v is not None else 0 for v in raw]
+
+    async def bump(self, tags: List[str]) -> None:
+        async with self._client.pipeline(transaction=False) as pipe:
+            for t in tags:
+                pipe.incr(self.PREFIX + "gen:" + t)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    def stats(self) -> dict:
+        return {"type": "redis"}
+
+
+def make_backend(url: str):
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisBackend(url)
+    return MemoryBackend(RESPONSE_CACHE_SIZE)
+
+
+# =========================
+# Caché
+# =========================
+Build = Callable[[], Awaitable[Tuple[bytes, Dict[str, str]]]]
+
+
+def normalize_key(endpoint: str, params: dict) -> str:
+    """
+    `endpoint?a=1&b=x` con parámetros ordenados; None y "" se omiten y los
+    espacios se colapsan. Mayúsculas se respetan (los cursores las usan):
+    el endpoint pasa ya en minúsculas lo que no distingue (p. ej. `q`).
+    """
+    parts = []
+    for name in sorted(params):
+        value = params[name]
+        if value is None or value == "":
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split())
+        parts.append(f"{name}={value}")
+    return endpoint + "?" + "&".join(parts)
+
+
+class ResponseCache:
+    def __init__(self, backend, ttl: float, stale: float) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self.stale = stale
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # métricas (de este worker)
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0
+
+    async def respond(self, endpoint: str, params: dict, tags: Iterable[str], build: Build) -> Response:
+        """
+        Respuesta cacheada de `endpoint` con `params`. `build()` corre la
+        consulta y devuelve (cuerpo JSON, headers); solo se guarda si no lanza.
+        """
+        if not self.enabled:
+            body, headers = await build()
+            return CachedResponse(body, headers).to_response("BYPASS")
+
+        tags = list(tags)
+        try:
+            gens = await self.backend.generations(tags)
+            key = normalize_key(endpoint, params) + "#" + ",".join(f"{t}:{g}" for t, g in zip(tags, gens))
+            entry = await self.backend.get(key)
+        except Exception:
+            # el caché nunca tumba el endpoint: sin backend se consulta directo
+            self.errors += 1
+            log.exception("response cache: backend no disponible")
+            body, headers = await build()
+            return CachedResponse(body, headers).to_response("BYPASS")
+
+        if entry is not None and entry.fresh_until > time.time():
+            self.hits += 1
+            return entry.to_response("HIT")
+
+        pending = self._inflight.get(key)
+        if pending is not None:
+            if entry is not None:
+                self.stale_hits += 1  # otro request ya la está reconstruyendo
+                return entry.to_response("STALE")
+            self.waits += 1
+            return (await asyncio.shield(pending)).to_response("HIT")
+
+        self.misses += 1
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            body, headers = await build()
+            fresh = CachedResponse(body, headers, fresh_until=time.time() + self.ttl)
+            fut.set_result(fresh)
+        except BaseException as e:
+            fut.set_exception(e)
+            fut.exception()  # marcado como recuperado si nadie esperaba
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        try:
+            await self.backend.set(key, fresh, self.ttl + self.stale)
+        except Exception:
+            self.errors += 1
+            log.exception("response cache: no se pudo guardar %s", key)
+        return fresh.to_response("MISS")
+
+    async def invalidate(self, *tags: str) -> None:
+        """Llamar DESPUÉS del commit de la escritura."""
+        if not tags:
+            return
+        try:
+            await self.backend.bump(list(tags))
+        except Exception:
+            self.errors += 1
+            log.exception("response cache: no se pudo invalidar %s", tags)
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def stats(self) -> dict:
+        total = self.hits + self.stale_hits + self.misses + self.waits
+        return {
+            "backend": self.backend.stats(),
+            "ttl": self.ttl,
+            "stale": self.stale,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "waits": self.waits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_ratio": round((self.hits + self.stale_hits + self.waits) / total, 4) if total else 0.0,
+            "inflight": len(self._inflight),
+        }
+
+
+response_cache = ResponseCache(make_backend(RESPONSE_CACHE_URL), RESPONSE_CACHE_TTL, RESPONSE_CACHE_STALE)
+
+
+# tags de invalidación
+PRODUCTS = "products"
+
+
+def product_tag(product_id: int) -> str:
+    return f"product:{product_id}"
@@ -0,0 +1,147 @@
+# backend/app/core/search.py
+"""
+Búsqueda de texto completo sobre productos (título + descripción).
+
+- PostgreSQL: columna `products.search_vector` (tsvector) con índice GIN y la
+  configuración `es_unaccent` (stemming en español + unaccent), creadas por la
+  migración `a1f3c9d2e4b7`.
+- SQLite (dev): tabla espejo FTS5 `products_fts` (rowid = products.id) con
+  tokenizer `unicode61 remove_diacritics 2` ("cámara" == "camara").
+
+El índice se mantiene desde la app con `index_product` (create/update) y se
+reconstruye completo con `rebuild_index` (scripts/rebuild_search.py).
+"""
+from __future__ import annotations
+
+import re
+from typing import List
+
+from sqlalchemy import Column, Integer, MetaData, Select, Table, Text, false, func, literal_column, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.product import Product
+
+TS_CONFIG = "es_unaccent"
+FTS_TABLE = "products_fts"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Tabla FTS5 en su propio MetaData: no la crea create_all ni la ve Alembic
+products_fts = Table(
+    FTS_TABLE,
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    Column("title", Text),
+    Column("description", Text),
+)
+
+
+def _pg_vector_sql(title: str, description: str) -> str:
+    # título pesa más que descripción en el ranking
+    return (
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({title}, '')), 'A') || "
+        f"setweight(to_tsvector('{TS_CONFIG}', coalesce({description}, '')), 'B')"
+    )
+
+
+def _terms(q: str) -> List[str]:
+    """Tokens "seguros" de la búsqueda (sin operadores del motor)."""
+    return _TOKEN_RE.findall(q.lower())
+
+
+# =========================
+# Esquema (solo SQLite dev)
+# =========================
+def ensure_search_schema(bind: Engine | Connection) -> None:
+    """Crea la tabla FTS5 en SQLite si no existe. En Postgres lo hace la migración."""
+    if bind.dialect.name != "sqlite":
+        return
+    stmt = text(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(title, description, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    if isinstance(bind, Engine):
+        with bind.begin() as conn:
+            conn.execute(stmt)
+    else:
+        bind.execute(stmt)
+
+
+# =========================
+# Mantenimiento del índice
+# =========================
+async def index_product(db: AsyncSession, product: Product) -> None:
+    """
+    (Re)indexa un producto dentro de la transacción actual.
+    Requiere `product.id` (haz flush antes si es nuevo).
+    """
+    dialect = db.get_bind().dialect.name
+    params = {"id": product.id, "title": product.title, "description": product.description}
+    if dialect == "postgresql":
+        await db.execute(
+            text(f"UPDATE products SET search_vector = {_pg_vector_sql(':title', ':description')} WHERE id = :id"),
+            params,
+        )
+    elif dialect == "sqlite":
+        await db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), params)
+        await db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, description) VALUES (:id, :title, :description)"),
+            params,
+        )
+
+
+def rebuild_index(db: Session) -> int:
+    """Reconstruye el índice completo desde `products` (síncrono, para scripts)."""
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql":
+        res = db.execute(text(f"UPDATE products SET search_vector = {_pg_vector_sql('title', 'description')}"))
+        return res.rowcount
+    if bind.dialect.name == "sqlite":
+        ensure_search_schema(db.connection())
+        db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        res = db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, description) SELECT id, title, description FROM products")
+        )
+        return res.rowcount
+    return 0
+
+
+# =========================
+# Consulta
+# =========================
+def apply_search(db: AsyncSession, query: Select, q: str) -> Select:
+    """
+    Filtra `query` (select sobre Product) por `q` y la ordena por relevancia.
+    Cada término se busca como prefijo (búsqueda mientras se escribe).
+    """
+    terms = _terms(q)
+    if not terms:
+        return query.where(false())
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        tsq = func.to_tsquery(
+            literal_column(f"'{TS_CONFIG}'::regconfig"),
+            " & ".join(f"{t}:*" for t in terms),
+        )
+        vector = literal_column("products.search_vector")
+        return query.where(vector.op("@@")(tsq)).order_by(
+            func.ts_rank_cd(vector, tsq).desc(), Product.id.desc()
+        )
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{t}"*' for t in terms)
+        return (
+            query.join(products_fts, products_fts.c.rowid == Product.id)
+            .where(literal_column(FTS_TABLE).op("MATCH")(match))
+            # `rank` es la columna oculta de FTS5 (bm25): menor = más relevante
+            .order_by(literal_column(f"{FTS_TABLE}.rank"), Product.id.desc())
+        )
+
+    # Otros motores: búsqueda lineal de siempre
+    like = f"%{q}%"
+    return query.where(
+        (Product.title.ilike(like)) | (Product.description.ilike(like))
+    ).order_by(Product.id.desc())
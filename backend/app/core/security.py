@@ -1,17 +1,26 @@
 # backend/app/core/security.py
 
+import logging
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached, raiseload
 
+from .cache import TTLCache
 from .db import get_db
+from .hasher import crypt_context
+from .realtime import hub
+from .settings import PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL
 from ..models.user import User
 
+log = logging.getLogger(__name__)
+
 # =========================
 # Configuración de seguridad
 # =========================
@@ -24,8 +33,9 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24  # 24 horas
 # Para Swagger: indica dónde obtener el token (nuestro endpoint de login)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login") 
 
-# Hash de contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Hash de contraseñas (costo BCRYPT_ROUNDS). En requests usar `core.hasher.hasher`,
+# que corre fuera del event loop; estas funciones síncronas quedan para scripts
+pwd_context = crypt_context()
 
 
 # =========================
@@ -61,9 +71,82 @@ def create_access_token(
     return encoded_jwt
 
 
-def get_current_user(
+def user_id_from_token(token: str) -> Optional[int]:
+    """
+    Devuelve el ID de usuario ('sub') de un JWT válido, o None si el token
+    es inválido/expiró. Útil fuera de Depends (p. ej. WebSockets).
+    """
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        sub = payload.get("sub")
+        if sub is None:
+            return None
+        return int(sub)
+    except (JWTError, ValueError):
+        return None
+
+
+# =========================
+# Caché del usuario autenticado
+# =========================
+# Guarda las columnas de User por id: cada request arma su propia instancia
+# (nunca se comparte un objeto ORM entre requests) y la adjunta a su sesión
+# sin SQL, así los endpoints pueden modificarla y hacer commit como siempre.
+# Es por worker: las invalidaciones viajan a los demás por el broker del chat
+# (hub.signal); el TTL acota lo que dure una señal perdida.
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL)
+PRINCIPAL_SIGNAL = "principal.invalidate"
+# sube con cada invalidación: una lectura de BD que empezó antes no se cachea
+_principal_epoch = 0
+
+
+@lru_cache(maxsize=None)
+def _user_columns() -> tuple[str, ...]:
+    # perezoso: inspeccionar el mapper al importar lo configuraría antes que Campus
+    return tuple(attr.key for attr in inspect(User).column_attrs)
+
+
+def _drop_principals(user_ids: List[int]) -> None:
+    global _principal_epoch
+    _principal_epoch += 1
+    for user_id in user_ids:
+        principal_cache.pop(user_id)
+
+
+hub.on_signal(PRINCIPAL_SIGNAL, _drop_principals)
+
+
+async def invalidate_principal(user_id: int) -> None:
+    """
+    Llamar DESPUÉS del commit que modifica o borra al usuario (perfil,
+    contraseña, avatar, baja). Lo saca de la caché de este worker y avisa a
+    los demás antes de que el request responda.
+    """
+    _drop_principals([user_id])
+    try:
+        await hub.signal(PRINCIPAL_SIGNAL, [user_id])
+    except Exception:
+        # el cambio ya está en BD: no se convierte en 500; los demás workers lo ven al expirar el TTL
+        log.exception("no se pudo avisar la invalidación del usuario %s a los demás workers", user_id)
+
+
+def _cache_principal(user: User) -> None:
+    principal_cache.set(user.id, {key: getattr(user, key) for key in _user_columns()})
+
+
+def _principal_from_cache(db: AsyncSession, user_id: int) -> Optional[User]:
+    cols = principal_cache.get(user_id)
+    if cols is None:
+        return None
+    user = User(**cols)
+    make_transient_to_detached(user)  # persistente "limpio": sin INSERT ni cambios pendientes
+    db.add(user)
+    return user
+
+
+async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ) -> User:
     """
     Extrae el usuario actual a partir del token Bearer enviado en Authorization.
@@ -75,16 +158,19 @@ def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        sub = payload.get("sub")
-        if sub is None:
-            raise credentials_exception
-        user_id = int(sub)
-    except (JWTError, ValueError):
+    user_id = user_id_from_token(token)
+    if user_id is None:
         raise credentials_exception
 
-    user = db.query(User).get(user_id)
+    user = _principal_from_cache(db, user_id)
+    if user is not None:
+        return user
+
+    # sin el join a campus (y su selectin de Campus.users): aquí no se usa
+    epoch = _principal_epoch
+    user = await db.get(User, user_id, options=[raiseload(User.campus)])
     if not user:
         raise credentials_exception
+    if epoch == _principal_epoch:
+        _cache_principal(user)
     return user
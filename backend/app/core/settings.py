@@ -30,3 +30,73 @@ EMAIL_VERIFICATION_MODE = os.getenv(
 ).lower()
 
 EMAIL_VERIFICATION_MODE = "dns"   # en vez de "format"
+
+# Chat en tiempo real: vacío = broker en memoria (un solo worker);
+# "redis://host:6379/0" para varios workers (requiere `pip install redis`)
+CHAT_BROKER_URL = os.getenv("CHAT_BROKER_URL", "").strip()
+# eventos pendientes por socket; al llenarse (cliente lento) se cierra el socket
+CHAT_SEND_QUEUE = int(os.getenv("CHAT_SEND_QUEUE", "64"))
+
+# Pool de conexiones (por proceso/worker). Ver /internal/stats/db para dimensionarlo
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))      # seg. esperando conexión libre
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))      # seg.; -1 = nunca
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Endpoints /internal/*: exigen el header X-Internal-Token; vacío = deshabilitados (404)
+INTERNAL_TOKEN = os.getenv("INTERNAL_TOKEN", "").strip()
+
+# Caché del usuario autenticado (get_current_user), por worker. 0 = desactivada.
+# Las invalidaciones llegan a los demás workers por CHAT_BROKER_URL; el TTL es
+# el límite si una se pierde (o si hay varios workers sin broker compartido)
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "5"))        # seg.
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))    # usuarios
+
+# Hash de contraseñas (bcrypt) en pool de procesos; HASH_WORKERS=0 usa hilos
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))    # al cambiarlo, se re-hashea en el login
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "2"))
+HASH_MAX_QUEUE = int(os.getenv("HASH_MAX_QUEUE", "64"))  # en espera; más = 503
+HASH_TIMEOUT = float(os.getenv("HASH_TIMEOUT", "5"))      # seg.
+
+# Verificación MX de dominios (caché por worker; los permitidos se refrescan solos)
+MX_CACHE_TTL = float(os.getenv("MX_CACHE_TTL", "3600"))        # seg. con MX
+MX_NEGATIVE_TTL = float(os.getenv("MX_NEGATIVE_TTL", "300"))   # seg. sin MX / error
+MX_TIMEOUT = float(os.getenv("MX_TIMEOUT", "2"))               # seg. por consulta DNS
+
+# Variantes WebP de imágenes: procesos dedicados (0 = threadpool)
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "1"))
+
+# Servido de /static y /media (nombres únicos: caché inmutable)
+MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", "31536000"))   # seg. (1 año)
+# prefijo de una location `internal` de nginx; vacío = la API envía los bytes
+MEDIA_ACCEL_REDIRECT = os.getenv("MEDIA_ACCEL_REDIRECT", "").strip().rstrip("/")
+
+# Subidas con varias imágenes: cuántas se validan/escriben a la vez por request
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "4"))
+# Tope del cuerpo de cualquier request (413 antes de leerlo); 0 = sin tope
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(50 * 1024 * 1024)))
+
+# Caché de respuestas públicas (productos, campus): vacío = memoria por worker
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "").strip()
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))     # seg.; 0 = desactivada
+RESPONSE_CACHE_STALE = float(os.getenv("RESPONSE_CACHE_STALE", "30")) # seg. sirviendo la vieja mientras se reconstruye
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))   # respuestas (solo memoria)
+
+# Catálogo de campus en memoria: cada cuánto se relee la tabla (seg.; 0 = nunca)
+CAMPUS_REFRESH_INTERVAL = float(os.getenv("CAMPUS_REFRESH_INTERVAL", "300"))
+
+# Recomendador TF-IDF: artefacto en disco (mmap) y cada cuánto se reconstruye
+RECOMMENDER_DIR = Path(os.getenv("RECOMMENDER_DIR", str(BASE_DIR / "var" / "recommender")))
+RECOMMENDER_REBUILD_INTERVAL = float(os.getenv("RECOMMENDER_REBUILD_INTERVAL", "3600"))  # seg.; 0 = solo el script
+
+# Feed de descubrimiento precalculado (/feed/next): vacío = memoria por worker
+FEED_URL = os.getenv("FEED_URL", "").strip()
+FEED_QUEUE_SIZE = int(os.getenv("FEED_QUEUE_SIZE", "200"))          # ids en cola por usuario tras rellenar
+FEED_LOW_WATERMARK = int(os.getenv("FEED_LOW_WATERMARK", "50"))     # por debajo se rellena en segundo plano
+FEED_SCAN_LIMIT = int(os.getenv("FEED_SCAN_LIMIT", "200"))          # productos leídos por página de relleno
+FEED_SEEN_CAPACITY = int(os.getenv("FEED_SEEN_CAPACITY", "5000"))   # vistos por usuario (Bloom al 1%)
+FEED_ACTIVE_WINDOW = float(os.getenv("FEED_ACTIVE_WINDOW", "900"))  # seg. sin pedir feed = inactivo
+FEED_REFRESH_INTERVAL = float(os.getenv("FEED_REFRESH_INTERVAL", "60"))  # seg.; 0 = solo bajo demanda
+FEED_MAX_USERS = int(os.getenv("FEED_MAX_USERS", "10000"))          # usuarios en memoria (solo memoria)
+FEED_TTL = int(os.getenv("FEED_TTL", "86400"))                      # seg. de vida de colas en Redis
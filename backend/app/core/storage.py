@@ -0,0 +1,356 @@
+# backend/app/core/storage.py
+"""
+Almacén de imágenes direccionado por contenido.
+
+Cada archivo se guarda una sola vez como `static/blobs/<aa>/<sha256><ext>`
+(servido en /static/blobs/...), con sus variantes WebP al lado
+(`<sha256>_thumb.webp`, ...). Subir bytes idénticos no vuelve a escribir.
+
+`media_blobs.refcount` cuenta las referencias (ProductImage.url y
+User.avatar_url) y se mueve en la MISMA transacción que las crea o quita:
+- `ingest_images` → +1 (escribe el archivo solo si no existe)
+- `release`      → -1 (en 0 marca `released_at`)
+El GC (`collect_garbage`, scripts/gc_media.py) borra en lotes los blobs sin
+referencias tras un periodo de gracia, los archivos huérfanos del disco y
+las imágenes de productos desactivados hace más de N días.
+"""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence
+
+import anyio
+from fastapi import UploadFile
+from sqlalchemy import case, delete, false, func, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .settings import INGEST_CONCURRENCY
+from ..models.media import MediaBlob
+from ..models.product import Product, ProductImage
+from ..models.user import User
+from ..utils.files import (
+    SpooledUpload,
+    _static_root,
+    delete_local_file_if_inside_static,
+    spool_upload,
+)
+
+BLOB_ROOT = _static_root() / "blobs"
+BLOB_URL = "/static/blobs"
+# `.part` de subidas en curso: fuera de /static y en el mismo disco (rename atómico)
+SPOOL_DIR = _static_root().parent / "var" / "spool"
+
+
+def blob_url(sha256: str, ext: str) -> str:
+    return f"{BLOB_URL}/{sha256[:2]}/{sha256}{ext}"
+
+
+def blob_path(sha256: str, ext: str) -> Path:
+    # subcarpeta por los 2 primeros hex: ~256 directorios, ninguno enorme
+    return BLOB_ROOT / sha256[:2] / f"{sha256}{ext}"
+
+
+def sha_from_url(url: Optional[str]) -> Optional[str]:
+    """sha256 de una URL del almacén (None para URLs viejas con uuid)."""
+    if not url or not url.startswith(BLOB_URL + "/"):
+        return None
+    return Path(url).name.split(".", 1)[0]
+
+
+@dataclass
+class StoredImage:
+    url: str
+    path: Path
+    sha256: str
+    size: int
+    content_type: str
+
+
+# =========================
+# Referencias (en la transacción del request)
+# =========================
+def _upsert_blob(dialect: str, sha256: str, ext: str, size: int):
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(MediaBlob).values(sha256=sha256, ext=ext, size=size, refcount=1)
+    return stmt.on_conflict_do_update(
+        index_elements=[MediaBlob.sha256],
+        set_={"refcount": MediaBlob.refcount + 1, "released_at": None},
+    )
+
+
+def _blob_locks(dialect: str, shas: Iterable[str]):
+    """
+    Serializa, hasta el commit, a quien decide si el archivo de un hash
+    existe (ingesta) y a quien lo borra (GC): Postgres, advisory lock por
+    hash (en orden: sin deadlocks); SQLite, el lock de escritura de la BD.
+    """
+    if dialect == "postgresql":
+        return text(
+            "SELECT pg_advisory_xact_lock(hashtext(p.s)) FROM "
+            "(SELECT s FROM unnest(CAST(:shas AS text[])) AS u(s) ORDER BY s) AS p"
+        ).bindparams(shas=sorted(set(shas)))
+    # UPDATE sin filas: toma el lock de escritura igual y lo retiene hasta el commit
+    return update(MediaBlob).where(false()).values(refcount=MediaBlob.refcount)
+
+
+async def _bounded(calls: List[Callable[[], Awaitable]]) -> list:
+    """Corre `calls` a la vez (máx. INGEST_CONCURRENCY); al primer error cancela el resto."""
+    sem = asyncio.Semaphore(INGEST_CONCURRENCY)
+
+    async def run(call):
+        async with sem:
+            return await call()
+
+    tasks = [asyncio.ensure_future(run(call)) for call in calls]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def _place(spooled: Sequence[SpooledUpload], stored: List[StoredImage]) -> None:
+    """Renombra cada `.part` a su blob si aún no está en disco (uno por hash); el resto se borra."""
+    placed = set()
+    for sp, s in zip(spooled, stored):
+        if s.sha256 in placed or await anyio.Path(s.path).exists():
+            await anyio.Path(sp.tmp).unlink(missing_ok=True)
+            continue
+        await anyio.Path(s.path.parent).mkdir(parents=True, exist_ok=True)
+        await anyio.Path(sp.tmp).rename(s.path)
+        placed.add(s.sha256)
+
+
+@asynccontextmanager
+async def ingest_images(db: AsyncSession, files: Sequence[UploadFile]) -> AsyncIterator[List[StoredImage]]:
+    """
+    Ingesta de las imágenes de un request:
+
+    1. valida, hashea y copia todas a `.part` en paralelo (una sola pasada
+       por subida, en `SPOOL_DIR`),
+    2. toma el lock de sus hashes y suma sus referencias en la transacción
+       de `db` (antes de decidir: el GC ya no ve refcount 0 ni borra un
+       archivo que esta ingesta va a reutilizar),
+    3. renombra los `.part` de los blobs nuevos a su ruta; los demás se borran.
+
+    El caller agrega sus filas y hace commit DENTRO del bloque. Si algo falla
+    (validación, disco o el commit) se cancelan las tareas pendientes y se
+    hace rollback de la BD, NO de los archivos: otro request con los mismos
+    bytes pudo verlos en disco, saltarse la escritura y hacer commit después.
+    Los que queden sin fila los borra `_sweep_orphan_files` pasado el
+    periodo de gracia:
+
+        async with ingest_images(db, images) as stored:
+            db.add_all(ProductImage(product_id=p.id, url=s.url) for s in stored)
+            await db.commit()
+    """
+    stored: List[StoredImage] = []
+    spooled: List[SpooledUpload] = []
+    try:
+        spooled = await _bounded([partial(spool_upload, f, SPOOL_DIR) for f in files])
+        dialect = db.get_bind().dialect.name
+        if spooled and dialect == "postgresql":
+            # en SQLite el primer upsert ya toma el lock de escritura
+            await db.execute(_blob_locks(dialect, (sc.sha256 for sc in spooled)))
+        for sc in spooled:
+            await db.execute(_upsert_blob(dialect, sc.sha256, sc.ext, sc.size))
+            stored.append(StoredImage(
+                url=blob_url(sc.sha256, sc.ext),
+                path=blob_path(sc.sha256, sc.ext),
+                sha256=sc.sha256,
+                size=sc.size,
+                content_type=sc.content_type,
+            ))
+        await _place(spooled, stored)
+        yield stored
+    except BaseException:
+        await db.rollback()
+        raise
+    finally:
+        # los `.part` que quedaron si algo falló antes de `_place`
+        for sp in spooled:
+            await anyio.Path(sp.tmp).unlink(missing_ok=True)
+
+
+def _release_stmt(counts: Dict[str, int]):
+    shas = list(counts)
+    minus = case({sha: n for sha, n in counts.items()}, value=MediaBlob.sha256, else_=0)
+    return (
+        update(MediaBlob)
+        .where(MediaBlob.sha256.in_(shas))
+        .values(
+            refcount=MediaBlob.refcount - minus,
+            released_at=case((MediaBlob.refcount - minus <= 0, func.now()), else_=None),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _count_shas(urls: Iterable[Optional[str]]) -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for url in urls:
+        sha = sha_from_url(url)
+        if sha:
+            counts[sha] = counts.get(sha, 0) + 1
+    return counts
+
+
+async def release(db: AsyncSession, *urls: Optional[str]) -> None:
+    """Resta una referencia por cada URL del almacén (las viejas se ignoran). Sin commit."""
+    counts = _count_shas(urls)
+    if counts:
+        await db.execute(_release_stmt(counts))
+
+
+async def release_user_media(db: AsyncSession, user: User) -> None:
+    """Antes de borrar al usuario: sus productos/imágenes caen por CASCADE sin pasar por `release`."""
+    urls = (await db.scalars(
+        select(ProductImage.url).join(Product, Product.id == ProductImage.product_id).where(Product.owner_id == user.id)
+    )).all()
+    await release(db, user.avatar_url, *urls)
+
+
+# =========================
+# GC (síncrono: scripts/gc_media.py)
+# =========================
+def collect_garbage(
+    db: Session,
+    *,
+    grace: timedelta = timedelta(hours=1),
+    inactive_retention: Optional[timedelta] = timedelta(days=30),
+    batch_size: int = 500,
+    dry_run: bool = False,
+) -> dict:
+    """
+    1. Quita las imágenes de productos desactivados hace más de
+       `inactive_retention` (libera sus referencias).
+    2. Borra los blobs con refcount 0 desde hace más de `grace`, por lotes.
+    3. Borra archivos del almacén sin fila (subidas que no llegaron a commit)
+       y `.part` abandonados en `SPOOL_DIR`, más viejos que `grace`.
+    Hace commit por lote. Devuelve contadores.
+    """
+    now = datetime.now(timezone.utc)
+    stats = {"inactive_images": 0, "blobs": 0, "orphan_files": 0, "bytes": 0}
+
+    if inactive_retention is not None:
+        cutoff = now - inactive_retention
+        while True:
+            rows = db.execute(
+                select(ProductImage.id, ProductImage.url, ProductImage.thumb_url, ProductImage.card_url, ProductImage.full_url)
+                .join(Product, Product.id == ProductImage.product_id)
+                .where(Product.is_active.is_(False), Product.updated_at < cutoff)
+                .limit(batch_size)
+            ).all()
+            if not rows:
+                break
+            stats["inactive_images"] += len(rows)
+            if dry_run:
+                break
+            counts = _count_shas(r.url for r in rows)
+            if counts:
+                db.execute(_release_stmt(counts))
+            db.execute(delete(ProductImage).where(ProductImage.id.in_([r.id for r in rows])))
+            db.commit()
+            for r in rows:
+                if sha_from_url(r.url) is None:
+                    _unlink_legacy(r.url, r.thumb_url, r.card_url, r.full_url)
+
+    cutoff = now - grace
+    while True:
+        blobs = db.execute(
+            select(MediaBlob.sha256, MediaBlob.ext, MediaBlob.size)
+            .where(MediaBlob.refcount <= 0, MediaBlob.released_at < cutoff)
+            .limit(batch_size)
+        ).all()
+        if not blobs:
+            break
+        if dry_run:
+            stats["blobs"] += len(blobs)
+            stats["bytes"] += sum(b.size for b in blobs)
+            break
+        # condicional: si alguien lo re-referenció entre el SELECT y aquí, se queda.
+        # Los archivos se borran ANTES del commit: el DELETE retiene las filas
+        # y una ingesta del mismo hash espera; al seguir ya no ve el archivo y
+        # lo vuelve a escribir (después del commit se lo saltaría por existir)
+        deleted = db.execute(
+            delete(MediaBlob)
+            .where(MediaBlob.sha256.in_([b.sha256 for b in blobs]), MediaBlob.refcount <= 0)
+            .returning(MediaBlob.sha256, MediaBlob.ext, MediaBlob.size)
+        ).all()
+        for b in deleted:
+            _unlink_blob(b.sha256, b.ext)
+            stats["blobs"] += 1
+            stats["bytes"] += b.size
+        db.commit()
+        if not deleted:
+            break
+
+    stats["orphan_files"] = _sweep_orphan_files(db, cutoff, batch_size, dry_run)
+    return stats
+
+
+def _unlink_blob(sha256: str, ext: str) -> None:
+    path = blob_path(sha256, ext)
+    for f in [path, *path.parent.glob(f"{sha256}_*.webp")]:
+        f.unlink(missing_ok=True)
+
+
+def _unlink_legacy(*urls: Optional[str]) -> None:
+    # archivos previos al almacén (nombre uuid): media/products/... y /static/uploads/...
+    delete_local_file_if_inside_static(*urls)
+    for url in urls:
+        if url and url.startswith("/media/"):
+            try:
+                Path(url.lstrip("/")).unlink(missing_ok=True)
+            except OSError:
+                pass
+
+
+def _sweep_orphan_files(db: Session, cutoff: datetime, batch_size: int, dry_run: bool) -> int:
+    removed = 0
+    if SPOOL_DIR.exists():
+        # `.part` de ingestas que murieron a medias (los vivos son recientes)
+        for path in SPOOL_DIR.glob("*.part"):
+            if path.stat().st_mtime < cutoff.timestamp():
+                if not dry_run:
+                    path.unlink(missing_ok=True)
+                removed += 1
+    if not BLOB_ROOT.exists():
+        return removed
+    batch: List[Path] = []
+
+    def flush() -> int:
+        shas = [p.name.split(".", 1)[0] for p in batch]
+        if not dry_run:
+            # con el lock, una ingesta en curso de estos hashes ya hizo commit
+            # (su fila se ve abajo) o espera y, sin archivo, lo escribe
+            db.execute(_blob_locks(db.get_bind().dialect.name, shas))
+        known = set(db.scalars(select(MediaBlob.sha256).where(MediaBlob.sha256.in_(shas))))
+        n = 0
+        for p, sha in zip(batch, shas):
+            if sha not in known:
+                if not dry_run:
+                    p.unlink(missing_ok=True)
+                n += 1
+        db.commit()
+        batch.clear()
+        return n
+
+    for path in BLOB_ROOT.glob("*/*"):
+        if not path.is_file() or "_" in path.name or path.stat().st_mtime >= cutoff.timestamp():
+            continue  # variantes se borran con su blob; recientes pueden estar en curso
+        batch.append(path)
+        if len(batch) >= batch_size:
+            removed += flush()
+    if batch:
+        removed += flush()
+    return removed
@@ -0,0 +1,154 @@
+# backend/app/crud/chat.py
+from __future__ import annotations
+
+from typing import Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.chat import Conversation, Message, utcnow
+
+
+# ============ CONTADORES / WATERMARK ============
+def _unread_column(conv: Conversation, user_id: int):
+    return Conversation.unread_count_user1 if user_id == conv.user1_id else Conversation.unread_count_user2
+
+
+def _last_read_column(conv: Conversation, user_id: int):
+    return (
+        Conversation.last_read_message_id_user1 if user_id == conv.user1_id
+        else Conversation.last_read_message_id_user2
+    )
+
+
+def last_read_id_for(conv: Conversation, user_id: int) -> Optional[int]:
+    """Watermark de lectura de `user_id` (None = no ha leído nada)."""
+    return conv.last_read_message_id_user1 if user_id == conv.user1_id else conv.last_read_message_id_user2
+
+
+def unread_count_for(conv: Conversation, user_id: int) -> int:
+    """No leídos de `user_id` en `conv` (columna denormalizada, sin consultar messages)."""
+    return conv.unread_count_user1 if user_id == conv.user1_id else conv.unread_count_user2
+
+
+async def total_unread(db: AsyncSession, user_id: int) -> int:
+    """Suma de no leídos en las conversaciones visibles de `user_id` (badge)."""
+    total = await db.scalar(
+        select(
+            func.sum(
+                case(
+                    (Conversation.user1_id == user_id, Conversation.unread_count_user1),
+                    else_=Conversation.unread_count_user2,
+                )
+            )
+        )
+        .where(
+            or_(
+                and_(Conversation.user1_id == user_id, Conversation.hidden_for_user1.is_(False)),
+                and_(Conversation.user2_id == user_id, Conversation.hidden_for_user2.is_(False)),
+            )
+        )
+    )
+    return total or 0
+
+
+# ============ MENSAJES ============
+async def add_message(db: AsyncSession, *, conv: Conversation, sender_id: int, body: str) -> Message:
+    """
+    Inserta el mensaje y, en la misma transacción, mueve el puntero al último
+    mensaje y suma 1 a los no leídos del destinatario (UPDATE atómico x = x + 1).
+    """
+    now = utcnow()
+    msg = Message(conversation_id=conv.id, sender_id=sender_id, body=body, created_at=now)
+    db.add(msg)
+    await db.flush()
+
+    recipient_id = conv.user2_id if sender_id == conv.user1_id else conv.user1_id
+    unread_col = _unread_column(conv, recipient_id)
+    setattr(conv, unread_col.key, unread_col + 1)
+    conv.last_message_id = msg.id
+    conv.last_message_at = now
+    conv.updated_at = now
+    # ojo: el contador queda expirado en `conv` (se asignó una expresión SQL)
+    await db.commit()
+    return msg
+
+
+def _unread_after(conv_id, reader_id, watermark):
+    """Subconsulta: mensajes del otro participante posteriores al watermark."""
+    return (
+        select(func.count(Message.id))
+        .where(
+            Message.conversation_id == conv_id,
+            Message.id > func.coalesce(watermark, 0),
+            Message.sender_id != reader_id,
+            Message.is_deleted_by_sender.is_(False),
+        )
+        .scalar_subquery()
+    )
+
+
+async def mark_read(db: AsyncSession, *, conv: Conversation, reader_id: int, upto_id: int) -> bool:
+    """
+    Avanza el watermark de `reader_id` hasta `upto_id` con UN UPDATE de una
+    sola fila (conversations) y recalcula su contador con los mensajes que
+    quedan por encima. Nunca retrocede y no toca `updated_at`.
+    Devuelve True si el watermark avanzó.
+    """
+    current = last_read_id_for(conv, reader_id)
+    if current is not None and current >= upto_id:
+        return False
+
+    wm_col = _last_read_column(conv, reader_id)
+    res = await db.execute(
+        update(Conversation)
+        .where(Conversation.id == conv.id, or_(wm_col.is_(None), wm_col < upto_id))
+        .values({
+            wm_col: upto_id,
+            _unread_column(conv, reader_id): _unread_after(conv.id, reader_id, upto_id),
+            Conversation.updated_at: Conversation.updated_at,
+        })
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return bool(res.rowcount)
+
+
+# ============ REPARACIÓN ============
+def recount_conversations(db: Session) -> int:
+    """
+    Recalcula desde `messages` el último mensaje y los no leídos (según el
+    watermark de cada participante) de todas las conversaciones.
+    Repara deriva. No modifica `updated_at`. No hace commit.
+    Síncrona: la usan scripts/recount_conversations.py y las migraciones.
+    """
+    visible = and_(
+        Message.conversation_id == Conversation.id,
+        Message.is_deleted_by_sender.is_(False),
+    )
+    res = db.execute(
+        update(Conversation)
+        .values(
+            last_message_id=select(func.max(Message.id)).where(visible).scalar_subquery(),
+            unread_count_user1=_unread_after(
+                Conversation.id, Conversation.user1_id, Conversation.last_read_message_id_user1
+            ),
+            unread_count_user2=_unread_after(
+                Conversation.id, Conversation.user2_id, Conversation.last_read_message_id_user2
+            ),
+            updated_at=Conversation.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(
+        update(Conversation)
+        .values(
+            last_message_at=select(Message.created_at)
+            .where(Message.id == Conversation.last_message_id)
+            .scalar_subquery(),
+            updated_at=Conversation.updated_at,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return res.rowcount
@@ -0,0 +1,120 @@
+# backend/app/crud/swipe.py
+from __future__ import annotations
+
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.chat import Conversation, utcnow
+from ..models.product import Product
+from ..models.swipe import Swipe
+from ..schemas.swipe import MatchRead, SwipeIn
+
+
+def _insert(dialect: str):
+    return postgresql.insert if dialect == "postgresql" else sqlite.insert
+
+
+def _order_pair(a: int, b: int) -> Tuple[int, int]:
+    return (a, b) if a < b else (b, a)
+
+
+# advisory lock por PAR de usuarios (no por producto ni por usuario): dos
+# likes cruzados simultáneos se serializan y el segundo ve el del primero;
+# el resto de los swipes no compite por nada. En orden para no hacer deadlock.
+_PAIR_LOCKS = text(
+    "SELECT pg_advisory_xact_lock(p.a, p.b) FROM "
+    "(SELECT a, b FROM unnest(CAST(:a AS int[]), CAST(:b AS int[])) AS u(a, b) ORDER BY a, b) AS p"
+)
+
+
+async def record_swipes(
+    db: AsyncSession, *, swiper_id: int, swipes: Sequence[SwipeIn]
+) -> Tuple[int, List[int], List[MatchRead]]:
+    """
+    Guarda un lote de swipes y abre una conversación por cada match nuevo,
+    todo en UNA transacción y con un número fijo de sentencias (no una por
+    swipe):
+
+    1. productos del lote (dueño, activo)          -> 1 SELECT por PK
+    2. upsert de los swipes                         -> 1 INSERT ... ON CONFLICT
+    3. ¿qué dueños ya me dieron like?               -> 1 SELECT por índice (owner_id, swiper_id)
+    4. ¿con cuáles ya tengo conversación?           -> 1 SELECT (solo si hubo likes mutuos)
+    5. conversaciones de los matches                -> 1 INSERT ... ON CONFLICT DO NOTHING
+
+    El match es por PAR de usuarios, no por producto: si ya tienen una
+    conversación (por un match anterior o abierta a mano, sobre cualquier
+    producto) un like más no abre otra ni avisa de nuevo.
+
+    Solo se insertan filas nuevas: no hay contadores ni filas calientes que
+    actualizar. Devuelve (aceptados, rechazados, matches nuevos).
+    """
+    dialect = db.get_bind().dialect.name
+    # el último swipe de un producto dentro del lote es el que cuenta
+    wanted: Dict[int, bool] = {s.product_id: s.liked for s in swipes}
+
+    owners = dict((await db.execute(
+        select(Product.id, Product.owner_id)
+        .where(Product.id.in_(wanted), Product.is_active.is_(True), Product.owner_id != swiper_id)
+    )).all())
+    rejected = [pid for pid in wanted if pid not in owners]
+    if not owners:
+        return 0, rejected, []
+
+    liked_owners: Dict[int, int] = {}   # dueño -> primer producto suyo con like en el lote
+    for pid, owner_id in owners.items():
+        if wanted[pid]:
+            liked_owners.setdefault(owner_id, pid)
+
+    if liked_owners and dialect == "postgresql":
+        pairs = [_order_pair(swiper_id, o) for o in liked_owners]
+        await db.execute(_PAIR_LOCKS, {"a": [p[0] for p in pairs], "b": [p[1] for p in pairs]})
+
+    now = utcnow()
+    stmt = _insert(dialect)(Swipe).values([
+        {"swiper_id": swiper_id, "product_id": pid, "owner_id": owner_id, "liked": wanted[pid], "created_at": now}
+        for pid, owner_id in owners.items()
+    ])
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[Swipe.swiper_id, Swipe.product_id],
+        set_={"liked": stmt.excluded.liked, "created_at": stmt.excluded.created_at},
+    ))
+
+    matches: List[MatchRead] = []
+    if liked_owners:
+        mutual = (await db.scalars(
+            select(Swipe.swiper_id).distinct()
+            .where(Swipe.owner_id == swiper_id, Swipe.swiper_id.in_(liked_owners), Swipe.liked.is_(True))
+        )).all()
+        if mutual:
+            # en cualquier orden: las abiertas a mano no guardan el par ordenado
+            talking = {
+                u1 if u2 == swiper_id else u2
+                for u1, u2 in (await db.execute(
+                    select(Conversation.user1_id, Conversation.user2_id).where(or_(
+                        and_(Conversation.user1_id == swiper_id, Conversation.user2_id.in_(mutual)),
+                        and_(Conversation.user2_id == swiper_id, Conversation.user1_id.in_(mutual)),
+                    ))
+                )).all()
+            }
+            mutual = [other for other in mutual if other not in talking]
+        if mutual:
+            rows = []
+            for other in mutual:
+                u1, u2 = _order_pair(swiper_id, other)
+                rows.append({"user1_id": u1, "user2_id": u2, "product_id": liked_owners[other], "updated_at": now})
+            conv = _insert(dialect)(Conversation).values(rows)
+            # red de seguridad si otro lote del mismo par ganó la carrera: no es match nuevo
+            created = await db.execute(
+                conv.on_conflict_do_nothing(index_elements=["product_id", "user1_id", "user2_id"])
+                .returning(Conversation.id, Conversation.product_id, Conversation.user1_id, Conversation.user2_id)
+            )
+            matches = [
+                MatchRead(conversation_id=r.id, product_id=r.product_id,
+                          user_id=r.user2_id if r.user1_id == swiper_id else r.user1_id)
+                for r in created
+            ]
+    await db.commit()
+    return len(owners), rejected, matches
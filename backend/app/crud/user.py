@@ -2,38 +2,49 @@
 from __future__ import annotations
 
 from typing import Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy import delete, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..models.user import User
 from ..models.campus import Campus
-from ..core.security import get_password_hash, verify_password
+from ..core.hasher import hasher
+from ..core.storage import release_user_media
 
 
 # ============ GETTERS ============
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
-    return db.query(User).filter(User.email == email.strip().lower()).first()
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.email == email.strip().lower()))
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
-    return db.query(User).filter(User.username == username.strip().lower()).first()
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    return await db.scalar(select(User).where(User.username == username.strip().lower()))
 
-def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
-    return db.get(User, user_id)
+async def get_user_by_id(db: AsyncSession, user_id: int) -> Optional[User]:
+    return await db.get(User, user_id)
+
+async def _campus_exists(db: AsyncSession, campus_id: int) -> bool:
+    # solo el id: get(Campus) cargaría también Campus.users (lazy="selectin")
+    return await db.scalar(select(Campus.id).where(Campus.id == campus_id)) is not None
 
 
 # ============ AUTH ============
-def authenticate_user(db: Session, *, email: str, password: str) -> Optional[User]:
-    user = get_user_by_email(db, email)
+async def authenticate_user(db: AsyncSession, *, email: str, password: str) -> Optional[User]:
+    user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    # bcrypt es CPU: fuera del event loop (pool de procesos del hasher)
+    ok, new_hash = await hasher.verify_and_update(password, user.hashed_password)
+    if not ok:
         return None
+    if new_hash:
+        # cambió BCRYPT_ROUNDS: se guarda el hash con el costo actual
+        user.hashed_password = new_hash
+        await db.commit()
     return user
 
 
 # ============ CREATE ============
-def create_user(
-    db: Session,
+async def create_user(
+    db: AsyncSession,
     *,
     username: str,
     full_name: Optional[str],
@@ -50,37 +61,33 @@ def create_user(
     username_n = username.strip().lower()
     email_n = email.strip().lower()
 
-    existing = (
-        db.query(User)
-        .filter(or_(User.email == email_n, User.username == username_n))
-        .first()
+    existing = await db.scalar(
+        select(User).where(or_(User.email == email_n, User.username == username_n)).limit(1)
     )
     if existing:
         if existing.email == email_n:
             raise ValueError("email_taken")
         raise ValueError("username_taken")
 
-    if campus_id is not None:
-        campus = db.get(Campus, campus_id)
-        if not campus:
-            raise LookupError("campus_not_found")
+    if campus_id is not None and not await _campus_exists(db, campus_id):
+        raise LookupError("campus_not_found")
 
     user = User(
         username=username_n,
         full_name=(full_name or "").strip() or None,
         email=email_n,
-        hashed_password=get_password_hash(password),
+        hashed_password=await hasher.hash(password),
         campus_id=campus_id,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 # ============ UPDATE PERFIL ============
-def update_user_profile(
-    db: Session,
+async def update_user_profile(
+    db: AsyncSession,
     *,
     user: User,
     username: Optional[str] = None,
@@ -96,7 +103,7 @@ def update_user_profile(
     if username is not None:
         new_un = username.strip().lower()
         if new_un != user.username:
-            if get_user_by_username(db, new_un):
+            if await get_user_by_username(db, new_un):
                 raise ValueError("username_taken")
             user.username = new_un
 
@@ -107,25 +114,34 @@ def update_user_profile(
         if campus_id == 0:
             user.campus_id = None
         else:
-            campus = db.get(Campus, campus_id)
-            if not campus:
+            if not await _campus_exists(db, campus_id):
                 raise LookupError("campus_not_found")
             user.campus_id = campus_id
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 # ============ CHANGE PASSWORD ============
-def change_password(
-    db: Session,
+async def change_password(
+    db: AsyncSession,
     *,
     user: User,
     old_password: str,
     new_password: str,
 ) -> None:
-    if not verify_password(old_password, user.hashed_password):
+    if not await hasher.verify(old_password, user.hashed_password):
         raise ValueError("invalid_old_password")
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
+    user.hashed_password = await hasher.hash(new_password)
+    await db.commit()
+
+
+# ============ DELETE ============
+async def delete_user(db: AsyncSession, *, user: User) -> None:
+    # DELETE directo: productos/conversaciones caen por ON DELETE CASCADE
+    # (el delete del ORM intentaría cargar y desligar `user.products`);
+    # antes se liberan sus imágenes del almacén, que el CASCADE no descuenta
+    await release_user_media(db, user)
+    await db.execute(delete(User).where(User.id == user.id))
+    await db.commit()
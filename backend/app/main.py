@@ -1,15 +1,56 @@
 # backend/app/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.staticfiles import StaticFiles           # 👈 NUEVO
 from pathlib import Path                                 # 👈 NUEVO
 from app.routers import chats            # 👈 import
 
 
 # importa tus routers
-from app.routers import auth, users, products
+from app.routers import auth, users, products, internal, swipes, feed
+from app.core.db import engine
+from app.core.search import ensure_search_schema
+from app.core.realtime import hub
+from app.core.hasher import hasher, HasherBusy
+from app.core.email_utils import mx_cache
+from app.core.images import pipeline as image_pipeline
+from app.core.media_files import MediaFiles
+from app.core.response_cache import response_cache
+from app.core.campus_catalog import campus_catalog
+from app.core.recommender import recommender
+from app.core.feed import feed as discovery_feed
+from app.core.body_limit import BodySizeLimit
+from app.core.settings import ALLOWED_EMAIL_DOMAINS, EMAIL_VERIFICATION_MODE, MAX_REQUEST_BYTES
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await hub.start()   # broker del chat en tiempo real
+    hasher.start()      # procesos de bcrypt
+    image_pipeline.start()   # procesos de variantes WebP
+    if EMAIL_VERIFICATION_MODE == "dns":
+        await mx_cache.start(ALLOWED_EMAIL_DOMAINS)   # MX pre-resuelto + refresco
+    await campus_catalog.start()   # campus en memoria + recarga periódica
+    await recommender.start()      # índice TF-IDF (mmap) + reconstrucción periódica
+    await discovery_feed.start()   # relleno periódico de colas del feed
+    yield
+    await discovery_feed.stop()
+    await recommender.stop()
+    await campus_catalog.stop()
+    await mx_cache.stop()
+    await response_cache.close()
+    image_pipeline.stop()
+    hasher.stop()
+    await hub.stop()
 
-app = FastAPI(title="MachTrueke API", version="1.0.0")
+
+app = FastAPI(title="MachTrueke API", version="1.0.0", lifespan=lifespan)
+
+# cuerpos enormes: 413 antes de que Starlette los guarde (ver app/core/body_limit.py);
+# antes que CORS: el 413 también lleva sus headers
+app.add_middleware(BodySizeLimit, max_bytes=MAX_REQUEST_BYTES)
 
 # (opcional) CORS para pruebas local/frontend
 app.add_middleware(
@@ -18,20 +59,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],   # paginación por cursor
 )
 
-# === STATIC: crea carpetas y monta /static ===
+# bcrypt saturado (cola llena o timeout): que el cliente reintente
+@app.exception_handler(HasherBusy)
+async def hasher_busy_handler(request: Request, exc: HasherBusy):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Servicio ocupado, intenta de nuevo"},
+        headers={"Retry-After": "1"},
+    )
+
+# === STATIC/MEDIA: crea carpetas y monta /static y /media ===
+# (caché inmutable, ETag, 304 y Range: ver app/core/media_files.py)
 BASE_DIR = Path(__file__).resolve().parents[1]          # .../backend
 STATIC_DIR = BASE_DIR / "static"
 (STATIC_DIR / "uploads" / "avatars").mkdir(parents=True, exist_ok=True)
-app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+app.mount("/static", MediaFiles(directory=STATIC_DIR, url_prefix="/static"), name="static")
+# imágenes de productos previas al almacén por contenido (products.MEDIA_ROOT)
+app.mount("/media", MediaFiles(directory=products.MEDIA_ROOT, url_prefix="/media"), name="media")
 # =============================================
 
+# tabla FTS5 de búsqueda en SQLite (dev); en Postgres la crea la migración
+ensure_search_schema(engine)
+
 # monta routers SIN prefix extra (auth ya trae prefix="/auth")
+# el orden importa: products (sin prefix) captura "/" y "/{product_id}",
+# así que chats, swipes y feed van antes y el stub de users después
 app.include_router(auth.router)
-app.include_router(users.router)
-app.include_router(products.router)
+app.include_router(internal.router)
 app.include_router(chats.router)
+app.include_router(swipes.router)
+app.include_router(feed.router)
+app.include_router(products.router)
+app.include_router(users.router)
 
 @app.get("/")
 def root():
@@ -1,5 +1,5 @@
 from __future__ import annotations
-from datetime import datetime
+from datetime import datetime, timezone
 
 from sqlalchemy import (
     Column, Integer, ForeignKey, Text, DateTime, Boolean, UniqueConstraint
@@ -10,6 +10,10 @@ from sqlalchemy.sql import func
 from ..core.db import Base
 
 
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
 class Conversation(Base):
     __tablename__ = "conversations"
 
@@ -23,7 +27,25 @@ class Conversation(Base):
     hidden_for_user2 = Column(Boolean, default=False, nullable=False)
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+    # generado en la app (no solo en el servidor) para que la clave del cursor
+    # (updated_at, id) tenga siempre el mismo formato/precisión
+    updated_at = Column(
+        DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow, nullable=False
+    )
+
+    # Denormalizados: los mantiene crud/chat.py al enviar/leer
+    # (reparar deriva con scripts/recount_conversations.py)
+    last_message_id = Column(
+        Integer, ForeignKey("messages.id", ondelete="SET NULL", use_alter=True), nullable=True
+    )
+    last_message_at = Column(DateTime(timezone=True), nullable=True)
+    unread_count_user1 = Column(Integer, default=0, server_default="0", nullable=False)
+    unread_count_user2 = Column(Integer, default=0, server_default="0", nullable=False)
+
+    # Watermark de lectura por participante: todo mensaje del otro con
+    # id <= last_read_message_id_userN está leído por userN
+    last_read_message_id_user1 = Column(Integer, nullable=True)
+    last_read_message_id_user2 = Column(Integer, nullable=True)
 
     __table_args__ = (
         UniqueConstraint("product_id", "user1_id", "user2_id", name="uq_conversation_uniqueness"),
@@ -32,7 +54,11 @@ class Conversation(Base):
     product = relationship("Product")
     user1 = relationship("User", foreign_keys=[user1_id])
     user2 = relationship("User", foreign_keys=[user2_id])
-    messages = relationship("Message", back_populates="conversation", cascade="all, delete-orphan")
+    messages = relationship(
+        "Message", back_populates="conversation", cascade="all, delete-orphan",
+        foreign_keys="Message.conversation_id",
+    )
+    last_message = relationship("Message", foreign_keys=[last_message_id], viewonly=True)
 
 
 class Message(Base):
@@ -44,8 +70,9 @@ class Message(Base):
 
     body = Column(Text, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # legado: ya no se escribe; la lectura se deriva del watermark de Conversation
     read_at = Column(DateTime(timezone=True), nullable=True)
     is_deleted_by_sender = Column(Boolean, default=False, nullable=False)
 
-    conversation = relationship("Conversation", back_populates="messages")
+    conversation = relationship("Conversation", back_populates="messages", foreign_keys=[conversation_id])
     sender = relationship("User")
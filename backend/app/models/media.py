@@ -0,0 +1,24 @@
+# app/models/media.py
+from datetime import datetime
+
+from sqlalchemy import DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.db import Base
+
+
+class MediaBlob(Base):
+    """
+    Archivo del almacén por contenido (core/storage.py): uno por sha256,
+    compartido por todas las ProductImage / avatares con los mismos bytes.
+    `refcount` = referencias vivas; en 0 lo barre el GC tras un periodo de gracia.
+    """
+    __tablename__ = "media_blobs"
+
+    sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+    ext: Mapped[str] = mapped_column(String(8))
+    size: Mapped[int] = mapped_column(Integer)
+    refcount: Mapped[int] = mapped_column(Integer, default=0, server_default="0")
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    # cuándo llegó a refcount 0 (NULL mientras tenga referencias)
+    released_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
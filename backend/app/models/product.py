@@ -20,5 +20,9 @@ class ProductImage(Base):
     id = Column(Integer, primary_key=True)
     product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), index=True, nullable=False)
     url = Column(String(300), nullable=False)  # ruta/URL pública de la imagen
+    # variantes WebP (core/images.py); NULL mientras se generan
+    thumb_url = Column(String(300), nullable=True)
+    card_url = Column(String(300), nullable=True)
+    full_url = Column(String(300), nullable=True)
 
     product = relationship("Product", back_populates="images")
\ No newline at end of file
@@ -0,0 +1,34 @@
+# app/models/swipe.py
+from datetime import datetime
+
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from ..core.db import Base
+
+
+class Swipe(Base):
+    """
+    Un swipe de `swiper_id` sobre un producto (like = True / pasar = False).
+    Una fila por (usuario, producto): PK compuesta, sin id sustituto; volver
+    a swipear el mismo producto la sobrescribe.
+
+    `owner_id` es el dueño del producto, copiado al insertar: el match
+    ("¿el dueño ya le dio like a algo mío?") es UNA búsqueda en el índice
+    (owner_id, swiper_id), sin join con products.
+    """
+    __tablename__ = "swipes"
+
+    swiper_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    product_id: Mapped[int] = mapped_column(Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True)
+    owner_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
+    liked: Mapped[bool] = mapped_column(Boolean)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # inversa: quién le dio like a mis productos / detección de match
+        Index("ix_swipes_owner_swiper", "owner_id", "swiper_id", postgresql_where=liked.is_(True),
+              sqlite_where=liked.is_(True)),
+        # borrado en cascada de un producto y "quién swipeó este producto"
+        Index("ix_swipes_product", "product_id"),
+    )
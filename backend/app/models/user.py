@@ -34,6 +34,9 @@ class User(Base):
     # NUEVOS: para edición de perfil
     bio: Mapped[str | None] = mapped_column(Text, nullable=True)
     avatar_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    # variantes WebP del avatar (core/images.py); NULL mientras se generan
+    avatar_thumb_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    avatar_card_url: Mapped[str | None] = mapped_column(String(255), nullable=True)
 
     # Estado y timestamps
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, server_default="true")
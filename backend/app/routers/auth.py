@@ -1,24 +1,33 @@
 # backend/app/routers/auth.py
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from typing import List
+
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, status, Query
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from fastapi import File, UploadFile             # 👈 nuevo
-from ..utils.files import save_image
 
 from ..core.db import get_db
 from ..core.security import (
     create_access_token,
     get_current_user,
+    invalidate_principal,
 )
 from ..core.settings import ALLOWED_EMAIL_DOMAINS, EMAIL_VERIFICATION_MODE
-from ..core.email_utils import normalize_and_validate_format, domain_has_mx
+from ..core.email_utils import normalize_and_validate_format, mx_cache
+from ..core.response_cache import PRODUCTS, product_tag, response_cache
+from ..core.campus_catalog import campus_catalog
+from ..core.recommender import recommender
 
 from ..models.user import User
 from ..models.campus import Campus
+from ..models.product import Product
 from ..schemas.user import UserCreate, UserRead, UserUpdate, ChangePasswordIn
+from ..schemas.campus import CampusRead
 from ..schemas.auth import Token 
-from ..utils.files import save_image, delete_local_file_if_inside_static
+from ..utils.files import delete_local_file_if_inside_static
+from ..core.storage import ingest_images, release
+from ..core.images import generate_avatar_variants
 from ..schemas.user import UserRead
 
 # 👇 usa la capa CRUD
@@ -27,6 +36,7 @@ from ..crud.user import (
     authenticate_user,
     update_user_profile,
     change_password,
+    delete_user,
 )
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -35,7 +45,7 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 # ------------------------------
 # Helpers (dominios permitidos)
 # ------------------------------
-def _check_allowed_domain(email: str) -> str:
+async def _check_allowed_domain(email: str) -> str:
     """
     Normaliza email, valida formato y verifica dominio permitido.
     Retorna el email normalizado (lower) si todo está OK.
@@ -52,7 +62,8 @@ def _check_allowed_domain(email: str) -> str:
             detail=f"Solo correos de: {', '.join(ALLOWED_EMAIL_DOMAINS)}",
         )
 
-    if EMAIL_VERIFICATION_MODE == "dns" and not domain_has_mx(domain):
+    # caché de MX (los dominios permitidos ya vienen pre-resueltos desde el arranque)
+    if EMAIL_VERIFICATION_MODE == "dns" and not await mx_cache.has_mx(domain):
         raise HTTPException(status_code=400, detail="Dominio sin MX válido (correo no entregable)")
 
     return email_norm
@@ -61,30 +72,30 @@ def _check_allowed_domain(email: str) -> str:
 # ------------------------------
 #   CAMPUS (para el desplegable)
 # ------------------------------
-@router.get("/campuses")
-def list_campuses(q: str | None = Query(None), db: Session = Depends(get_db)):
-    query = db.query(Campus)
-    if q:
-        q = f"%{q.strip()}%"
-        query = query.filter(or_(Campus.code.ilike(q), Campus.name.ilike(q)))
-    return query.order_by(Campus.code).all()
+@router.get("/campuses", response_model=List[CampusRead])
+async def list_campuses(
+    q: str | None = Query(None),
+    if_none_match: str | None = Header(None),
+):
+    # snapshot en memoria (app/core/campus_catalog.py): no toca la base
+    return await campus_catalog.respond(q, if_none_match)
 
 
 # ------------------------------
 #           REGISTER
 # ------------------------------
 @router.post("/register", response_model=UserRead, status_code=201)
-def register(payload: UserCreate, db: Session = Depends(get_db)):
+async def register(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     # 1) Validar contraseñas
     if payload.password != payload.confirm_password:
         raise HTTPException(status_code=400, detail="Las contraseñas no coinciden")
 
     # 2) Normalizar / validar email y dominio institucional
-    email = _check_allowed_domain(payload.email)
+    email = await _check_allowed_domain(payload.email)
 
     # 3) Crear vía CRUD y mapear errores a HTTP
     try:
-        user = create_user(
+        user = await create_user(
             db=db,
             username=payload.username,
             full_name=payload.full_name,
@@ -111,14 +122,14 @@ def register(payload: UserCreate, db: Session = Depends(get_db)):
 #            LOGIN
 # ------------------------------
 @router.post("/login", response_model=Token)  # o usa Token si ya tienes schemas.auth.Token
-def login(
+async def login(
     form: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     # En form.username viene el email
-    email = _check_allowed_domain(form.username)
+    email = await _check_allowed_domain(form.username)
 
-    user = authenticate_user(db, email=email, password=form.password)
+    user = await authenticate_user(db, email=email, password=form.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email o contraseña incorrectos")
 
@@ -130,7 +141,7 @@ def login(
 #             ME
 # ------------------------------
 @router.get("/me", response_model=UserRead)
-def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: User = Depends(get_current_user)):
     return current_user
 
 
@@ -138,13 +149,13 @@ def me(current_user: User = Depends(get_current_user)):
 #       UPDATE MY PROFILE
 # ------------------------------
 @router.put("/me", response_model=UserRead)
-def update_me(
+async def update_me(
     payload: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        updated = update_user_profile(
+        updated = await update_user_profile(
             db,
             user=current_user,
             username=payload.username,
@@ -159,6 +170,7 @@ def update_me(
         if str(e) == "campus_not_found":
             raise HTTPException(status_code=404, detail="Campus no encontrado")
         raise
+    await invalidate_principal(current_user.id)
     return updated
 
 
@@ -166,13 +178,13 @@ def update_me(
 #        CHANGE PASSWORD
 # ------------------------------
 @router.post("/me/change-password", status_code=204)
-def change_my_password(
+async def change_my_password(
     payload: ChangePasswordIn,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     try:
-        change_password(
+        await change_password(
             db,
             user=current_user,
             old_password=payload.old_password,
@@ -182,41 +194,58 @@ def change_my_password(
         if str(e) == "invalid_old_password":
             raise HTTPException(status_code=400, detail="Contraseña actual incorrecta")
         raise
+    await invalidate_principal(current_user.id)
     # 204 No Content
 
 @router.delete("/me", status_code=204)
-def delete_me(
-    db: Session = Depends(get_db),
+async def delete_me(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    db.delete(current_user)
-    db.commit()
+    product_ids = (await db.scalars(select(Product.id).where(Product.owner_id == current_user.id))).all()
+    await delete_user(db, user=current_user)
+    await invalidate_principal(current_user.id)
+    # sus productos caen por CASCADE: fuera de listados y detalle cacheados
+    await response_cache.invalidate(PRODUCTS, *(product_tag(pid) for pid in product_ids))
+    for pid in product_ids:
+        recommender.remove(pid)
     # 204 No Content
 
 
 @router.post("/me/avatar", response_model=UserRead)
 async def upload_my_avatar(
+    background: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    new_url = await save_image(file, subdir="avatars")
-    # si quieres reemplazar y borrar la anterior:
-    delete_local_file_if_inside_static(current_user.avatar_url)
-    current_user.avatar_url = new_url
-    db.commit()
-    db.refresh(current_user)
+    # almacén por contenido: +1 al nuevo y -1 al anterior en la misma transacción
+    old = (current_user.avatar_url, current_user.avatar_thumb_url, current_user.avatar_card_url)
+    async with ingest_images(db, [file]) as (stored,):
+        await release(db, current_user.avatar_url)
+        current_user.avatar_url = stored.url
+        current_user.avatar_thumb_url = current_user.avatar_card_url = None
+        await db.commit()
+    delete_local_file_if_inside_static(*old)  # avatares previos al almacén (uuid)
+    await invalidate_principal(current_user.id)
+    await db.refresh(current_user)
+    await db.close()   # get_db cierra después de las BackgroundTasks: no retener la conexión
+    # variantes WebP después de responder (la subida no las espera)
+    background.add_task(generate_avatar_variants, current_user.id, stored.path, stored.url)
     return current_user
 
 
 @router.delete("/me/avatar", response_model=UserRead)
-def delete_my_avatar(
-    db: Session = Depends(get_db),
+async def delete_my_avatar(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    delete_local_file_if_inside_static(current_user.avatar_url)
-    current_user.avatar_url = None
-    db.commit()
-    db.refresh(current_user)
+    old = (current_user.avatar_url, current_user.avatar_thumb_url, current_user.avatar_card_url)
+    await release(db, current_user.avatar_url)
+    current_user.avatar_url = current_user.avatar_thumb_url = current_user.avatar_card_url = None
+    await db.commit()
+    delete_local_file_if_inside_static(*old)
+    await invalidate_principal(current_user.id)
+    await db.refresh(current_user)
     return current_user
 
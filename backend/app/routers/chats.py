@@ -1,19 +1,26 @@
 from __future__ import annotations
+from datetime import datetime
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import or_, and_, desc
-from sqlalchemy.orm import Session
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, status
+)
+from sqlalchemy import or_, and_, desc, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from ..core.db import get_db
-from ..core.security import get_current_user
+from ..core.db import get_db, AsyncSessionLocal
+from ..core.realtime import hub
+from ..core.security import get_current_user, user_id_from_token
 from ..models.user import User
 from ..models.chat import Conversation, Message
 from ..models.product import Product
 from ..schemas.chat import (
     ConversationStart, ConversationRead,
-    MessageCreate, MessageRead
+    MessageCreate, MessageRead, UnreadCount
 )
+from ..crud.chat import add_message, last_read_id_for, mark_read, total_unread, unread_count_for
+from ..utils.pagination import decode_cursor, set_next_cursor
 
 router = APIRouter(prefix="/chats", tags=["chats"])
 
@@ -22,10 +29,22 @@ def _order_pair(a: int, b: int) -> tuple[int, int]:
     return (a, b) if a < b else (b, a)
 
 
+def _other(conv: Conversation, user_id: int) -> int:
+    return conv.user2_id if user_id == conv.user1_id else conv.user1_id
+
+
+def _message_read(msg: Message, recipient_watermark: Optional[int]) -> MessageRead:
+    """MessageRead con `read_at` derivado del watermark del destinatario."""
+    out = MessageRead.model_validate(msg)
+    read = recipient_watermark is not None and msg.id <= recipient_watermark
+    out.read_at = msg.created_at if read else None
+    return out
+
+
 @router.post("/start", response_model=ConversationRead)
-def start_conversation(
+async def start_conversation(
     payload: ConversationStart,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     me: User = Depends(get_current_user),
 ):
     if payload.other_user_id == me.id:
@@ -33,111 +52,180 @@ def start_conversation(
 
     product_id = None
     if payload.product_id is not None:
-        product = db.get(Product, payload.product_id)
-        if not product:
+        product_id = await db.scalar(select(Product.id).where(Product.id == payload.product_id))
+        if product_id is None:
             raise HTTPException(404, "Producto no encontrado")
-        product_id = product.id
 
     u1, u2 = _order_pair(me.id, payload.other_user_id)
 
-    conv = (
-        db.query(Conversation)
-        .filter(
+    conv = await db.scalar(
+        select(Conversation)
+        .options(joinedload(Conversation.last_message))
+        .where(
             Conversation.user1_id == u1,
             Conversation.user2_id == u2,
             Conversation.product_id.is_(product_id),
         )
-        .first()
     )
     if not conv:
         conv = Conversation(user1_id=u1, user2_id=u2, product_id=product_id)
         db.add(conv)
-        db.commit()
-        db.refresh(conv)
+        await db.commit()
+        await db.refresh(conv)
 
     if me.id == conv.user1_id and conv.hidden_for_user1:
         conv.hidden_for_user1 = False
-        db.commit()
+        await db.commit()
     elif me.id == conv.user2_id and conv.hidden_for_user2:
         conv.hidden_for_user2 = False
-        db.commit()
+        await db.commit()
 
-    return _conversation_for_read(db, conv, me.id)
+    return _conversations_for_read([conv], me.id)[0]
 
 
 @router.get("", response_model=List[ConversationRead])
-def list_my_conversations(
-    db: Session = Depends(get_db),
+async def list_my_conversations(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
     me: User = Depends(get_current_user),
     limit: int = Query(20, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    offset: int = Query(0, ge=0, deprecated=True),
 ):
-    base = db.query(Conversation).filter(
+    base = select(Conversation).options(joinedload(Conversation.last_message)).where(
         or_(Conversation.user1_id == me.id, Conversation.user2_id == me.id)
     )
 
-    base = base.filter(
+    base = base.where(
         or_(
             and_(Conversation.user1_id == me.id, Conversation.hidden_for_user1.is_(False)),
             and_(Conversation.user2_id == me.id, Conversation.hidden_for_user2.is_(False)),
         )
-    ).order_by(desc(Conversation.updated_at)).offset(offset).limit(limit)
+    ).order_by(desc(Conversation.updated_at), desc(Conversation.id))
+
+    # keyset sobre (updated_at, id); offset solo para clientes viejos
+    if cursor:
+        key = decode_cursor(cursor, u=datetime.fromisoformat, id=int)
+        base = base.where(tuple_(Conversation.updated_at, Conversation.id) < tuple_(key["u"], key["id"]))
+    elif offset:
+        base = base.offset(offset)
+
+    conversations = (await db.scalars(base.limit(limit + 1))).all()
+    if len(conversations) > limit:
+        last = conversations[limit - 1]
+        set_next_cursor(response, {"u": last.updated_at.isoformat(), "id": last.id})
+        conversations = conversations[:limit]
+    return _conversations_for_read(conversations, me.id)
+
+
+async def _active_user_exists(user_id: int) -> bool:
+    # sesión corta: el socket vive mucho y no debe retener una conexión del pool
+    async with AsyncSessionLocal() as db:
+        return await db.scalar(
+            select(User.id).where(User.id == user_id, User.is_active.is_(True))
+        ) is not None
+
 
-    conversations = base.all()
-    return [_conversation_for_read(db, c, me.id) for c in conversations]
+@router.websocket("/ws")
+async def chat_socket(websocket: WebSocket, token: str = Query(...)):
+    """
+    Canal servidor → cliente: recibe {"type": "message", "message": MessageRead}
+    de cada mensaje nuevo en tus conversaciones. Auth con el mismo JWT de
+    /auth/login en ?token= (los navegadores no permiten headers en WebSocket).
+    """
+    user_id = user_id_from_token(token)
+    if user_id is None or not await _active_user_exists(user_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    hub.connect(user_id, websocket)
+    try:
+        while True:
+            # lo que mande el cliente (pings/keepalive) se ignora
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        hub.disconnect(user_id, websocket)
+
+
+@router.get("/unread", response_model=UnreadCount)
+async def my_unread_count(
+    db: AsyncSession = Depends(get_db),
+    me: User = Depends(get_current_user),
+):
+    """Total de no leídos (badge), desde los contadores de cada conversación."""
+    return UnreadCount(unread=await total_unread(db, me.id))
 
 
 @router.get("/{conversation_id}/messages", response_model=List[MessageRead])
-def get_messages(
+async def get_messages(
     conversation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     me: User = Depends(get_current_user),
+    after_id: Optional[int] = Query(None, ge=0, description="Solo mensajes nuevos (id > after_id)"),
+    before_id: Optional[int] = Query(None, ge=1, description="Historial anterior (id < before_id)"),
+    limit: int = Query(50, ge=1, le=200),
 ):
-    conv = db.get(Conversation, conversation_id)
+    """
+    Página de mensajes en orden ascendente, siempre acotada por `limit`:
+    - sin parámetros: los `limit` más recientes
+    - after_id: los siguientes a after_id (polling / reconexión del socket)
+    - before_id: los `limit` anteriores a before_id (scroll hacia arriba)
+    """
+    conv = await db.get(Conversation, conversation_id)
     if not conv or (me.id not in (conv.user1_id, conv.user2_id)):
         raise HTTPException(404, "Conversación no encontrada")
 
-    rows = (
-        db.query(Message)
-        .filter(Message.conversation_id == conv.id, Message.is_deleted_by_sender.is_(False))
-        .order_by(Message.id)
-        .all()
+    query = select(Message).where(
+        Message.conversation_id == conv.id, Message.is_deleted_by_sender.is_(False)
     )
+    if before_id is not None:
+        query = query.where(Message.id < before_id)
+    if after_id is not None:
+        rows = (await db.scalars(query.where(Message.id > after_id).order_by(Message.id).limit(limit))).all()
+    else:
+        rows = (await db.scalars(query.order_by(desc(Message.id)).limit(limit))).all()[::-1]
+
+    if not rows:
+        return []
 
-    # marcar como leídos
-    for m in rows:
-        if m.sender_id != me.id and m.read_at is None:
-            m.read_at = m.created_at
-    db.commit()
-    return rows
+    # abrir la conversación = avanzar mi watermark (UPDATE de una fila);
+    # se serializa antes del commit para no recargar cada fila expirada
+    my_wm = max(last_read_id_for(conv, me.id) or 0, rows[-1].id)
+    other_wm = last_read_id_for(conv, _other(conv, me.id))
+    out = [_message_read(m, other_wm if m.sender_id == me.id else my_wm) for m in rows]
+    await mark_read(db, conv=conv, reader_id=me.id, upto_id=rows[-1].id)
+    return out
 
 
 @router.post("/{conversation_id}/messages", response_model=MessageRead, status_code=201)
-def send_message(
+async def send_message(
     conversation_id: int,
     payload: MessageCreate,
-    db: Session = Depends(get_db),
+    background: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
     me: User = Depends(get_current_user),
 ):
-    conv = db.get(Conversation, conversation_id)
+    conv = await db.get(Conversation, conversation_id)
     if not conv or (me.id not in (conv.user1_id, conv.user2_id)):
         raise HTTPException(404, "Conversación no encontrada")
 
-    msg = Message(conversation_id=conv.id, sender_id=me.id, body=payload.body)
-    db.add(msg)
-    conv.updated_at = None
-    db.commit()
-    db.refresh(msg)
+    msg = _message_read(await add_message(db, conv=conv, sender_id=me.id, body=payload.body), None)
+    # push a los sockets de ambos participantes (el emisor puede tener otras pestañas)
+    event = {"type": "message", "message": msg.model_dump(mode="json")}
+    background.add_task(hub.publish, (conv.user1_id, conv.user2_id), event)
     return msg
 
 
 @router.delete("/{conversation_id}", status_code=204)
-def hide_conversation(
+async def hide_conversation(
     conversation_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     me: User = Depends(get_current_user),
 ):
-    conv = db.get(Conversation, conversation_id)
+    conv = await db.get(Conversation, conversation_id)
     if not conv or (me.id not in (conv.user1_id, conv.user2_id)):
         raise HTTPException(404, "Conversación no encontrada")
 
@@ -146,33 +234,28 @@ def hide_conversation(
     else:
         conv.hidden_for_user2 = True
 
-    db.commit()
+    await db.commit()
     return None
 
 
-def _conversation_for_read(db: Session, conv: Conversation, viewer_id: int) -> ConversationRead:
-    last_msg = (
-        db.query(Message)
-        .filter(Message.conversation_id == conv.id, Message.is_deleted_by_sender.is_(False))
-        .order_by(desc(Message.id))
-        .first()
-    )
-    unread = (
-        db.query(Message)
-        .filter(
-            Message.conversation_id == conv.id,
-            Message.sender_id != viewer_id,
-            Message.read_at.is_(None),
-            Message.is_deleted_by_sender.is_(False),
+def _conversations_for_read(conversations: List[Conversation], viewer_id: int) -> List[ConversationRead]:
+    """
+    Arma la bandeja desde las columnas denormalizadas de Conversation
+    (último mensaje + no leídos): no consulta `messages` por conversación.
+    `last_message` debe venir cargado (joinedload): en async no hay lazy load.
+    Una conversación sin mensajes (last_message_id NULL) no lo necesita.
+    """
+    return [
+        ConversationRead(
+            id=conv.id,
+            product_id=conv.product_id,
+            user1_id=conv.user1_id,
+            user2_id=conv.user2_id,
+            last_message=(
+                _message_read(conv.last_message, last_read_id_for(conv, _other(conv, conv.last_message.sender_id)))
+                if conv.last_message_id is not None else None
+            ),
+            unread_count=unread_count_for(conv, viewer_id),
         )
-        .count()
-    )
-    from ..schemas.chat import ConversationRead
-    return ConversationRead(
-        id=conv.id,
-        product_id=conv.product_id,
-        user1_id=conv.user1_id,
-        user2_id=conv.user2_id,
-        last_message=last_msg,
-        unread_count=unread,
-    )
+        for conv in conversations
+    ]
@@ -0,0 +1,39 @@
+# backend/app/routers/feed.py
+from __future__ import annotations
+
+from typing import List
+
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.db import get_db
+from ..core.feed import feed
+from ..core.security import get_current_user
+from ..models.product import Product
+from ..models.user import User
+from ..schemas.product import ProductRead
+from .products import _dump, _product_list, _product_rows, _with_images
+
+router = APIRouter(prefix="/feed", tags=["feed"])
+
+
+@router.get("/next", response_model=List[ProductRead])
+async def next_batch(
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    me: User = Depends(get_current_user),
+):
+    """
+    Siguientes productos del feed de descubrimiento (core/feed.py). Cada
+    llamada avanza: lo devuelto queda como visto. Lista vacía = no hay más
+    por ahora.
+    """
+    ids = await feed.next(me.id, limit)
+    products = []
+    if ids:
+        # solo por PK: desactivados después de encolarse se omiten
+        order = {pid: i for i, pid in enumerate(ids)}
+        rows = (await db.execute(_product_rows().where(Product.id.in_(ids), Product.is_active.is_(True)))).all()
+        rows.sort(key=lambda r: order[r.id])
+        products = await _with_images(db, rows)
+    return Response(content=_dump(_product_list, products), media_type="application/json")
@@ -0,0 +1,66 @@
+# backend/app/routers/internal.py
+"""
+Endpoints internos de operación (no forman parte del API público).
+Exigen el header X-Internal-Token igual a INTERNAL_TOKEN; sin token
+configurado no existen (404): exponen pool, cachés, hasher y feed.
+"""
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+
+from ..core.db import pool_stats
+from ..core.email_utils import mx_cache
+from ..core.hasher import hasher
+from ..core.images import pipeline as image_pipeline
+from ..core.response_cache import response_cache
+from ..core.campus_catalog import campus_catalog
+from ..core.recommender import recommender
+from ..core.feed import feed
+from ..core.security import principal_cache
+from ..core.settings import INTERNAL_TOKEN
+
+
+def require_internal_token(x_internal_token: str | None = Header(None)) -> None:
+    if not INTERNAL_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not secrets.compare_digest(x_internal_token or "", INTERNAL_TOKEN):
+        raise HTTPException(status_code=403, detail="No autorizado")
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)],
+)
+
+
+@router.get("/stats/db")
+async def db_pool_stats():
+    """Pools de conexiones: en uso, overflow, pico, espera de checkout y timeouts."""
+    return pool_stats()
+
+
+@router.get("/stats/caches")
+async def cache_stats():
+    """Cachés en memoria de este worker: tamaño, aciertos y fallos."""
+    return {
+        "principals": principal_cache.stats(),
+        "mx": mx_cache.stats(),
+        "responses": response_cache.stats(),
+        "campuses": campus_catalog.stats(),
+        "recommender": recommender.stats(),
+        "feed": feed.stats(),
+    }
+
+
+@router.get("/stats/hasher")
+async def hasher_stats():
+    """Hash de contraseñas: cola, en curso, latencia, rechazos y timeouts."""
+    return hasher.stats()
+
+
+@router.get("/stats/images")
+async def image_pipeline_stats():
+    """Variantes WebP: pendientes, generadas y fallidas."""
+    return image_pipeline.stats()
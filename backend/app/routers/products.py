@@ -1,16 +1,23 @@
 from typing import List, Optional
-from uuid import uuid4
 from pathlib import Path
-import shutil
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Path as FPath, File, UploadFile, Form
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query, Path as FPath, File, UploadFile, Form, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from pydantic import TypeAdapter
 
 from ..core.db import get_db
 from ..core.security import get_current_user
+from ..core.search import apply_search, index_product
+from ..core.images import generate_product_image_variants
+from ..core.response_cache import PRODUCTS, product_tag, response_cache
+from ..core.recommender import PROFILE_SEEDS, profile_seeds, recommender
 from ..models.product import Product, ProductImage
 from ..models.user import User
 from ..schemas.product import ProductCreate, ProductRead, ProductUpdate
+from ..core.storage import ingest_images, release
+from ..utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, set_next_cursor
 
 # Carpeta de medios (coherente con main.py)
 MEDIA_ROOT = Path("media")
@@ -19,96 +26,235 @@ PRODUCTS_DIR.mkdir(parents=True, exist_ok=True)
 
 router = APIRouter()
 
+
+# respuestas serializadas una vez y guardadas así en el caché
+_product_list = TypeAdapter(List[ProductRead])
+_product_one = TypeAdapter(ProductRead)
+
+
+def _dump(adapter: TypeAdapter, obj) -> bytes:
+    return adapter.dump_json(adapter.validate_python(obj, from_attributes=True))
+
+
+async def _invalidate(product_id: Optional[int] = None) -> None:
+    # después del commit: listados siempre, detalle si aplica
+    tags = [PRODUCTS] if product_id is None else [PRODUCTS, product_tag(product_id)]
+    await response_cache.invalidate(*tags)
+
+
+# ---------- Listados: solo las columnas de ProductRead, sin ORM ----------
+_LIST_COLUMNS = (Product.id, Product.title, Product.description, Product.owner_id, Product.is_active)
+_IMAGE_COLUMNS = (
+    ProductImage.id, ProductImage.product_id, ProductImage.url,
+    ProductImage.thumb_url, ProductImage.card_url, ProductImage.full_url,
+)
+
+
+def _product_rows():
+    return select(*_LIST_COLUMNS)
+
+
+async def _with_images(db: AsyncSession, rows) -> List[dict]:
+    """Filas de producto → dicts de ProductRead; las imágenes de toda la página en UNA consulta."""
+    products = [{**r._mapping, "images": []} for r in rows]
+    by_id = {p["id"]: p for p in products}
+    if by_id:
+        images = await db.execute(
+            select(*_IMAGE_COLUMNS).where(ProductImage.product_id.in_(by_id)).order_by(ProductImage.id)
+        )
+        for img in images.mappings():
+            by_id[img["product_id"]]["images"].append(img)
+    return products
+
+
+async def _ranked(db: AsyncSession, ranked, limit: int, *conditions) -> List[dict]:
+    """Ids del recomendador → productos activos, en el orden del ranking."""
+    order = {pid: i for i, (pid, _) in enumerate(ranked)}
+    if not order:
+        return []
+    rows = (await db.execute(
+        _product_rows().where(Product.id.in_(order), Product.is_active.is_(True), *conditions)
+    )).all()
+    rows.sort(key=lambda r: order[r.id])
+    return await _with_images(db, rows[:limit])
+
+
+def _json_page(products: List[dict], next_cursor: Optional[dict]) -> Response:
+    response = Response(content=_dump(_product_list, products), media_type="application/json")
+    set_next_cursor(response, next_cursor)
+    return response
+
+
+async def _get_product(db: AsyncSession, product_id: int) -> Optional[Product]:
+    # en async no hay lazy load: toda respuesta ProductRead trae sus imágenes
+    return await db.get(Product, product_id, options=[selectinload(Product.images)])
+
+
+def _schedule_variants(background: BackgroundTasks, images: List[ProductImage], paths: List[Path]) -> None:
+    # variantes WebP después de responder: la subida no espera al pool de imágenes
+    for image, path in zip(images, paths):
+        background.add_task(generate_product_image_variants, image.id, path, image.url)
+
+
+async def _page_by_id(db: AsyncSession, query, cursor: Optional[str], offset: int, limit: int):
+    """
+    Página ordenada por id DESC. Con cursor usa keyset (id < último id);
+    sin cursor cae a offset (periodo de transición).
+    Devuelve (filas, payload del siguiente cursor | None).
+    """
+    query = query.order_by(Product.id.desc())
+    if cursor:
+        query = query.where(Product.id < decode_cursor(cursor, id=int)["id"])
+    elif offset:
+        query = query.offset(offset)
+    rows = (await db.execute(query.limit(limit + 1))).all()
+    if len(rows) > limit:
+        return rows[:limit], {"id": rows[limit - 1].id}
+    return rows, None
+
+
 # ---------- Listado público (solo activos) + búsqueda y paginación ----------
 @router.get("/", response_model=List[ProductRead])
-def list_products(
-    db: Session = Depends(get_db),
+async def list_products(
+    db: AsyncSession = Depends(get_db),
     q: Optional[str] = Query(None, description="Búsqueda por título o descripción"),
     limit: int = Query(50, ge=1, le=100),
-    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    offset: int = Query(0, ge=0, deprecated=True),
 ):
-    query = db.query(Product).filter(Product.is_active.is_(True))
-    if q:
-        like = f"%{q}%"
-        query = query.filter((Product.title.ilike(like)) | (Product.description.ilike(like)))
-    products = (
-        query.order_by(Product.id.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+    async def build():
+        query = _product_rows().where(Product.is_active.is_(True))
+        if q:
+            # índice de texto completo, ordenado por relevancia; el ranking no
+            # sirve como clave keyset, así que el cursor guarda la posición
+            start = max(decode_cursor(cursor, o=int)["o"], 0) if cursor else offset
+            rows = (await db.execute(apply_search(db, query, q).offset(start).limit(limit + 1))).all()
+            next_cursor = {"o": start + limit} if len(rows) > limit else None
+            rows = rows[:limit]
+        else:
+            rows, next_cursor = await _page_by_id(db, query, cursor, offset, limit)
+        headers = {NEXT_CURSOR_HEADER: encode_cursor(next_cursor)} if next_cursor else {}
+        return _dump(_product_list, await _with_images(db, rows)), headers
+
+    # cualquier escritura de productos cambia los listados: un solo tag
+    return await response_cache.respond(
+        "products.list", {"q": q and q.lower(), "limit": limit, "cursor": cursor, "offset": offset}, [PRODUCTS], build
     )
-    return products
+
+# ---------- Recomendaciones para el usuario (TF-IDF) ----------
+# (antes de "/{product_id}", que si no captura la ruta)
+@router.get("/recommendations", response_model=List[ProductRead])
+async def recommendations(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+    limit: int = Query(20, ge=1, le=50),
+):
+    # perfil: productos ajenos con like o por los que el usuario abrió
+    # conversación; sin ninguno, lo que él mismo publica; sin nada, lo más reciente
+    seeds = await profile_seeds(db, current_user.id)
+    own = (await db.execute(
+        select(Product.id, Product.title, Product.description).where(Product.owner_id == current_user.id)
+        .order_by(Product.id.desc()).limit(PROFILE_SEEDS)
+    )).all()
+    own_ids = [r.id for r in own]
+    not_mine = Product.owner_id != current_user.id
+
+    if seeds or own:
+        # de más: el índice de este worker puede ir atrasado respecto a la base
+        ranked = recommender.recommend(seeds or own, 2 * limit, exclude=own_ids)
+        return _json_page(await _ranked(db, ranked, limit, not_mine), None)
+    rows, _ = await _page_by_id(db, _product_rows().where(Product.is_active.is_(True), not_mine), None, 0, limit)
+    return _json_page(await _with_images(db, rows), None)
 
 # ---------- Detalle público ----------
 @router.get("/{product_id}", response_model=ProductRead)
-def get_product(
+async def get_product(
     product_id: int = FPath(..., ge=1),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
-    p = db.query(Product).get(product_id)
-    if not p or not p.is_active:
-        raise HTTPException(status_code=404, detail="Producto no encontrado")
-    return p
+    async def build():
+        p = await _get_product(db, product_id)
+        if not p or not p.is_active:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        return _dump(_product_one, p), {}
+
+    return await response_cache.respond(
+        "products.get", {"id": product_id}, [product_tag(product_id)], build
+    )
+
+# ---------- Similares (TF-IDF, coseno) ----------
+@router.get("/{product_id}/similar", response_model=List[ProductRead])
+async def similar_products(
+    product_id: int = FPath(..., ge=1),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    async def build():
+        p = (await db.execute(
+            select(Product.title, Product.description).where(Product.id == product_id, Product.is_active.is_(True))
+        )).first()
+        if not p:
+            raise HTTPException(status_code=404, detail="Producto no encontrado")
+        ranked = recommender.similar(product_id, 2 * limit, p.title, p.description)
+        return _dump(_product_list, await _ranked(db, ranked, limit)), {}
+
+    return await response_cache.respond(
+        "products.similar", {"id": product_id, "limit": limit}, [PRODUCTS], build
+    )
 
 # ---------- Crear con imágenes (multipart/form-data) ----------
 @router.post("/", response_model=ProductRead, status_code=status.HTTP_201_CREATED)
 async def create_product(
+    background: BackgroundTasks,
     title: str = Form(..., min_length=1, max_length=120),
     description: str = Form(..., min_length=1, max_length=2000),
     images: Optional[List[UploadFile]] = File(None),  # 0..N imágenes
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    product = Product(title=title, description=description, owner_id=current_user.id)
-    db.add(product)
-    db.commit()
-    db.refresh(product)
-
-    saved_images: List[ProductImage] = []
-    if images:
-        product_folder = PRODUCTS_DIR / str(product.id)
-        product_folder.mkdir(parents=True, exist_ok=True)
-
-        for img in images:
-            # nombre único
-            ext = Path(img.filename).suffix.lower() or ".jpg"
-            filename = f"{uuid4().hex}{ext}"
-            dest = product_folder / filename
-
-            with dest.open("wb") as f:
-                shutil.copyfileobj(img.file, f)
-
-            url = f"/media/products/{product.id}/{filename}"  # URL pública
-            saved_images.append(ProductImage(product_id=product.id, url=url))
-
+    # imágenes validadas/escritas en paralelo (almacén por contenido: bytes
+    # idénticos no se reescriben); producto, imágenes y refcounts en UNA
+    # transacción: si algo falla no queda producto a medias ni archivos sueltos
+    async with ingest_images(db, images or []) as stored:
+        product = Product(title=title, description=description, owner_id=current_user.id)
+        db.add(product)
+        await db.flush()
+        await index_product(db, product)
+        saved_images = [ProductImage(product_id=product.id, url=s.url) for s in stored]
         db.add_all(saved_images)
-        db.commit()
-        db.refresh(product)
+        await db.commit()
+    await _invalidate()
+    recommender.update(product.id, title, description)
+    _schedule_variants(background, saved_images, [s.path for s in stored])
 
+    await db.refresh(product, ["images"])
+    await db.close()   # la conexión vuelve al pool ya, no después de las BackgroundTasks
     return product
 
 # ---------- Mis productos ----------
 @router.get("/me/mine", response_model=List[ProductRead])
-def list_my_products(
-    db: Session = Depends(get_db),
+async def list_my_products(
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
+    limit: int = Query(50, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Valor del header X-Next-Cursor de la página anterior"),
+    offset: int = Query(0, ge=0, deprecated=True),
 ):
-    return (
-        db.query(Product)
-        .filter(Product.owner_id == current_user.id)
-        .order_by(Product.id.desc())
-        .all()
+    rows, next_cursor = await _page_by_id(
+        db, _product_rows().where(Product.owner_id == current_user.id),
+        cursor, offset, limit,
     )
+    return _json_page(await _with_images(db, rows), next_cursor)
 
 # ---------- Update (patch) ----------
 @router.patch("/{product_id}", response_model=ProductRead)
-def update_product(
+async def update_product(
     product_id: int = FPath(..., ge=1),
     payload: ProductUpdate = ...,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    p = db.query(Product).get(product_id)
+    p = await _get_product(db, product_id)
     if not p:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     if p.owner_id != current_user.id:
@@ -120,86 +266,94 @@ def update_product(
         p.description = payload.description
     if payload.is_active is not None:
         p.is_active = payload.is_active
+    if payload.title is not None or payload.description is not None:
+        await index_product(db, p)
 
-    db.commit()
-    db.refresh(p)
+    await db.commit()
+    await _invalidate(p.id)
+    if not p.is_active:
+        recommender.remove(p.id)
+    elif payload.title is not None or payload.description is not None or payload.is_active:
+        recommender.update(p.id, p.title, p.description)
     return p
 
 # ---------- Agregar imágenes a un producto existente ----------
 @router.post("/{product_id}/images", response_model=ProductRead)
 async def add_images(
+    background: BackgroundTasks,
     product_id: int = FPath(..., ge=1),
     images: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    p = db.query(Product).get(product_id)
+    p = await _get_product(db, product_id)
     if not p:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     if p.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="No puedes modificar este producto")
 
-    product_folder = PRODUCTS_DIR / str(p.id)
-    product_folder.mkdir(parents=True, exist_ok=True)
-
-    new_imgs = []
-    for img in images:
-        ext = Path(img.filename).suffix.lower() or ".jpg"
-        filename = f"{uuid4().hex}{ext}"
-        dest = product_folder / filename
-        with dest.open("wb") as f:
-            shutil.copyfileobj(img.file, f)
-        url = f"/media/products/{p.id}/{filename}"
-        new_imgs.append(ProductImage(product_id=p.id, url=url))
-
-    db.add_all(new_imgs)
-    db.commit()
-    db.refresh(p)
+    async with ingest_images(db, images) as stored:
+        new_imgs = [ProductImage(product_id=p.id, url=s.url) for s in stored]
+        db.add_all(new_imgs)
+        await db.commit()
+    await _invalidate(p.id)
+    _schedule_variants(background, new_imgs, [s.path for s in stored])
+    await db.refresh(p, ["images"])
+    await db.close()   # ídem: no retener la conexión mientras corren las variantes
     return p
 
 # ---------- Borrar imagen específica (opcional) ----------
 @router.delete("/{product_id}/images/{image_id}", status_code=204)
-def delete_image(
+async def delete_image(
     product_id: int,
     image_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    p = db.query(Product).get(product_id)
+    p = await db.get(Product, product_id)
     if not p:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     if p.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="No puedes modificar este producto")
 
-    img = db.query(ProductImage).filter_by(id=image_id, product_id=product_id).first()
+    img = await db.scalar(
+        select(ProductImage).where(ProductImage.id == image_id, ProductImage.product_id == product_id)
+    )
     if not img:
         raise HTTPException(status_code=404, detail="Imagen no encontrada")
 
-    # intenta borrar del disco (best-effort)
-    path = Path(img.url.lstrip("/"))
-    try:
-        if path.exists():
-            path.unlink()
-    except Exception:
-        pass
+    await release(db, img.url)  # el archivo compartido lo borra el GC en refcount 0
+    await db.delete(img)
+    await db.commit()
+    await _invalidate(product_id)
 
-    db.delete(img)
-    db.commit()
+    # imágenes previas al almacén (uuid en media/products): borrar del disco (best-effort)
+    for url in (img.url, img.thumb_url, img.card_url, img.full_url):
+        if not url or not url.startswith("/media/"):
+            continue
+        path = Path(url.lstrip("/"))
+        try:
+            if path.exists():
+                path.unlink()
+        except Exception:
+            pass
     return None
 
 # ---------- Borrado (soft delete) ----------
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_product(
+async def delete_product(
     product_id: int = FPath(..., ge=1),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    p = db.query(Product).get(product_id)
+    p = await db.get(Product, product_id)
     if not p:
         raise HTTPException(status_code=404, detail="Producto no encontrado")
     if p.owner_id != current_user.id:
         raise HTTPException(status_code=403, detail="No puedes eliminar este producto")
 
     p.is_active = False
-    db.commit()
+    await db.commit()
+    await _invalidate(product_id)
+    recommender.remove(product_id)
     return None
@@ -0,0 +1,37 @@
+# backend/app/routers/swipes.py
+from __future__ import annotations
+
+from fastapi import APIRouter, BackgroundTasks, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.db import get_db
+from ..core.feed import feed
+from ..core.realtime import hub
+from ..core.security import get_current_user
+from ..crud.swipe import record_swipes
+from ..models.user import User
+from ..schemas.swipe import SwipeBatch, SwipeResult
+
+router = APIRouter(prefix="/swipes", tags=["swipes"])
+
+
+@router.post("", response_model=SwipeResult)
+async def swipe(
+    payload: SwipeBatch,
+    background: BackgroundTasks,
+    db: AsyncSession = Depends(get_db),
+    me: User = Depends(get_current_user),
+):
+    """
+    Lote de swipes (1..100; el cliente acumula y envía cada pocos segundos).
+    Un like sobre un producto de alguien que ya le dio like a algo tuyo es
+    match: se abre la conversación y ambos reciben {"type": "match"} por
+    el WebSocket del chat.
+    """
+    accepted, rejected, matches = await record_swipes(db, swiper_id=me.id, swipes=payload.swipes)
+    # swipeado desde cualquier pantalla: el feed ya no lo muestra
+    await feed.mark_seen(me.id, [s.product_id for s in payload.swipes])
+    for m in matches:
+        event = {"type": "match", "match": {"conversation_id": m.conversation_id, "product_id": m.product_id}}
+        background.add_task(hub.publish, (me.id, m.user_id), event)
+    return SwipeResult(accepted=accepted, rejected=rejected, matches=matches)
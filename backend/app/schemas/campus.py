@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class CampusRead(BaseModel):
+    id: int
+    code: str
+    name: str
+
+    model_config = {"from_attributes": True}
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from datetime import datetime
 from typing import Optional, List
 from pydantic import BaseModel, Field
 
@@ -12,8 +13,8 @@ class MessageRead(BaseModel):
     conversation_id: int
     sender_id: int
     body: str
-    created_at: str
-    read_at: Optional[str] = None
+    created_at: datetime
+    read_at: Optional[datetime] = None
 
     model_config = {"from_attributes": True}
 
@@ -32,3 +33,7 @@ class ConversationRead(BaseModel):
     unread_count: int
 
     model_config = {"from_attributes": True}
+
+
+class UnreadCount(BaseModel):
+    unread: int
@@ -17,6 +17,10 @@ class ProductUpdate(BaseModel):
 class ProductImageRead(BaseModel):
     id: int
     url: str
+    # WebP por ancho (160/480/1280 px); None hasta que se generan -> usar `url`
+    thumb_url: Optional[str] = None
+    card_url: Optional[str] = None
+    full_url: Optional[str] = None
     class Config:
         from_attributes = True
 
@@ -0,0 +1,24 @@
+from __future__ import annotations
+from typing import List
+from pydantic import BaseModel, Field
+
+
+class SwipeIn(BaseModel):
+    product_id: int = Field(ge=1)
+    liked: bool
+
+
+class SwipeBatch(BaseModel):
+    swipes: List[SwipeIn] = Field(min_length=1, max_length=100)
+
+
+class MatchRead(BaseModel):
+    conversation_id: int
+    product_id: int
+    user_id: int  # el otro usuario
+
+
+class SwipeResult(BaseModel):
+    accepted: int                 # swipes guardados
+    rejected: List[int] = []      # productos inexistentes, inactivos o propios
+    matches: List[MatchRead] = []  # conversaciones nuevas abiertas por match
@@ -37,6 +37,8 @@ class UserRead(BaseModel):
     campus_id: Optional[int]
     bio: Optional[str] = None
     avatar_url: Optional[str] = None
+    avatar_thumb_url: Optional[str] = None   # WebP 96 px (None hasta generarse)
+    avatar_card_url: Optional[str] = None    # WebP 320 px
     is_active: Optional[bool] = True
 
     model_config = {"from_attributes": True}
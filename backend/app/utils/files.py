@@ -1,45 +1,103 @@
 # backend/app/utils/files.py
 from __future__ import annotations
+import hashlib
+from dataclasses import dataclass
 from fastapi import UploadFile, HTTPException
 from pathlib import Path
+from typing import Optional, Tuple
 from uuid import uuid4
 
+import anyio
+
 ALLOWED_IMAGE_TYPES = {"image/jpeg", "image/png", "image/webp"}
 MAX_IMAGE_MB = 5
+MAX_IMAGE_BYTES = MAX_IMAGE_MB * 1024 * 1024
+CHUNK_SIZE = 64 * 1024  # memoria por subida: un chunk, no el archivo completo
 
 def _static_root() -> Path:
     # .../backend
     return Path(__file__).resolve().parents[2] / "static"
 
-async def save_image(file: UploadFile, subdir: str) -> str:
-    # Validar tipo
-    if file.content_type not in ALLOWED_IMAGE_TYPES:
-        raise HTTPException(status_code=400, detail="Formato no permitido (JPG/PNG/WEBP)")
-
-    # Leer y validar tamaño
-    data = await file.read()
-    if len(data) > MAX_IMAGE_MB * 1024 * 1024:
-        raise HTTPException(status_code=400, detail=f"Imagen supera {MAX_IMAGE_MB}MB")
-
-    # Nombre único + extensión
-    ext = Path(file.filename).suffix.lower() or ".jpg"
-    name = f"{uuid4().hex}{ext}"
-
-    # Guardar en /static/uploads/<subdir>/
-    target_dir = _static_root() / "uploads" / subdir
-    target_dir.mkdir(parents=True, exist_ok=True)
-    (target_dir / name).write_bytes(data)
-
-    # URL pública servida por /static
-    return f"/static/uploads/{subdir}/{name}"
-
-def delete_local_file_if_inside_static(url: str | None) -> None:
-    # (lo usaremos después para eliminar/reemplazar)
-    if not url or not url.startswith("/static/uploads/"):
-        return
-    target_path = _static_root() / url.replace("/static/", "")
+
+# ---------- Tipo real por "magic bytes" (el content-type del cliente no es confiable) ----------
+def sniff_image_type(head: bytes) -> Optional[Tuple[str, str]]:
+    """(content_type, extensión) según la cabecera del archivo, o None si no es JPG/PNG/WEBP."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg", ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png", ".png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp", ".webp"
+    return None
+
+
+@dataclass
+class SpooledUpload:
+    size: int
+    sha256: str
+    content_type: str
+    ext: str
+    tmp: Path   # copia completa (`.part`); el caller la renombra o la borra
+
+
+async def _chunks(file: UploadFile, max_bytes: int):
+    """Chunks de la subida desde el inicio; corta apenas se supera `max_bytes`."""
+    await file.seek(0)
+    size = 0
+    while chunk := await file.read(CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise HTTPException(status_code=400, detail=f"Imagen supera {max_bytes // (1024 * 1024)}MB")
+        yield chunk
+
+
+async def spool_upload(file: UploadFile, tmp_dir: Path, *, max_bytes: int = MAX_IMAGE_BYTES) -> SpooledUpload:
+    """
+    Una sola pasada por la subida: tipo por magic bytes del primer chunk,
+    tamaño (corta apenas se supera `max_bytes`), sha256 y copia a un `.part`
+    en `tmp_dir`, por chunks con E/S en hilos (anyio): memoria acotada y sin
+    bloquear el event loop. Si algo falla, el `.part` se borra.
+
+    El límite aquí es por imagen y llega tarde: Starlette ya guardó el cuerpo
+    entero al parsear el multipart. El del request completo lo pone
+    `BodySizeLimit` (app/core/body_limit.py) antes de leerlo.
+    """
+    await anyio.Path(tmp_dir).mkdir(parents=True, exist_ok=True)
+    tmp = tmp_dir / f"{uuid4().hex}.part"
+    digest = hashlib.sha256()
+    size = 0
+    kind = None
     try:
-        if target_path.is_file():
-            target_path.unlink()
-    except Exception:
-        pass
+        async with await anyio.open_file(tmp, "wb") as out:
+            async for chunk in _chunks(file, max_bytes):
+                if kind is None:
+                    kind = sniff_image_type(chunk)
+                    if kind is None:
+                        raise HTTPException(status_code=400, detail="Formato no permitido (JPG/PNG/WEBP)")
+                digest.update(chunk)
+                size += len(chunk)
+                await out.write(chunk)
+        if kind is None:  # subida vacía
+            raise HTTPException(status_code=400, detail="Formato no permitido (JPG/PNG/WEBP)")
+    except BaseException:
+        await anyio.Path(tmp).unlink(missing_ok=True)
+        raise
+    return SpooledUpload(size=size, sha256=digest.hexdigest(), content_type=kind[0], ext=kind[1], tmp=tmp)
+
+
+def static_path(url: str) -> Path:
+    """Archivo local de una URL `/static/...` (p. ej. para generar sus variantes)."""
+    return _static_root() / url.replace("/static/", "", 1)
+
+
+def delete_local_file_if_inside_static(*urls: str | None) -> None:
+    # acepta varias URLs: original + variantes (thumb/card)
+    for url in urls:
+        if not url or not url.startswith("/static/uploads/"):
+            continue
+        target_path = static_path(url)
+        try:
+            if target_path.is_file():
+                target_path.unlink()
+        except Exception:
+            pass
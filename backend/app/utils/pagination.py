@@ -0,0 +1,43 @@
+# backend/app/utils/pagination.py
+"""
+Paginación por cursor (keyset).
+
+El cursor es opaco para el cliente: JSON compacto en base64url con la clave
+de orden de la última fila entregada, p. ej. {"id": 120} o
+{"u": "2025-11-03T18:42:10.512337+00:00", "id": 7}.
+Se devuelve en el header `X-Next-Cursor` (ausente en la última página) para
+no romper el cuerpo de las respuestas mientras `offset` siga soportado.
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from typing import Any, Callable
+
+from fastapi import HTTPException, Response
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, **fields: Callable[[Any], Any]) -> dict:
+    """
+    Decodifica el cursor y convierte cada campo pedido, p. ej.
+    `decode_cursor(token, id=int)`. Lanza HTTPException 400 si no es válido.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        return {key: conv(payload[key]) for key, conv in fields.items()}
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+
+def set_next_cursor(response: Response, payload: dict | None) -> None:
+    if payload is not None:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(payload)
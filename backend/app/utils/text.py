@@ -0,0 +1,11 @@
+# backend/app/utils/text.py
+"""Normalización de texto en español compartida por búsquedas en memoria."""
+from __future__ import annotations
+
+import unicodedata
+
+
+def fold(text: str) -> str:
+    """Minúsculas sin acentos ni espacios repetidos: "  Tonalá " → "tonala"."""
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
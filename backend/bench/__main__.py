@@ -0,0 +1,162 @@
+# backend/bench/__main__.py
+"""CLI: `python -m bench run ...` / `python -m bench compare base.json new.json`."""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _print_results(results: dict) -> None:
+    print(f"{'escenario':<15} {'endpoint':<26} {'req':>6} {'err':>4} {'rps':>7} "
+          f"{'p50':>8} {'p95':>8} {'p99':>8} {'consultas':>9}")
+    for scenario, res in results.items():
+        for label, s in res["endpoints"].items():
+            print(f"{scenario:<15} {label:<26} {s['requests']:>6} {s['errors']:>4} {s['rps']:>7} "
+                  f"{s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {str(s['queries_per_request']):>9}")
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    tmp = Path(tempfile.mkdtemp(prefix="machtrueke-bench-"))
+    # antes de importar app/: settings lee el entorno al importarse
+    env = {
+        "DATABASE_URL": args.database_url or f"sqlite:///{tmp / 'bench.db'}",
+        "RECOMMENDER_DIR": str(tmp / "recommender"),
+        "RESPONSE_CACHE_TTL": os.environ.get("RESPONSE_CACHE_TTL", "30") if args.cache else "0",
+    }
+    os.environ.update(env)
+
+    import httpx
+    from sqlalchemy import select
+
+    from app.core.db import SessionLocal, engine
+    from app.core.recommender import build_index
+    from app.core.storage import _unlink_blob
+    from app.models.media import MediaBlob
+
+    from .runner import Recorder, Server, run_users
+    from .scenarios import SCENARIOS
+    from .seed import Dataset, create_schema, seed
+
+    names = args.scenarios.split(",") if args.scenarios else list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"✘ escenarios desconocidos: {', '.join(unknown)} (hay: {', '.join(SCENARIOS)})")
+        return 2
+    ds = Dataset(users=args.users, products=args.products, seed=args.seed)
+
+    t0 = time.perf_counter()
+    create_schema()
+    seed(ds)
+    with SessionLocal() as db:
+        build_index(db, Path(env["RECOMMENDER_DIR"]))
+    print(f"✔ {engine.dialect.name}: {ds.users} usuarios, {ds.products} productos en {time.perf_counter() - t0:.1f}s")
+
+    results = {}
+    try:
+        with Server(env, workers=args.workers) as server:
+            async def run_all() -> None:
+                limits = httpx.Limits(max_connections=args.concurrency)
+                async with httpx.AsyncClient(base_url=server.url, limits=limits, timeout=30) as client:
+                    await client.get("/")   # calentar
+                    for name in names:
+                        rec = Recorder(client)
+                        elapsed = await run_users(rec, args.concurrency, args.duration, SCENARIOS[name].make_step(ds))
+                        results[name] = {"elapsed_s": round(elapsed, 2), "endpoints": rec.results(elapsed)}
+                        print(f"✔ {name} ({elapsed:.1f}s)")
+            asyncio.run(run_all())
+    finally:
+        # blobs que subió create_listing (la BD del benchmark es desechable)
+        with SessionLocal() as db:
+            for sha, ext in db.execute(select(MediaBlob.sha256, MediaBlob.ext)):
+                _unlink_blob(sha, ext)
+
+    report = {
+        "meta": {
+            "database": engine.dialect.name,
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "params": {"users": ds.users, "products": ds.products, "seed": ds.seed,
+                       "concurrency": args.concurrency, "duration": args.duration,
+                       "workers": args.workers, "response_cache": args.cache},
+        },
+        "results": results,
+    }
+    _print_results(results)
+    if args.out:
+        Path(args.out).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"✔ resultados en {args.out}")
+    errors = sum(s["errors"] for r in results.values() for s in r["endpoints"].values())
+    if errors and args.fail_on_errors:
+        print(f"✘ {errors} requests con error")
+        return 1
+    return 0
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    from .compare import compare, load, print_table
+
+    rows, regressions = compare(
+        load(args.base), load(args.new), latency_threshold=args.latency_threshold,
+        latency_floor_ms=args.latency_floor_ms, metrics=args.metrics.split(","),
+    )
+    print_table(rows)
+    if regressions:
+        print("\n✘ regresiones:")
+        for r in regressions:
+            print(f"  - {r}")
+        return 1
+    print("\n✔ sin regresiones")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="siembra una BD, levanta la API y corre los escenarios")
+    run.add_argument("--database-url", default=None,
+                     help="Postgres local VACÍO (se migra y se siembra); por defecto SQLite temporal")
+    run.add_argument("--scenarios", default="", help="separados por coma; por defecto todos")
+    run.add_argument("--duration", type=float, default=15.0, help="seg. por escenario")
+    run.add_argument("--concurrency", type=int, default=16, help="usuarios virtuales")
+    run.add_argument("--workers", type=int, default=1, help="workers de uvicorn")
+    run.add_argument("--users", type=int, default=200)
+    run.add_argument("--products", type=int, default=2000)
+    run.add_argument("--seed", type=int, default=42)
+    run.add_argument("--cache", action="store_true", help="con el caché de respuestas (por defecto apagado)")
+    run.add_argument("--quick", action="store_true", help="corrida corta para CI")
+    run.add_argument("--fail-on-errors", action="store_true")
+    run.add_argument("--out", default="", help="archivo JSON de resultados")
+
+    cmp_ = sub.add_parser("compare", help="compara dos corridas y falla si hay regresión")
+    cmp_.add_argument("base")
+    cmp_.add_argument("new")
+    cmp_.add_argument("--latency-threshold", type=float, default=0.25, help="p95 puede subir hasta este ratio")
+    cmp_.add_argument("--latency-floor-ms", type=float, default=2.0, help="ignora subidas menores a esto")
+    cmp_.add_argument("--metrics", default="latency,queries", help="latency,queries (en CI: queries)")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        if args.quick:
+            args.duration, args.concurrency = min(args.duration, 3.0), min(args.concurrency, 4)
+        return cmd_run(args)
+    return cmd_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+# backend/bench/app.py
+"""
+La app real (app.main) con dos ajustes solo para el benchmark:
+
+- QueryCountMiddleware: cuenta las sentencias SQL de cada request (sync y
+  async) y las devuelve en el header X-Query-Count.
+- El MX de los dominios permitidos se da por bueno: el DNS no es parte de
+  lo que se mide (y en CI puede no haber red).
+
+    uvicorn bench.app:app
+"""
+from __future__ import annotations
+
+import contextvars
+from typing import List, Optional
+
+from sqlalchemy import event
+
+from app.core.db import async_engine, engine
+from app.core.email_utils import mx_cache
+from app.main import app as api
+
+QUERY_COUNT_HEADER = b"x-query-count"
+
+_counter: contextvars.ContextVar[Optional[List[int]]] = contextvars.ContextVar("bench_queries", default=None)
+
+
+def _count(*_) -> None:
+    box = _counter.get()
+    if box is not None:
+        box[0] += 1
+
+
+for _eng in (engine, async_engine.sync_engine):
+    event.listen(_eng, "before_cursor_execute", _count)
+
+
+async def _mx_ok(domain: str) -> bool:
+    return True
+
+
+mx_cache.resolver = _mx_ok
+
+
+class QueryCountMiddleware:
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        box = [0]
+        token = _counter.set(box)
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((QUERY_COUNT_HEADER, str(box[0]).encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_count)
+        finally:
+            _counter.reset(token)
+
+
+app = QueryCountMiddleware(api)
@@ -0,0 +1,66 @@
+# backend/bench/compare.py
+"""Diferencia entre dos corridas (JSON de `bench run`) y umbrales de regresión."""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterable, List, Tuple
+
+METRICS = ("latency", "queries")
+
+
+def load(path: str) -> dict:
+    return json.loads(Path(path).read_text(encoding="utf-8"))
+
+
+def compare(
+    base: dict, new: dict, *, latency_threshold: float = 0.25, latency_floor_ms: float = 2.0,
+    metrics: Iterable[str] = METRICS,
+) -> Tuple[List[dict], List[str]]:
+    """
+    Compara los endpoints presentes en ambas corridas. Es regresión:
+    - latency: p95 nuevo > p95 base * (1 + threshold) y además más de
+      `latency_floor_ms` por encima (evita ruido en endpoints de ~1 ms).
+    - queries: sube la mediana de consultas SQL por request (determinista:
+      sirve en CI aunque la máquina sea ruidosa).
+    Devuelve (filas de la tabla, regresiones).
+    """
+    metrics = set(metrics)
+    rows: List[dict] = []
+    regressions: List[str] = []
+    for scenario, res in new["results"].items():
+        base_eps = base["results"].get(scenario, {}).get("endpoints", {})
+        for label, n in res["endpoints"].items():
+            b = base_eps.get(label)
+            if b is None:
+                continue
+            flags = []
+            if "latency" in metrics and b["p95_ms"] > 0:
+                limit = max(b["p95_ms"] * (1 + latency_threshold), b["p95_ms"] + latency_floor_ms)
+                if n["p95_ms"] > limit:
+                    flags.append(f"p95 {b['p95_ms']} -> {n['p95_ms']} ms")
+            bq, nq = b.get("queries_p50"), n.get("queries_p50")
+            if "queries" in metrics and bq is not None and nq is not None and nq > bq:
+                flags.append(f"consultas {bq} -> {nq}")
+            rows.append({
+                "scenario": scenario, "endpoint": label,
+                "p95_base": b["p95_ms"], "p95_new": n["p95_ms"],
+                "rps_base": b["rps"], "rps_new": n["rps"],
+                "q_base": bq, "q_new": nq, "flags": flags,
+            })
+            regressions += [f"{scenario} {label}: {f}" for f in flags]
+    return rows, regressions
+
+
+def _delta(a: float, b: float) -> str:
+    return f"{(b - a) / a * 100:+.0f}%" if a else "n/a"
+
+
+def print_table(rows: List[dict]) -> None:
+    print(f"{'escenario':<15} {'endpoint':<26} {'p95 base':>9} {'p95 new':>9} {'Δ':>6} "
+          f"{'rps base':>9} {'rps new':>9} {'q base':>7} {'q new':>7}")
+    for r in rows:
+        mark = "  ✘" if r["flags"] else ""
+        print(f"{r['scenario']:<15} {r['endpoint']:<26} {r['p95_base']:>9} {r['p95_new']:>9} "
+              f"{_delta(r['p95_base'], r['p95_new']):>6} {r['rps_base']:>9} {r['rps_new']:>9} "
+              f"{str(r['q_base']):>7} {str(r['q_new']):>7}{mark}")
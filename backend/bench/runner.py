@@ -0,0 +1,155 @@
+# backend/bench/runner.py
+"""Servidor bajo prueba, usuarios virtuales y métricas por endpoint."""
+from __future__ import annotations
+
+import asyncio
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+# =========================
+# Métricas
+# =========================
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentil por rango más cercano (p en 0..100) de una lista ordenada."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(p / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+@dataclass
+class EndpointStats:
+    latencies: List[float] = field(default_factory=list)   # ms
+    queries: List[int] = field(default_factory=list)
+    errors: int = 0
+
+    def summary(self, elapsed: float) -> dict:
+        lat = sorted(self.latencies)
+        n = len(lat)
+        queries = sorted(self.queries)
+        return {
+            "requests": n,
+            "errors": self.errors,
+            "rps": round(n / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(lat, 50), 2),
+            "p95_ms": round(percentile(lat, 95), 2),
+            "p99_ms": round(percentile(lat, 99), 2),
+            "max_ms": round(lat[-1], 2) if lat else 0.0,
+            "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+            # la mediana no depende de cachés calientes/frías (p. ej. el primer request
+            # de cada usuario carga su principal): es la que se compara en CI
+            "queries_p50": percentile(queries, 50) if queries else None,
+        }
+
+
+class Recorder:
+    """Envuelve un httpx.AsyncClient: cada request queda medido bajo su etiqueta."""
+
+    def __init__(self, client: httpx.AsyncClient) -> None:
+        self.client = client
+        self.endpoints: Dict[str, EndpointStats] = {}
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        stats = self.endpoints.setdefault(label, EndpointStats())
+        t0 = time.perf_counter()
+        try:
+            r = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            stats.errors += 1
+            return None
+        stats.latencies.append((time.perf_counter() - t0) * 1000)
+        if r.status_code >= 400:
+            stats.errors += 1
+        count = r.headers.get("x-query-count")
+        if count is not None:
+            stats.queries.append(int(count))
+        return r
+
+    def results(self, elapsed: float) -> dict:
+        return {label: s.summary(elapsed) for label, s in sorted(self.endpoints.items())}
+
+
+VirtualUser = Callable[[Recorder, int], Awaitable[None]]
+
+
+async def run_users(recorder: Recorder, users: int, duration: float, step: VirtualUser) -> float:
+    """
+    `users` usuarios virtuales en lazo cerrado (cada uno manda su siguiente
+    request al recibir la respuesta) durante `duration` seg.
+    `step(recorder, vu)` es una iteración del usuario `vu`.
+    """
+    deadline = time.perf_counter() + duration
+
+    async def loop(vu: int) -> None:
+        while time.perf_counter() < deadline:
+            await step(recorder, vu)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(loop(vu) for vu in range(users)))
+    return time.perf_counter() - t0
+
+
+# =========================
+# Servidor bajo prueba
+# =========================
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class Server:
+    """uvicorn con bench.app:app en un subproceso (mismo entorno + `env`)."""
+
+    def __init__(self, env: Dict[str, str], workers: int = 1) -> None:
+        self.port = free_port()
+        self.env = {**os.environ, **env}
+        self.workers = workers
+        self.proc: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "Server":
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "bench.app:app", "--port", str(self.port),
+             "--workers", str(self.workers), "--log-level", "warning"],
+            cwd=BACKEND_DIR, env=self.env,
+            start_new_session=True,   # grupo propio: al salir caen también los pools de procesos
+        )
+        for _ in range(300):
+            if self.proc.poll() is not None:
+                raise RuntimeError("el servidor del benchmark terminó al arrancar")
+            try:
+                httpx.get(self.url + "/", timeout=0.2)
+                return self
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        raise RuntimeError("el servidor del benchmark no respondió en 30 s")
+
+    def __exit__(self, *exc) -> None:
+        if self.proc is None:
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+        try:
+            os.killpg(self.proc.pid, signal.SIGKILL)   # workers de hasher/imágenes que quedaron
+        except ProcessLookupError:
+            pass
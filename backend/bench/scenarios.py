@@ -0,0 +1,125 @@
+# backend/bench/scenarios.py
+"""
+Escenarios: cada uno es una iteración de usuario virtual (`step`) que la
+corre run_users en lazo cerrado. Las etiquetas son "MÉTODO /ruta/{param}"
+para que los resultados agrupen por endpoint y no por URL.
+"""
+from __future__ import annotations
+
+import io
+import os
+import random
+from dataclasses import dataclass
+from typing import Callable, Dict
+
+from PIL import Image
+
+from app.core.security import create_access_token
+
+from .runner import Recorder, VirtualUser
+from .seed import ADJECTIVES, ITEMS, PASSWORD, Dataset, email
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    make_step: Callable[[Dataset], VirtualUser]
+
+
+def _auth(user_id: int) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+def _user_for(vu: int, ds: Dataset) -> int:
+    return vu % ds.users + 1
+
+
+# ---------- login ----------
+def login_burst(ds: Dataset) -> VirtualUser:
+    rng = random.Random(ds.seed)
+
+    async def step(rec: Recorder, vu: int) -> None:
+        u = rng.randint(1, ds.users)
+        await rec.request("POST /auth/login", "POST", "/auth/login",
+                          data={"username": email(u), "password": PASSWORD})
+    return step
+
+
+# ---------- navegar / buscar ----------
+def browse_search(ds: Dataset) -> VirtualUser:
+    rng = random.Random(ds.seed)
+    cursors: Dict[int, str] = {}
+
+    async def step(rec: Recorder, vu: int) -> None:
+        roll = rng.random()
+        if roll < 0.35:
+            r = await rec.request("GET /", "GET", "/", params={"limit": 20})
+            if r is not None and r.headers.get("x-next-cursor"):
+                cursors[vu] = r.headers["x-next-cursor"]
+        elif roll < 0.55 and vu in cursors:
+            r = await rec.request("GET /?cursor", "GET", "/", params={"limit": 20, "cursor": cursors[vu]})
+            nxt = r.headers.get("x-next-cursor") if r is not None else None
+            if nxt:
+                cursors[vu] = nxt
+            else:
+                cursors.pop(vu, None)
+        elif roll < 0.75:
+            q = f"{rng.choice(ITEMS)} {rng.choice(ADJECTIVES)}" if rng.random() < 0.3 else rng.choice(ITEMS)
+            await rec.request("GET /?q", "GET", "/", params={"limit": 20, "q": q})
+        elif roll < 0.95:
+            await rec.request("GET /{id}", "GET", f"/{rng.randint(1, ds.products)}")
+        else:
+            await rec.request("GET /{id}/similar", "GET", f"/{rng.randint(1, ds.products)}/similar")
+    return step
+
+
+# ---------- publicar con imágenes ----------
+def _jpeg() -> bytes:
+    buf = io.BytesIO()
+    Image.new("RGB", (800, 600), (40, 110, 190)).save(buf, "JPEG")
+    return buf.getvalue()
+
+
+def create_listing(ds: Dataset, images: int = 3, size_kb: int = 256) -> VirtualUser:
+    rng = random.Random(ds.seed)
+    base = _jpeg()
+
+    async def step(rec: Recorder, vu: int) -> None:
+        # bytes después del EOI: JPEG válido con hash distinto (sin deduplicación)
+        files = [("images", (f"{i}.jpg", base + os.urandom(max(size_kb * 1024 - len(base), 0)), "image/jpeg"))
+                 for i in range(images)]
+        await rec.request(
+            "POST / (multipart)", "POST", "/",
+            data={"title": f"{rng.choice(ITEMS)} {rng.choice(ADJECTIVES)}", "description": "publicado por el benchmark"},
+            files=files, headers=_auth(_user_for(vu, ds)),
+        )
+    return step
+
+
+# ---------- bandeja de chats ----------
+def inbox_storm(ds: Dataset) -> VirtualUser:
+    rng = random.Random(ds.seed)
+
+    async def step(rec: Recorder, vu: int) -> None:
+        headers = _auth(_user_for(vu, ds))
+        r = await rec.request("GET /chats", "GET", "/chats", params={"limit": 20}, headers=headers)
+        await rec.request("GET /chats/unread", "GET", "/chats/unread", headers=headers)
+        convs = r.json() if r is not None and r.status_code == 200 else []
+        if not convs:
+            return
+        conv = rng.choice(convs)["id"]
+        await rec.request("GET /chats/{id}/messages", "GET", f"/chats/{conv}/messages",
+                          params={"limit": 50}, headers=headers)
+        if rng.random() < 0.25:
+            await rec.request("POST /chats/{id}/messages", "POST", f"/chats/{conv}/messages",
+                              json={"body": "¿sigue disponible?"}, headers=headers)
+    return step
+
+
+SCENARIOS: Dict[str, Scenario] = {s.name: s for s in (
+    Scenario("login_burst", "ráfaga de POST /auth/login (bcrypt en el pool de procesos)", login_burst),
+    Scenario("browse_search", "listado, páginas por cursor, búsqueda, detalle y similares", browse_search),
+    Scenario("create_listing", "POST / multipart con 3 imágenes de 256 KB", create_listing),
+    Scenario("inbox_storm", "polling de bandeja + no leídos + mensajes, con envíos", inbox_storm),
+)}
@@ -0,0 +1,101 @@
+# backend/bench/seed.py
+"""Esquema y datos del benchmark (BD vacía: temporal en SQLite o desechable en Postgres)."""
+from __future__ import annotations
+
+import random
+import subprocess
+import sys
+from dataclasses import dataclass
+
+from sqlalchemy import insert
+
+import app.models.campus
+import app.models.media
+import app.models.swipe
+from app.core.db import Base, SessionLocal, engine
+from app.core.hasher import crypt_context
+from app.core.search import ensure_search_schema, rebuild_index
+from app.core.settings import BCRYPT_ROUNDS
+from app.crud.chat import recount_conversations
+from app.models.chat import Conversation, Message
+from app.models.product import Product, ProductImage
+from app.models.user import User
+
+from .runner import BACKEND_DIR
+
+PASSWORD = "bench-password-123"
+EMAIL_DOMAIN = "alumnos.udg.mx"
+
+ITEMS = (
+    "cámara libro mochila laptop cargador audífonos bicicleta calculadora bata guitarra "
+    "teclado mouse monitor silla lámpara cuaderno maqueta regla escuadra tableta "
+    "impresora microscopio balón patineta sudadera tenis termo celular bocina"
+).split()
+ADJECTIVES = "nuevo usado seminuevo barato original grande pequeño negro azul rojo".split()
+
+
+@dataclass
+class Dataset:
+    users: int = 200
+    products: int = 2000
+    images_per_product: int = 2
+    conversations_per_user: int = 4
+    messages_per_conversation: int = 30
+    seed: int = 42
+
+
+def email(user_id: int) -> str:
+    return f"bench{user_id}@{EMAIL_DOMAIN}"
+
+
+def create_schema() -> None:
+    if engine.dialect.name == "postgresql":
+        # tsvector, índices parciales, etc. vienen de las migraciones
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, check=True)
+    else:
+        Base.metadata.create_all(engine)
+        ensure_search_schema(engine)
+
+
+def seed(ds: Dataset) -> None:
+    """Usuarios con la misma contraseña, productos con imágenes y chats con mensajes."""
+    if ds.products < ds.users:
+        raise ValueError("products debe ser >= users (cada usuario publica al menos uno)")
+    rng = random.Random(ds.seed)
+    hashed = crypt_context(BCRYPT_ROUNDS).hash(PASSWORD)   # uno solo: bcrypt es caro
+    with SessionLocal() as db:
+        db.execute(insert(User), [
+            {"id": u, "username": f"bench{u}", "email": email(u), "hashed_password": hashed}
+            for u in range(1, ds.users + 1)
+        ])
+        # el producto p es del usuario (p - 1) % users + 1
+        db.execute(insert(Product), [
+            {"id": p, "owner_id": (p - 1) % ds.users + 1,
+             "title": f"{rng.choice(ITEMS)} {rng.choice(ADJECTIVES)}",
+             "description": " ".join(rng.choices(ITEMS + ADJECTIVES, k=12))}
+            for p in range(1, ds.products + 1)
+        ])
+        db.execute(insert(ProductImage), [
+            {"product_id": p, "url": f"/static/blobs/00/bench-{p}-{k}.jpg"}
+            for p in range(1, ds.products + 1) for k in range(ds.images_per_product)
+        ])
+        # conversación (u, u + k) sobre el primer producto del otro usuario
+        convs, cid = [], 0
+        for u in range(1, ds.users + 1):
+            for k in range(1, ds.conversations_per_user + 1):
+                other = (u + k - 1) % ds.users + 1
+                if other <= u:
+                    continue
+                cid += 1
+                convs.append({"id": cid, "user1_id": u, "user2_id": other, "product_id": other})
+        if convs:
+            db.execute(insert(Conversation), convs)
+        messages = [
+            {"conversation_id": c["id"], "sender_id": c["user1_id"] if i % 2 else c["user2_id"], "body": f"mensaje {i}"}
+            for c in convs for i in range(ds.messages_per_conversation)
+        ]
+        for start in range(0, len(messages), 10_000):
+            db.execute(insert(Message), messages[start:start + 10_000])
+        recount_conversations(db)
+        rebuild_index(db)
+        db.commit()
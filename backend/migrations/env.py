@@ -36,6 +36,8 @@ from app.core.db import Base
 import app.models.campus   # __tablename__ = "campus"
 import app.models.user     # __tablename__ = "users"
 import app.models.product  # FK a users
+import app.models.media    # __tablename__ = "media_blobs"
+import app.models.swipe    # __tablename__ = "swipes"
 
 # (Opcional) autoload de todos los submódulos por si tienes más modelos
 def _import_submodules(package_name: str) -> None:
@@ -55,6 +57,14 @@ def _import_submodules(package_name: str) -> None:
 # --- 5) target_metadata UNA sola vez
 target_metadata = Base.metadata
 
+# Objetos que mantiene app/core/search.py fuera del ORM (autogenerate no debe borrarlos)
+SEARCH_OBJECTS = {"search_vector", "ix_products_search_vector", "products_fts"}
+
+def include_object(obj, name, type_, reflected, compare_to):
+    if reflected and compare_to is None and (name in SEARCH_OBJECTS or str(name).startswith("products_fts_")):
+        return False
+    return True
+
 # --- 6) Inyecta URL real
 if APP_DATABASE_URL:
     config.set_main_option("sqlalchemy.url", APP_DATABASE_URL)
@@ -69,6 +79,7 @@ def run_migrations_offline() -> None:
         dialect_opts={"paramstyle": "named"},
         compare_type=True,
         compare_server_default=True,
+        include_object=include_object,
     )
     with context.begin_transaction():
         context.run_migrations()
@@ -86,6 +97,7 @@ def run_migrations_online() -> None:
             target_metadata=target_metadata,
             compare_type=True,
             compare_server_default=True,
+            include_object=include_object,
         )
         with context.begin_transaction():
             context.run_migrations()
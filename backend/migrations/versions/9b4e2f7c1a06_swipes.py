@@ -0,0 +1,47 @@
+"""swipes (likes/pasar por producto, detección de match)
+
+Revision ID: 9b4e2f7c1a06
+Revises: f3d0a8c51e92
+Create Date: 2025-11-27 10:15:42.518236
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e2f7c1a06'
+down_revision: Union[str, Sequence[str], None] = 'f3d0a8c51e92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'swipes',
+        sa.Column('swiper_id', sa.Integer(), nullable=False),
+        sa.Column('product_id', sa.Integer(), nullable=False),
+        sa.Column('owner_id', sa.Integer(), nullable=False),
+        sa.Column('liked', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['swiper_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['owner_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('swiper_id', 'product_id'),
+    )
+    # parcial: solo los likes participan en la detección de match
+    op.create_index(
+        'ix_swipes_owner_swiper', 'swipes', ['owner_id', 'swiper_id'],
+        unique=False, postgresql_where=sa.text('liked IS true'),
+    )
+    op.create_index('ix_swipes_product', 'swipes', ['product_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_swipes_product', table_name='swipes')
+    op.drop_index('ix_swipes_owner_swiper', table_name='swipes')
+    op.drop_table('swipes')
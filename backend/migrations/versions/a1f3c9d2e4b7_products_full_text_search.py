@@ -0,0 +1,76 @@
+"""products full text search
+
+Revision ID: a1f3c9d2e4b7
+Revises: 7834159595b6
+Create Date: 2025-11-03 18:42:10.512337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1f3c9d2e4b7'
+down_revision: Union[str, Sequence[str], None] = '7834159595b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PG_VECTOR = (
+    "setweight(to_tsvector('es_unaccent', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('es_unaccent', coalesce(description, '')), 'B')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+        op.execute(
+            """
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'es_unaccent') THEN
+                    CREATE TEXT SEARCH CONFIGURATION es_unaccent (COPY = spanish);
+                    ALTER TEXT SEARCH CONFIGURATION es_unaccent
+                        ALTER MAPPING FOR hword, hword_part, word WITH unaccent, spanish_stem;
+                END IF;
+            END
+            $$;
+            """
+        )
+        op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        op.execute(f"UPDATE products SET search_vector = {PG_VECTOR}")
+        op.create_index(
+            'ix_products_search_vector', 'products', ['search_vector'],
+            unique=False, postgresql_using='gin',
+        )
+
+    elif dialect == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS products_fts "
+            "USING fts5(title, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        op.execute("DELETE FROM products_fts")
+        op.execute(
+            "INSERT INTO products_fts (rowid, title, description) "
+            "SELECT id, title, description FROM products"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+
+    if dialect == "postgresql":
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_using='gin')
+        op.drop_column('products', 'search_vector')
+        op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS es_unaccent")
+
+    elif dialect == "sqlite":
+        op.execute("DROP TABLE IF EXISTS products_fts")
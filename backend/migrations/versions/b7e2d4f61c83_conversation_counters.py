@@ -0,0 +1,67 @@
+"""conversation last message + unread counters
+
+Revision ID: b7e2d4f61c83
+Revises: a1f3c9d2e4b7
+Create Date: 2025-11-10 21:05:37.904412
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d4f61c83'
+down_revision: Union[str, Sequence[str], None] = 'a1f3c9d2e4b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('last_message_id', sa.Integer(), nullable=True))
+    op.add_column('conversations', sa.Column('last_message_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('conversations', sa.Column('unread_count_user1', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('conversations', sa.Column('unread_count_user2', sa.Integer(), server_default='0', nullable=False))
+    op.create_foreign_key(
+        'conversations_last_message_id_fkey', 'conversations', 'messages',
+        ['last_message_id'], ['id'], ondelete='SET NULL',
+    )
+
+    # Backfill desde messages (mismo cálculo que crud/chat.recount_conversations)
+    op.execute(
+        """
+        UPDATE conversations SET
+            last_message_id = (
+                SELECT max(m.id) FROM messages m
+                WHERE m.conversation_id = conversations.id AND m.is_deleted_by_sender = false
+            ),
+            unread_count_user1 = (
+                SELECT count(m.id) FROM messages m
+                WHERE m.conversation_id = conversations.id AND m.is_deleted_by_sender = false
+                  AND m.sender_id <> conversations.user1_id AND m.read_at IS NULL
+            ),
+            unread_count_user2 = (
+                SELECT count(m.id) FROM messages m
+                WHERE m.conversation_id = conversations.id AND m.is_deleted_by_sender = false
+                  AND m.sender_id <> conversations.user2_id AND m.read_at IS NULL
+            )
+        """
+    )
+    op.execute(
+        """
+        UPDATE conversations SET last_message_at = (
+            SELECT m.created_at FROM messages m WHERE m.id = conversations.last_message_id
+        )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_constraint('conversations_last_message_id_fkey', 'conversations', type_='foreignkey')
+    op.drop_column('conversations', 'unread_count_user2')
+    op.drop_column('conversations', 'unread_count_user1')
+    op.drop_column('conversations', 'last_message_at')
+    op.drop_column('conversations', 'last_message_id')
@@ -0,0 +1,78 @@
+"""conversation read watermarks
+
+Revision ID: c4a8e1b93d05
+Revises: b7e2d4f61c83
+Create Date: 2025-11-14 19:27:51.230918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a8e1b93d05'
+down_revision: Union[str, Sequence[str], None] = 'b7e2d4f61c83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('conversations', sa.Column('last_read_message_id_user1', sa.Integer(), nullable=True))
+    op.add_column('conversations', sa.Column('last_read_message_id_user2', sa.Integer(), nullable=True))
+
+    # Backfill: watermark = último mensaje del otro participante ya marcado con read_at
+    op.execute(
+        """
+        UPDATE conversations SET
+            last_read_message_id_user1 = (
+                SELECT max(m.id) FROM messages m
+                WHERE m.conversation_id = conversations.id
+                  AND m.sender_id <> conversations.user1_id AND m.read_at IS NOT NULL
+            ),
+            last_read_message_id_user2 = (
+                SELECT max(m.id) FROM messages m
+                WHERE m.conversation_id = conversations.id
+                  AND m.sender_id <> conversations.user2_id AND m.read_at IS NOT NULL
+            )
+        """
+    )
+    # Contadores ahora se derivan del watermark
+    op.execute(
+        """
+        UPDATE conversations SET
+            unread_count_user1 = (
+                SELECT count(m.id) FROM messages m
+                WHERE m.conversation_id = conversations.id AND m.is_deleted_by_sender = false
+                  AND m.sender_id <> conversations.user1_id
+                  AND m.id > coalesce(conversations.last_read_message_id_user1, 0)
+            ),
+            unread_count_user2 = (
+                SELECT count(m.id) FROM messages m
+                WHERE m.conversation_id = conversations.id AND m.is_deleted_by_sender = false
+                  AND m.sender_id <> conversations.user2_id
+                  AND m.id > coalesce(conversations.last_read_message_id_user2, 0)
+            )
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Devuelve la lectura a messages.read_at antes de quitar los watermarks
+    op.execute(
+        """
+        UPDATE messages SET read_at = created_at
+        WHERE read_at IS NULL AND EXISTS (
+            SELECT 1 FROM conversations c
+            WHERE c.id = messages.conversation_id AND (
+                (messages.sender_id = c.user2_id AND messages.id <= coalesce(c.last_read_message_id_user1, 0))
+                OR (messages.sender_id = c.user1_id AND messages.id <= coalesce(c.last_read_message_id_user2, 0))
+            )
+        )
+        """
+    )
+    op.drop_column('conversations', 'last_read_message_id_user2')
+    op.drop_column('conversations', 'last_read_message_id_user1')
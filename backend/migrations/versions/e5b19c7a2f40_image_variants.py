@@ -0,0 +1,36 @@
+"""image variants (webp thumb/card/full)
+
+Revision ID: e5b19c7a2f40
+Revises: c4a8e1b93d05
+Create Date: 2025-11-18 17:05:12.448301
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5b19c7a2f40'
+down_revision: Union[str, Sequence[str], None] = 'c4a8e1b93d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('product_images', sa.Column('thumb_url', sa.String(length=300), nullable=True))
+    op.add_column('product_images', sa.Column('card_url', sa.String(length=300), nullable=True))
+    op.add_column('product_images', sa.Column('full_url', sa.String(length=300), nullable=True))
+    op.add_column('users', sa.Column('avatar_thumb_url', sa.String(length=255), nullable=True))
+    op.add_column('users', sa.Column('avatar_card_url', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('users', 'avatar_card_url')
+    op.drop_column('users', 'avatar_thumb_url')
+    op.drop_column('product_images', 'full_url')
+    op.drop_column('product_images', 'card_url')
+    op.drop_column('product_images', 'thumb_url')
@@ -0,0 +1,41 @@
+"""media blobs (content-addressed image store)
+
+Revision ID: f3d0a8c51e92
+Revises: e5b19c7a2f40
+Create Date: 2025-11-20 11:48:37.902114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3d0a8c51e92'
+down_revision: Union[str, Sequence[str], None] = 'e5b19c7a2f40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'media_blobs',
+        sa.Column('sha256', sa.String(length=64), nullable=False),
+        sa.Column('ext', sa.String(length=8), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('refcount', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.Column('released_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('sha256'),
+    )
+    op.create_index(op.f('ix_media_blobs_released_at'), 'media_blobs', ['released_at'], unique=False)
+    # Las imágenes ya subidas (uuid en media/products y static/uploads) no se
+    # migran: siguen sirviéndose desde su ruta y se borran como antes.
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_media_blobs_released_at'), table_name='media_blobs')
+    op.drop_table('media_blobs')
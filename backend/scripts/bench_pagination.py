@@ -0,0 +1,73 @@
+# scripts/bench_pagination.py
+# Compara el costo de la página 1 vs la página 1,000 de GET / (productos)
+# con offset (viejo) y con cursor keyset (X-Next-Cursor).
+#
+#   python scripts/bench_pagination.py            # SQLite temporal, 100k productos
+#   python scripts/bench_pagination.py --rows 500000 --limit 50
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # permite importar app/
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--rows", type=int, default=100_000)
+parser.add_argument("--limit", type=int, default=50)
+parser.add_argument("--page", type=int, default=1000)
+parser.add_argument("--repeat", type=int, default=20)
+args = parser.parse_args()
+
+# La app lee DATABASE_URL al importarse: BD temporal antes de importar app.*
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_pagination.db'}"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+import app.models.campus
+import app.models.chat
+from app.core.db import Base, SessionLocal, engine
+from app.main import app as fastapi_app
+from app.models.product import Product
+from app.models.user import User
+from app.utils.pagination import encode_cursor
+
+if args.rows < args.page * args.limit:
+    sys.exit(f"--rows debe ser >= page * limit ({args.page * args.limit})")
+
+Base.metadata.create_all(engine)
+db = SessionLocal()
+db.add(User(id=1, username="bench", email="bench@alumnos.udg.mx", hashed_password="x"))
+db.flush()
+for start in range(0, args.rows, 10_000):
+    db.execute(insert(Product), [
+        {"title": f"producto {i}", "description": "descripción de prueba", "owner_id": 1, "is_active": True}
+        for i in range(start, min(start + 10_000, args.rows))
+    ])
+db.commit()
+db.close()
+
+client = TestClient(fastapi_app)
+
+
+def bench(params: dict) -> float:
+    times = []
+    for _ in range(args.repeat):
+        t0 = time.perf_counter()
+        r = client.get("/", params=params)
+        times.append((time.perf_counter() - t0) * 1000)
+        assert r.status_code == 200 and len(r.json()) == args.limit, r.text
+    return statistics.median(times)
+
+
+deep_offset = (args.page - 1) * args.limit
+# el cursor de la página N es el último id de la página N-1 (ids 1..rows, orden DESC)
+deep_cursor = encode_cursor({"id": args.rows - deep_offset + 1})
+
+print(f"{args.rows} productos, limit={args.limit}, mediana de {args.repeat} requests")
+print(f"offset  página 1:     {bench({'limit': args.limit}):8.2f} ms")
+print(f"offset  página {args.page}:  {bench({'limit': args.limit, 'offset': deep_offset}):8.2f} ms")
+print(f"cursor  página 1:     {bench({'limit': args.limit}):8.2f} ms")
+print(f"cursor  página {args.page}:  {bench({'limit': args.limit, 'cursor': deep_cursor}):8.2f} ms")
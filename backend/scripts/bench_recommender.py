@@ -0,0 +1,121 @@
+# scripts/bench_recommender.py
+# Latencia del recomendador TF-IDF con N publicaciones sintéticas (textos en
+# español: objetos de campus + palabras con frecuencia tipo Zipf): tiempo de build,
+# de abrir el índice (mmap) y p50/p99 de `similar` y `recommend`, con y sin
+# delta incremental.
+#
+#   python scripts/bench_recommender.py
+#   python scripts/bench_recommender.py --products 100000 --queries 2000 --delta 2000
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # permite importar app/
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--products", type=int, default=100_000)
+parser.add_argument("--queries", type=int, default=1000)
+parser.add_argument("--delta", type=int, default=1000, help="publicaciones creadas/editadas tras el build")
+parser.add_argument("--k", type=int, default=20)
+parser.add_argument("--vocabulary", type=int, default=20_000, help="palabras distintas en las descripciones")
+args = parser.parse_args()
+
+TMP = Path(tempfile.mkdtemp())
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{TMP / 'bench_recommender.db'}")
+
+from sqlalchemy import insert
+
+import app.models.campus
+import app.models.user
+from app.core.db import Base, SessionLocal, engine
+from app.core.recommender import Recommender, build_index
+from app.models.product import Product
+from app.models.user import User
+
+OBJETOS = ["calculadora", "libro", "laptop", "audífonos", "mochila", "bicicleta", "cámara", "teclado",
+           "mouse", "monitor", "bata", "tenis", "sudadera", "lámpara", "silla", "escritorio", "guitarra",
+           "cargador", "celular", "tablet", "bocina", "reloj", "lentes", "patineta", "cuaderno"]
+ATRIBUTOS = ["nuevo", "usado", "científica", "gamer", "inalámbrico", "negro", "azul", "grande",
+             "pequeño", "barato", "original", "económico", "resistente", "ligero", "vintage"]
+MATERIAS = ["cálculo", "física", "química", "programación", "anatomía", "derecho", "contabilidad",
+            "biología", "dibujo", "estadística", "electrónica", "economía"]
+SILABAS = ["ca", "lo", "ma", "re", "ti", "por", "den", "sa", "mi", "tra", "ne", "vo", "gu", "le", "ra", "bi"]
+
+
+def vocabulary(rng: random.Random, size: int):
+    # palabras inventadas con frecuencias tipo Zipf (como el lenguaje real):
+    # pocas muy comunes y una cola larga de términos raros
+    words = sorted({"".join(rng.choices(SILABAS, k=rng.randint(2, 4))) for _ in range(size * 2)})[:size]
+    rng.shuffle(words)
+    weights = [1 / (rank + 1) for rank in range(len(words))]
+    return words, weights
+
+
+def fake(rng: random.Random, vocab):
+    words, weights = vocab
+    obj = rng.choice(OBJETOS)
+    title = f"{obj} {rng.choice(ATRIBUTOS)} {rng.choice(MATERIAS)}"
+    body = rng.choices(words, weights, k=rng.randint(8, 40))
+    return title, f"{obj} {' '.join(body)} {rng.choice(ATRIBUTOS)}"
+
+
+def seed(rng: random.Random, vocab) -> None:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        db.execute(insert(User), [{"id": 1, "username": "bench", "email": "bench@alumnos.udg.mx", "hashed_password": "x"}])
+        batch = []
+        for i in range(1, args.products + 1):
+            title, description = fake(rng, vocab)
+            batch.append({"id": i, "title": title, "description": description, "owner_id": 1})
+            if len(batch) == 5000:
+                db.execute(insert(Product), batch)
+                batch.clear()
+        if batch:
+            db.execute(insert(Product), batch)
+        db.commit()
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+def measure(label, fn):
+    times = []
+    for _ in range(args.queries):
+        t0 = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - t0) * 1000)
+    print(f"{label:<34}{statistics.median(times):>9.2f}{pct(times, 0.99):>9.2f}")
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    vocab = vocabulary(rng, args.vocabulary)
+    seed(rng, vocab)
+    directory = TMP / "index"
+
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        build_index(db, directory)
+    print(f"build: {args.products} productos en {time.perf_counter() - t0:.1f} s")
+
+    rec = Recommender(directory, rebuild_interval=0)
+    t0 = time.perf_counter()
+    rec.load()
+    print(f"apertura (mmap): {(time.perf_counter() - t0) * 1000:.1f} ms, {len(rec._index.terms)} términos")
+
+    ids = lambda: rng.randint(1, args.products)
+    print(f"{'consulta (k=' + str(args.k) + ')':<34}{'p50 ms':>9}{'p99 ms':>9}")
+    measure("similar", lambda: rec.similar(ids(), args.k))
+    measure("recommend (10 semillas)", lambda: rec.recommend([(ids(), "", "") for _ in range(10)], args.k))
+
+    for i in range(args.delta):
+        pid = args.products + i + 1 if i % 2 else ids()   # mitad nuevas, mitad editadas
+        rec.update(pid, *fake(rng, vocab))
+    measure(f"similar (+{args.delta} en delta)", lambda: rec.similar(ids(), args.k))
+    print("✔ Listo.")
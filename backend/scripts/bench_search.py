@@ -0,0 +1,124 @@
+# scripts/bench_search.py
+# Compara la búsqueda ILIKE '%q%' (lineal) contra el índice de texto completo.
+#
+#   python scripts/bench_search.py                      # SQLite temporal, 100k productos
+#   python scripts/bench_search.py --rows 200000
+#   python scripts/bench_search.py --url postgresql://... --no-seed   # BD ya migrada y poblada
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # permite importar app/
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+import app.models.campus
+import app.models.user
+from app.core.db import Base
+from app.core.search import apply_search, ensure_search_schema, rebuild_index
+from app.models.product import Product
+from app.models.user import User
+
+ITEMS = (
+    "cámara libro mochila laptop cargador audífonos bicicleta calculadora bata guitarra "
+    "teclado mouse monitor silla lámpara cuaderno maqueta regla escuadra compás tableta "
+    "impresora microscopio balón patineta sudadera tenis termo celular bocina"
+).split()
+ADJS = "usado nuevo original negro azul rojo grande pequeño barato científica buen estado".split()
+RARE = "metrónomo osciloscopio astrolabio".split()  # ~1 de cada 5,000 productos
+SYLLABLES = "ma pe ri to lu ca se no vi da fe go ja ke mo pu ra si te zu".split()
+# Consultas comunes (~3% de filas), raras y sin resultados
+QUERIES = ["camara", "cálculo", "guitarra azul", "laptop", "bata científica", "metronomo", "osciloscopio", "xilofono"]
+
+
+def _filler(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def _product(rng: random.Random, vocab: list) -> dict:
+    title = f"{rng.choice(ITEMS)} {rng.choice(ADJS)} {rng.choice(vocab)}"
+    words = [rng.choice(vocab) for _ in range(25)]
+    if rng.random() < 0.0002 * len(RARE):
+        words[rng.randrange(25)] = rng.choice(RARE)
+    if rng.random() < 0.03:
+        words[rng.randrange(25)] = "cálculo"
+    return {"title": title, "description": " ".join(words), "owner_id": 1, "is_active": True}
+
+
+def seed(Session, rows: int) -> None:
+    rng = random.Random(42)
+    vocab = sorted({_filler(rng) for _ in range(5000)})
+    db = Session()
+    try:
+        db.add(User(id=1, username="bench", email="bench@alumnos.udg.mx", hashed_password="x"))
+        db.flush()
+        batch = 10_000
+        for start in range(0, rows, batch):
+            db.execute(insert(Product), [_product(rng, vocab) for _ in range(start, min(start + batch, rows))])
+        rebuild_index(db)
+        db.commit()
+    finally:
+        db.close()
+
+
+def _timed(fn, repeat: int) -> list:
+    out = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        out.append((time.perf_counter() - t0) * 1000)
+    return out
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="DATABASE_URL (por defecto SQLite temporal)")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--no-seed", action="store_true")
+    args = parser.parse_args()
+
+    url = args.url or f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_search.db'}"
+    engine = create_engine(url)
+    Session = sessionmaker(bind=engine)
+    if not args.no_seed:
+        Base.metadata.create_all(engine)
+        ensure_search_schema(engine)
+        t0 = time.perf_counter()
+        seed(Session, args.rows)
+        print(f"seed: {args.rows} productos en {time.perf_counter() - t0:.1f}s ({url})")
+
+    db = Session()
+    try:
+        base = lambda: db.query(Product).filter(Product.is_active.is_(True))
+
+        def ilike(q):
+            like = f"%{q}%"
+            return (
+                base().filter((Product.title.ilike(like)) | (Product.description.ilike(like)))
+                .order_by(Product.id.desc()).limit(args.limit).all()
+            )
+
+        def fts(q):
+            return apply_search(db, base(), q).limit(args.limit).all()
+
+        p95 = lambda xs: statistics.quantiles(xs, n=20)[-1]
+        print(f"{'query':<16}{'ilike hits':>11}{'ilike p50':>12}{'ilike p95':>12}{'fts hits':>10}{'fts p50':>12}{'fts p95':>12}")
+        for q in QUERIES:
+            a = _timed(lambda: ilike(q), args.repeat)
+            b = _timed(lambda: fts(q), args.repeat)
+            print(
+                f"{q:<16}{len(ilike(q)):>11}{statistics.median(a):>10.2f}ms{p95(a):>10.2f}ms"
+                f"{len(fts(q)):>10}{statistics.median(b):>10.2f}ms{p95(b):>10.2f}ms"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
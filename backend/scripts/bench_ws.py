@@ -0,0 +1,134 @@
+# scripts/bench_ws.py
+# Prueba de carga del chat en tiempo real: abre miles de WebSockets inactivos
+# contra un uvicorn real y mide la latencia POST /chats/{id}/messages → socket.
+#
+#   python scripts/bench_ws.py                        # 2,000 sockets, 200 mensajes
+#   python scripts/bench_ws.py --sockets 5000 --messages 500
+#   CHAT_BROKER_URL=redis://localhost:6379/0 python scripts/bench_ws.py   # vía Redis
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))  # permite importar app/
+
+parser = argparse.ArgumentParser()
+parser.add_argument("--sockets", type=int, default=2000)
+parser.add_argument("--messages", type=int, default=200)
+parser.add_argument("--concurrency", type=int, default=200, help="conexiones abiertas en paralelo")
+args = parser.parse_args()
+
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(tempfile.mkdtemp()) / 'bench_ws.db'}"
+
+import httpx
+from sqlalchemy import insert
+from websockets.asyncio.client import connect
+
+import app.models.campus
+import app.models.product
+from app.core.db import Base, SessionLocal, engine
+from app.core.security import create_access_token
+from app.models.chat import Conversation
+from app.models.user import User
+
+# miles de sockets del lado cliente + servidor en la misma máquina
+soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.sockets * 3)), hard))
+
+SENDER_ID = 1
+RECIPIENTS = range(2, args.sockets + 2)
+
+
+def seed() -> None:
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    db.execute(insert(User), [
+        {"id": i, "username": f"u{i}", "email": f"u{i}@alumnos.udg.mx", "hashed_password": "x"}
+        for i in range(1, args.sockets + 2)
+    ])
+    db.execute(insert(Conversation), [{"id": i, "user1_id": SENDER_ID, "user2_id": i} for i in RECIPIENTS])
+    db.commit()
+    db.close()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _rss_mb(pid: int) -> float:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+async def main(port: int, server_pid: int) -> None:
+    base = f"127.0.0.1:{port}"
+    inbox = {uid: asyncio.Queue() for uid in RECIPIENTS}
+    sockets = []
+    sem = asyncio.Semaphore(args.concurrency)
+
+    async def open_socket(uid: int) -> None:
+        async with sem:
+            ws = await connect(f"ws://{base}/chats/ws?token={create_access_token({'sub': str(uid)})}")
+        sockets.append(ws)
+
+        async def reader():
+            async for data in ws:
+                inbox[uid].put_nowait(time.perf_counter())
+        asyncio.create_task(reader())
+
+    rss0 = _rss_mb(server_pid)
+    t0 = time.perf_counter()
+    await asyncio.gather(*(open_socket(uid) for uid in RECIPIENTS))
+    print(f"{len(sockets)} sockets abiertos en {time.perf_counter() - t0:.1f}s; "
+          f"RSS servidor {rss0:.0f} → {_rss_mb(server_pid):.0f} MB")
+
+    await asyncio.sleep(1)  # sockets inactivos
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': str(SENDER_ID)})}"}
+    latencies = []
+    async with httpx.AsyncClient(base_url=f"http://{base}", headers=headers) as client:
+        for i in range(args.messages):
+            uid = RECIPIENTS[i * 7919 % len(RECIPIENTS)]
+            t_send = time.perf_counter()
+            r = await client.post(f"/chats/{uid}/messages", json={"body": f"hola {i}"})
+            r.raise_for_status()
+            t_recv = await asyncio.wait_for(inbox[uid].get(), timeout=10)
+            latencies.append((t_recv - t_send) * 1000)
+
+    q = statistics.quantiles(latencies, n=100)
+    print(f"fan-out POST→socket ({args.messages} mensajes): "
+          f"p50 {q[49]:.2f} ms  p95 {q[94]:.2f} ms  p99 {q[98]:.2f} ms  max {max(latencies):.2f} ms")
+    await asyncio.gather(*(ws.close() for ws in sockets), return_exceptions=True)
+
+
+if __name__ == "__main__":
+    seed()
+    port = _free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=os.environ.copy(),
+    )
+    try:
+        for _ in range(100):
+            try:
+                httpx.get(f"http://127.0.0.1:{port}/docs", timeout=0.2)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.1)
+        asyncio.run(main(port, server.pid))
+    finally:
+        server.terminate()
+        server.wait()
@@ -0,0 +1,24 @@
+# scripts/build_recommender.py
+# Construye una versión nueva del índice TF-IDF del recomendador
+# (RECOMMENDER_DIR) y mueve CURRENT a ella. Los workers la recargan solos en
+# menos de un minuto. Úsalo tras cargas masivas o desde cron si
+# RECOMMENDER_REBUILD_INTERVAL=0.
+import json
+import sys
+import time
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # permite importar app/
+
+import app.models.campus
+import app.models.user  # NO quitar, aunque no se use directamente
+import app.models.product
+
+from app.core.db import SessionLocal
+from app.core.recommender import build_index
+
+t0 = time.perf_counter()
+with SessionLocal() as db:
+    path = build_index(db)
+meta = json.loads((path / "meta.json").read_text())
+print(f"✔ Índice del recomendador {meta['version']}: {meta['docs']} productos, "
+      f"{meta['terms']} términos ({time.perf_counter() - t0:.1f} s).")
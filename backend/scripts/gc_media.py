@@ -0,0 +1,43 @@
+# scripts/gc_media.py
+# Recolector del almacén de imágenes (app/core/storage.py): borra en lotes
+# los blobs sin referencias, los archivos huérfanos y las imágenes de
+# productos desactivados hace más de N días. Pensado para cron, p. ej.:
+#   python scripts/gc_media.py --grace-hours 1 --inactive-days 30
+import argparse
+import sys
+from datetime import timedelta
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # permite importar app/
+
+import app.models.campus
+import app.models.user  # NO quitar, aunque no se use directamente
+import app.models.product
+import app.models.media
+
+from app.core.db import SessionLocal
+from app.core.storage import collect_garbage
+
+parser = argparse.ArgumentParser(description="GC del almacén de imágenes")
+parser.add_argument("--grace-hours", type=float, default=1.0, help="antigüedad mínima de lo que se borra")
+parser.add_argument("--inactive-days", type=float, default=30.0, help="<0 = no tocar productos desactivados")
+parser.add_argument("--batch-size", type=int, default=500)
+parser.add_argument("--dry-run", action="store_true", help="solo contar")
+args = parser.parse_args()
+
+db = SessionLocal()
+try:
+    stats = collect_garbage(
+        db,
+        grace=timedelta(hours=args.grace_hours),
+        inactive_retention=timedelta(days=args.inactive_days) if args.inactive_days >= 0 else None,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+    )
+    prefix = "(dry-run) " if args.dry_run else ""
+    print(
+        f"✔ {prefix}{stats['blobs']} blobs ({stats['bytes'] / 1024 / 1024:.1f} MB), "
+        f"{stats['orphan_files']} archivos huérfanos, "
+        f"{stats['inactive_images']} imágenes de productos inactivos."
+    )
+finally:
+    db.close()
@@ -0,0 +1,21 @@
+# scripts/rebuild_search.py
+# Reconstruye el índice de búsqueda de productos (tsvector en Postgres / FTS5 en SQLite).
+# Úsalo tras cargas masivas o si el índice quedó desincronizado.
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # permite importar app/
+
+import app.models.campus
+import app.models.user  # NO quitar, aunque no se use directamente
+import app.models.product
+
+from app.core.db import SessionLocal
+from app.core.search import rebuild_index
+
+db = SessionLocal()
+try:
+    n = rebuild_index(db)
+    db.commit()
+    print(f"✔ Índice de búsqueda reconstruido ({n} productos).")
+finally:
+    db.close()
@@ -0,0 +1,21 @@
+# scripts/recount_conversations.py
+# Recalcula último mensaje y contadores de no leídos de cada conversación
+# desde `messages` (repara deriva de las columnas denormalizadas).
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).resolve().parents[1]))  # permite importar app/
+
+import app.models.campus
+import app.models.user  # NO quitar, aunque no se use directamente
+import app.models.product
+
+from app.core.db import SessionLocal
+from app.crud.chat import recount_conversations
+
+db = SessionLocal()
+try:
+    n = recount_conversations(db)
+    db.commit()
+    print(f"✔ Contadores recalculados ({n} conversaciones).")
+finally:
+    db.close()
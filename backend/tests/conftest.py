@@ -0,0 +1,176 @@
+# tests/conftest.py
+# La app lee la configuración del entorno al importarse: todo lo de abajo va
+# ANTES de importar app/. BD SQLite temporal, sin procesos (hasher/imágenes),
+# sin caché de respuestas (se mide la consulta real) y sin DNS.
+import itertools
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.append(str(BACKEND_DIR))  # permite importar app/
+
+TMP = Path(tempfile.mkdtemp(prefix="machtrueke-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{TMP / 'tests.db'}"
+os.environ["RECOMMENDER_DIR"] = str(TMP / "recommender")
+os.environ["RECOMMENDER_REBUILD_INTERVAL"] = "0"
+os.environ["FEED_REFRESH_INTERVAL"] = "0"
+os.environ["RESPONSE_CACHE_TTL"] = "0"
+os.environ["HASH_WORKERS"] = "0"
+os.environ["IMAGE_WORKERS"] = "0"
+os.environ["INTERNAL_TOKEN"] = ""
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import app.models.campus
+import app.models.media
+import app.models.swipe
+from app.core.db import Base, SessionLocal, async_engine, engine
+from app.core.email_utils import mx_cache
+from app.core.recommender import build_index
+from app.core.search import ensure_search_schema, rebuild_index
+from app.core.security import create_access_token
+from app.crud.chat import recount_conversations
+from app.main import app as fastapi_app
+from app.models.chat import Conversation, Message
+from app.models.product import Product, ProductImage
+from app.models.user import User
+
+# datos compartidos por toda la sesión (solo lectura): el usuario ME publica
+# PRODUCTS productos (IMAGES imágenes c/u) y tiene una conversación con cada
+# uno de los demás usuarios
+ME = 1
+USERS = 61
+PRODUCTS = 150
+IMAGES = 3
+MESSAGES = 4
+FIRST_CONVERSATION_MESSAGES = 60   # la 1 (ME con u2) alcanza para páginas grandes
+
+
+async def _mx_ok(domain: str) -> bool:
+    return True
+
+
+def _seed() -> None:
+    Base.metadata.create_all(engine)
+    ensure_search_schema(engine)
+    with SessionLocal() as db:
+        db.execute(insert(User), [
+            {"id": u, "username": f"u{u}", "email": f"u{u}@alumnos.udg.mx", "hashed_password": "x"}
+            for u in range(1, USERS + 1)
+        ])
+        db.execute(insert(Product), [
+            {"id": p, "title": f"producto {p}", "description": "descripción del producto", "owner_id": ME}
+            for p in range(1, PRODUCTS + 1)
+        ])
+        db.execute(insert(ProductImage), [
+            {"product_id": p, "url": f"/static/blobs/00/{p}-{k}.jpg"}
+            for p in range(1, PRODUCTS + 1) for k in range(IMAGES)
+        ])
+        db.execute(insert(Conversation), [
+            {"id": u - 1, "user1_id": ME, "user2_id": u, "product_id": 1} for u in range(2, USERS + 1)
+        ])
+        db.execute(insert(Message), [
+            {"conversation_id": u - 1, "sender_id": ME if i % 2 else u, "body": f"m{i}"}
+            for u in range(2, USERS + 1)
+            for i in range(FIRST_CONVERSATION_MESSAGES if u == 2 else MESSAGES)
+        ])
+        recount_conversations(db)
+        rebuild_index(db)
+        db.commit()
+        build_index(db)   # índice del recomendador para /{id}/similar
+
+
+# ---------- filas propias de las pruebas que escriben ----------
+# Una prueba que envía, borra o desactiva algo (o cuyo resultado depende de
+# lo que otras leen, p. ej. los no leídos) no usa el seed: crea sus propios
+# usuarios y conversaciones, con ids que ningún otro módulo toca.
+_fresh_ids = itertools.count(100_000)
+
+
+def new_users(n: int) -> List[int]:
+    ids = [next(_fresh_ids) for _ in range(n)]
+    with SessionLocal() as db:
+        db.execute(insert(User), [
+            {"id": u, "username": f"t{u}", "email": f"t{u}@alumnos.udg.mx", "hashed_password": "x"} for u in ids
+        ])
+        db.commit()
+    return ids
+
+
+def new_products(owner: int, n: int, **values) -> List[int]:
+    with SessionLocal() as db:
+        products = [Product(title=f"t{owner}-{k}", description="de prueba", owner_id=owner, **values) for k in range(n)]
+        db.add_all(products)
+        db.commit()
+        return [p.id for p in products]
+
+
+def new_conversations(owner: int, peers: Sequence[int], messages: int) -> Dict[int, int]:
+    """Una conversación de `owner` con cada peer ({peer: id}); los mensajes alternan y el último es de owner si `messages` es par."""
+    with SessionLocal() as db:
+        convs = {peer: Conversation(user1_id=owner, user2_id=peer) for peer in peers}
+        db.add_all(convs.values())
+        db.flush()
+        if messages:
+            db.execute(insert(Message), [
+                {"conversation_id": c.id, "sender_id": owner if i % 2 else peer, "body": f"m{i}"}
+                for peer, c in convs.items() for i in range(messages)
+            ])
+        recount_conversations(db)
+        db.commit()
+        return {peer: c.id for peer, c in convs.items()}
+
+
+def auth_for(user_id: int) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {create_access_token({'sub': str(user_id)})}"}
+
+
+class QueryCounter:
+    """Cuenta las sentencias SQL (sync y async) ejecutadas por la app."""
+
+    def __init__(self) -> None:
+        self.count = 0
+
+    def _inc(self, *_) -> None:
+        self.count += 1
+
+    def __enter__(self) -> "QueryCounter":
+        for eng in (engine, async_engine.sync_engine):
+            event.listen(eng, "before_cursor_execute", self._inc)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        for eng in (engine, async_engine.sync_engine):
+            event.remove(eng, "before_cursor_execute", self._inc)
+
+    def measure(self, client: TestClient, path: str, params: dict, headers: dict) -> int:
+        client.get(path, params=params, headers=headers)   # calentamiento (usuario autenticado en caché)
+        before = self.count
+        r = client.get(path, params=params, headers=headers)
+        assert r.status_code == 200, r.text
+        return self.count - before
+
+
+@pytest.fixture(scope="session")
+def client():
+    _seed()
+    mx_cache.resolver = _mx_ok
+    with TestClient(fastapi_app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def auth_headers():
+    return auth_for(ME)
+
+
+@pytest.fixture
+def query_counter():
+    with QueryCounter() as counter:
+        yield counter
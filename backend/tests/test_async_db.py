@@ -0,0 +1,63 @@
+# tests/test_async_db.py
+# Los handlers corren en el event loop (async def) y su SQL va por el
+# AsyncEngine: nada pasa por el threadpool ni por el engine síncrono.
+import inspect
+from contextlib import contextmanager
+
+import pytest
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+
+from app.core.db import async_engine, engine
+from app.routers import auth, chats, products
+from conftest import auth_for, new_conversations, new_users
+
+
+@pytest.mark.parametrize("module", [auth, chats, products], ids=lambda m: m.__name__.rsplit(".", 1)[-1])
+def test_handlers_are_coroutines(module):
+    routes = [r for r in module.router.routes if isinstance(r, APIRoute)]
+    assert routes
+    sync = [r.path for r in routes if not inspect.iscoroutinefunction(r.endpoint)]
+    assert not sync, f"handlers síncronos (threadpool): {sync}"
+
+
+@contextmanager
+def _engine_counts():
+    """Sentencias por engine durante el bloque: {"sync": n, "async": m}."""
+    counts = {"sync": 0, "async": 0}
+
+    def on(kind):
+        def inc(*_):
+            counts[kind] += 1
+        return inc
+
+    listeners = [(engine, on("sync")), (async_engine.sync_engine, on("async"))]
+    for eng, fn in listeners:
+        event.listen(eng, "before_cursor_execute", fn)
+    try:
+        yield counts
+    finally:
+        for eng, fn in listeners:
+            event.remove(eng, "before_cursor_execute", fn)
+
+
+@pytest.mark.parametrize("path", ["/", "/?q=producto", "/1", "/me/mine", "/chats", "/chats/unread", "/chats/1/messages"])
+def test_requests_use_only_the_async_engine(client, auth_headers, path):
+    with _engine_counts() as counts:
+        r = client.get(path, headers=auth_headers)
+    assert r.status_code == 200, r.text
+    assert counts["sync"] == 0
+    assert counts["async"] > 0
+
+
+def test_writes_use_only_the_async_engine(client):
+    # filas propias: enviar y borrar no toca el seed
+    owner, peer = new_users(2)
+    conv = new_conversations(owner, [peer], messages=0)[peer]
+    with _engine_counts() as counts:
+        sent = client.post(f"/chats/{conv}/messages", json={"body": "hola"}, headers=auth_for(owner))
+        deleted = client.delete(f"/chats/{conv}", headers=auth_for(owner))
+    assert sent.status_code == 201, sent.text
+    assert deleted.status_code == 204, deleted.text
+    assert counts["sync"] == 0
+    assert counts["async"] > 0
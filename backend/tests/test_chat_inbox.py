@@ -0,0 +1,35 @@
+# tests/test_chat_inbox.py
+# La bandeja (último mensaje + no leídos de cada conversación) sale en un
+# número fijo de consultas: no puede crecer con el tamaño de la página.
+# Bandeja propia: los no leídos cambian con cualquier GET de mensajes.
+import pytest
+
+from conftest import auth_for, new_conversations, new_users
+
+PEERS = 55
+MESSAGES = 4
+
+
+@pytest.fixture(scope="module")
+def inbox(client):
+    owner, *peers = new_users(1 + PEERS)
+    new_conversations(owner, peers, MESSAGES)
+    return owner
+
+
+def test_inbox_query_count_does_not_grow_with_page_size(client, inbox, query_counter):
+    small = query_counter.measure(client, "/chats", {"limit": 5}, auth_for(inbox))
+    large = query_counter.measure(client, "/chats", {"limit": 50}, auth_for(inbox))
+    assert small > 0
+    assert small == large, f"/chats: {small} consultas con limit=5, {large} con limit=50"
+    assert large <= 1
+
+
+def test_inbox_summary(client, inbox):
+    page = client.get("/chats", params={"limit": 50}, headers=auth_for(inbox)).json()
+    assert len(page) == 50 <= PEERS
+    for conv in page:
+        assert conv["last_message"] is not None
+        # cada conversación termina con un mensaje del dueño: sin leer solo los del otro
+        assert conv["last_message"]["sender_id"] == inbox
+        assert conv["unread_count"] == MESSAGES // 2
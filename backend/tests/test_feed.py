@@ -0,0 +1,115 @@
+# tests/test_feed.py
+# Feed de descubrimiento (MemoryFeedStore sobre la BD de pruebas): nunca
+# repite lo visto ni lo swipeado, solo muestra productos ajenos y activos de
+# dueños activos del mismo campus, y rellena al bajar de la marca de agua.
+import asyncio
+import itertools
+
+import pytest
+from sqlalchemy import insert, update
+
+from conftest import new_products, new_users
+from app.core.db import SessionLocal
+from app.core.feed import DiscoveryFeed, MemoryFeedStore
+from app.models.campus import Campus
+from app.models.swipe import Swipe
+from app.models.user import User
+
+_campus_ids = itertools.count(1)
+
+
+def _campus(*user_ids: int) -> int:
+    n = next(_campus_ids)
+    with SessionLocal() as db:
+        cid = db.execute(insert(Campus).values(code=f"TF{n}", name=f"Campus de prueba {n}").returning(Campus.id)).scalar_one()
+        db.execute(update(User).where(User.id.in_(user_ids)).values(campus_id=cid))
+        db.commit()
+    return cid
+
+
+def _feed(**kw) -> DiscoveryFeed:
+    opts = {"queue_size": 200, "low_watermark": 0, "scan_limit": 50, "refresh_interval": 0, **kw}
+    return DiscoveryFeed(MemoryFeedStore(100), **opts)
+
+
+async def _drain(feed: DiscoveryFeed, user_id: int, n: int) -> list:
+    """Pide hasta que la cola está vacía y un relleno ya no encuentra nada."""
+    served = []
+    while True:
+        ids = await feed.next(user_id, n)
+        served += ids
+        if not ids and not await feed.refill(user_id):
+            return served
+
+
+@pytest.fixture
+def world(client):
+    """Espectador y dueños en un campus propio: ningún otro producto del seed entra en su feed."""
+    viewer, owner, inactive_owner, elsewhere = new_users(4)
+    _campus(viewer, owner, inactive_owner)
+    _campus(elsewhere)
+    visible = new_products(owner, 12)
+    hidden = (
+        new_products(owner, 2, is_active=False)
+        + new_products(viewer, 2)               # propios
+        + new_products(inactive_owner, 2)
+        + new_products(elsewhere, 2)            # otro campus
+    )
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == inactive_owner).values(is_active=False))
+        db.commit()
+    return {"viewer": viewer, "owner": owner, "visible": visible, "hidden": hidden}
+
+
+def test_serves_each_visible_product_once(world):
+    served = asyncio.run(_drain(_feed(queue_size=5, low_watermark=2, scan_limit=3), world["viewer"], 2))
+    assert len(served) == len(set(served))
+    assert sorted(served) == sorted(world["visible"])
+    assert not set(served) & set(world["hidden"])
+
+
+def test_swiped_products_are_never_served(world):
+    viewer, visible = world["viewer"], world["visible"]
+    with SessionLocal() as db:   # swipeado antes del primer relleno
+        db.execute(insert(Swipe), [{"swiper_id": viewer, "product_id": visible[0], "owner_id": world["owner"], "liked": False}])
+        db.commit()
+
+    async def scenario():
+        feed = _feed()
+        first = await feed.next(viewer, 1)
+        queued = await feed.store.queued(viewer)
+        # swipeado desde otra pantalla con el producto ya en la cola
+        await feed.mark_seen(viewer, queued[:2])
+        return first, queued[:2], await _drain(feed, viewer, 3)
+
+    first, swiped_later, rest = asyncio.run(scenario())
+    served = first + rest
+    assert visible[0] not in served
+    assert not set(swiped_later) & set(rest)
+    assert sorted(served + swiped_later) == sorted(visible[1:])
+
+
+def test_low_watermark_triggers_background_refill(world):
+    viewer, owner = world["viewer"], world["owner"]
+
+    async def scenario():
+        feed = _feed(queue_size=4, low_watermark=3, scan_limit=4)
+        # arranque en frío: este request espera el relleno (4, los más nuevos)
+        first = await feed.next(viewer, 1)
+        assert feed.cold_starts == 1 and len(await feed.store.queued(viewer)) == 3
+        assert viewer not in feed._refills          # 3 en cola: no baja de la marca
+        second = await feed.next(viewer, 1)         # quedan 2 < 3: relleno en segundo plano
+        task = feed._refills[viewer]
+        await task
+        queued = await feed.store.queued(viewer)
+        # un producto nuevo entra en el siguiente relleno aunque se lean hacia atrás los viejos
+        (newest,) = await asyncio.to_thread(new_products, owner, 1)
+        third = await feed.next(viewer, 50)         # vacía la cola: otro relleno en segundo plano
+        await feed._refills[viewer]
+        return first + second + third, queued, await feed.store.queued(viewer), newest, feed
+
+    served, after_refill, after_new, newest, feed = asyncio.run(scenario())
+    assert len(after_refill) >= 4 and not set(after_refill) & set(served[:2])
+    assert newest not in after_refill and newest in after_new
+    assert not set(after_new) & set(served)
+    assert feed.refills_done == 3 and feed.errors == 0
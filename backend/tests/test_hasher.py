@@ -0,0 +1,49 @@
+# tests/test_hasher.py
+# Un timeout libera a quien espera, no el cupo: el trabajo sigue en el pool
+# (bcrypt no se interrumpe) y el cupo vuelve recién cuando termina.
+import asyncio
+import threading
+
+import pytest
+
+from app.core.hasher import HasherBusy, PasswordHasher
+
+
+def test_timed_out_jobs_keep_their_slot_until_they_finish():
+    gate = threading.Event()
+
+    async def scenario():
+        h = PasswordHasher(workers=0, max_queue=0, timeout=0.05, rounds=4)
+        # 4 cupos (modo hilos): trabajos que no terminan hasta abrir `gate`
+        for _ in range(h.concurrency):
+            with pytest.raises(HasherBusy):
+                await h._run(gate.wait, 5)
+        assert h.timeouts == h.concurrency and h.running == h.concurrency
+        # el pool sigue lleno: lo nuevo va a la cola (tamaño 0) y se rechaza
+        with pytest.raises(HasherBusy):
+            await h._run(lambda: "rápido")
+        assert h.rejected == 1
+        gate.set()
+        for _ in range(100):
+            if h.running == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert h.running == 0
+        assert await h._run(lambda: "rápido") == "rápido"
+        return h
+
+    try:
+        h = asyncio.run(scenario())
+    finally:
+        gate.set()
+    assert h.completed == 1 and h.waiting == 0
+
+
+def test_hash_and_verify_roundtrip():
+    async def scenario():
+        h = PasswordHasher(workers=0, max_queue=8, timeout=10, rounds=4)
+        hashed = await h.hash("s3creto")
+        return hashed, await h.verify("s3creto", hashed), await h.verify("otro", hashed)
+
+    hashed, ok, bad = asyncio.run(scenario())
+    assert hashed.startswith("$2") and ok and not bad
@@ -0,0 +1,22 @@
+# tests/test_internal.py
+# /internal/* falla cerrado: sin INTERNAL_TOKEN no existe; con él exige el header.
+import pytest
+
+from app.routers import internal
+
+PATHS = ["/internal/stats/db", "/internal/stats/caches", "/internal/stats/hasher", "/internal/stats/images"]
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_disabled_without_token(client, path):
+    assert internal.INTERNAL_TOKEN == ""
+    assert client.get(path).status_code == 404
+    assert client.get(path, headers={"X-Internal-Token": ""}).status_code == 404
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_requires_configured_token(client, monkeypatch, path):
+    monkeypatch.setattr(internal, "INTERNAL_TOKEN", "s3creto")
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"X-Internal-Token": "otro"}).status_code == 403
+    assert client.get(path, headers={"X-Internal-Token": "s3creto"}).status_code == 200
@@ -0,0 +1,141 @@
+# tests/test_mx_cache.py
+# MXCache con un resolver local (sin DNS): caché positiva/negativa, valor
+# viejo mientras se refresca, fallos transitorios y consultas compartidas;
+# `stop()` cancela los refrescos en segundo plano.
+import asyncio
+
+import dns.resolver
+
+from app.core.email_utils import MXCache
+
+DOMAIN = "alumnos.udg.mx"
+
+
+class StubResolver:
+    """Devuelve `answer` (o lanza `error`); con `gate` espera a que se abra."""
+
+    def __init__(self, answer: bool = True) -> None:
+        self.answer = answer
+        self.error = None
+        self.gate = None
+        self.calls = 0
+
+    async def __call__(self, domain: str) -> bool:
+        self.calls += 1
+        if self.gate is not None:
+            await self.gate.wait()
+        if self.error is not None:
+            raise self.error
+        return self.answer
+
+
+async def _settle(cache: MXCache) -> None:
+    # deja terminar los refrescos en segundo plano
+    await asyncio.gather(*cache._refreshing)
+    assert not cache._inflight and not cache._refreshing
+
+
+def test_positive_hit_served_from_cache():
+    async def scenario():
+        resolver = StubResolver(True)
+        cache = MXCache(resolver, ttl=60, negative_ttl=60)
+        assert await cache.has_mx(DOMAIN) is True
+        assert await cache.has_mx(" Alumnos.UDG.mx ") is True   # normaliza el dominio
+        assert resolver.calls == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    asyncio.run(scenario())
+
+
+def test_negative_entry_expires_after_negative_ttl():
+    async def scenario():
+        resolver = StubResolver(False)
+        cache = MXCache(resolver, ttl=60, negative_ttl=0.05)
+        assert await cache.has_mx(DOMAIN) is False
+        assert await cache.has_mx(DOMAIN) is False
+        assert resolver.calls == 1            # dentro del TTL negativo: de la caché
+
+        resolver.answer = True
+        await asyncio.sleep(0.06)
+        assert await cache.has_mx(DOMAIN) is False   # vencido: valor viejo + refresco
+        await _settle(cache)
+        assert resolver.calls == 2
+        assert await cache.has_mx(DOMAIN) is True
+
+    asyncio.run(scenario())
+
+
+def test_stale_value_served_while_refreshing():
+    async def scenario():
+        resolver = StubResolver(True)
+        cache = MXCache(resolver, ttl=0, negative_ttl=60)   # vence al instante
+        assert await cache.has_mx(DOMAIN) is True
+
+        resolver.answer, resolver.gate = False, asyncio.Event()
+        # el refresco queda colgado en el DNS: el login no lo espera
+        assert await asyncio.wait_for(cache.has_mx(DOMAIN), timeout=1) is True
+        await asyncio.sleep(0)
+        assert DOMAIN in cache._inflight
+        assert await asyncio.wait_for(cache.has_mx(DOMAIN), timeout=1) is True
+        assert resolver.calls == 2            # un solo refresco en curso
+
+        resolver.gate.set()
+        await _settle(cache)
+        assert await cache.has_mx(DOMAIN) is False
+
+    asyncio.run(scenario())
+
+
+def test_transient_failure_keeps_last_value():
+    async def scenario():
+        resolver = StubResolver(True)
+        cache = MXCache(resolver, ttl=0, negative_ttl=60)
+        assert await cache.has_mx(DOMAIN) is True
+
+        for error in (dns.resolver.LifetimeTimeout(timeout=1.0, errors={}), dns.resolver.NoNameservers()):
+            resolver.error = error            # timeout / SERVFAIL
+            cache._entries[DOMAIN] = (True, 0)   # vencida: fuerza el refresco
+            assert await cache.has_mx(DOMAIN) is True
+            await _settle(cache)
+            assert cache._entries[DOMAIN][0] is True
+        assert cache.errors == 2
+
+        # sin valor previo, el fallo cuenta como "sin MX"
+        assert await cache.has_mx("otro.udg.mx") is False
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_misses_share_one_lookup():
+    async def scenario():
+        resolver = StubResolver(True)
+        resolver.gate = asyncio.Event()
+        cache = MXCache(resolver, ttl=60, negative_ttl=60)
+        waiting = [asyncio.ensure_future(cache.has_mx(DOMAIN)) for _ in range(20)]
+        await asyncio.sleep(0)
+        assert list(cache._inflight) == [DOMAIN]
+        resolver.gate.set()
+        assert await asyncio.gather(*waiting) == [True] * 20
+        assert resolver.calls == 1
+        assert not cache._inflight
+
+    asyncio.run(scenario())
+
+
+def test_stop_cancels_background_refresh():
+    async def scenario():
+        resolver = StubResolver(True)
+        cache = MXCache(resolver, ttl=0, negative_ttl=60)
+        assert await cache.has_mx(DOMAIN) is True
+
+        resolver.gate = asyncio.Event()   # el refresco se queda colgado en el DNS
+        assert await cache.has_mx(DOMAIN) is True
+        (task,) = cache._refreshing
+        await asyncio.sleep(0)
+        assert DOMAIN in cache._inflight
+
+        await cache.stop()
+        assert task.cancelled()
+        assert not cache._refreshing and not cache._inflight
+
+    asyncio.run(scenario())
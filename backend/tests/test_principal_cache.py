@@ -0,0 +1,54 @@
+# tests/test_principal_cache.py
+# La caché del usuario autenticado es por worker: una baja o un cambio debe
+# sacarlo de TODOS los workers (señal por el broker) antes de responder.
+import asyncio
+
+import fakeredis
+from sqlalchemy import delete
+
+from conftest import auth_for, new_users
+from app.core.db import SessionLocal
+from app.core.realtime import ChatHub, RedisBroker, hub
+from app.core.security import PRINCIPAL_SIGNAL, principal_cache
+from app.models.user import User
+
+
+def test_delete_me_revokes_cached_principal(client):
+    (user,) = new_users(1)
+    headers = auth_for(user)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    assert principal_cache.get(user) is not None
+    assert client.delete("/auth/me", headers=headers).status_code == 204
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_signal_from_another_worker_drops_cached_principal(client):
+    (user,) = new_users(1)
+    headers = auth_for(user)
+    assert client.get("/auth/me", headers=headers).status_code == 200
+    # otro worker borra al usuario: la BD cambia, la caché de éste no
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.id == user))
+        db.commit()
+    assert client.get("/auth/me", headers=headers).status_code == 200   # sirve la caché
+    # ... y publica la invalidación, que llega por el broker
+    client.portal.call(hub.signal, PRINCIPAL_SIGNAL, [user])
+    assert client.get("/auth/me", headers=headers).status_code == 401
+
+
+def test_signal_reaches_every_worker_through_redis():
+    async def scenario():
+        server = fakeredis.FakeServer()
+        workers = [ChatHub(RedisBroker(client=fakeredis.aioredis.FakeRedis(server=server))) for _ in range(2)]
+        got = [asyncio.Queue() for _ in workers]
+        for w, q in zip(workers, got):
+            w.on_signal(PRINCIPAL_SIGNAL, q.put_nowait)
+            await w.start()
+        try:
+            await workers[0].signal(PRINCIPAL_SIGNAL, [7])
+            return [await asyncio.wait_for(q.get(), 2) for q in got]
+        finally:
+            for w in workers:
+                await w.stop()
+
+    assert asyncio.run(scenario()) == [[7], [7]]
@@ -0,0 +1,34 @@
+# tests/test_query_counts.py
+# Ningún listado hace N+1: el número de sentencias SQL de una página chica y
+# de una grande debe ser el MISMO y no pasar del presupuesto.
+import pytest
+
+from conftest import FIRST_CONVERSATION_MESSAGES, PRODUCTS
+
+# (ruta, params fijos, presupuesto de consultas)
+LIST_ENDPOINTS = [
+    ("/", {}, 2),
+    ("/", {"q": "producto"}, 2),
+    ("/me/mine", {}, 2),
+    ("/1/similar", {}, 3),
+    ("/chats/1/messages", {}, 2),
+]
+PAGE_SIZES = (5, 40)
+
+
+@pytest.mark.parametrize("path,params,budget", LIST_ENDPOINTS, ids=["list", "search", "mine", "similar", "messages"])
+def test_list_query_count_does_not_grow_with_page_size(client, auth_headers, query_counter, path, params, budget):
+    counts = []
+    for limit in PAGE_SIZES:
+        counts.append(query_counter.measure(client, path, {**params, "limit": limit}, auth_headers))
+    assert counts[0] > 0   # el contador está enganchado
+    assert counts[0] == counts[1], f"{path}: {counts[0]} consultas con limit={PAGE_SIZES[0]}, {counts[1]} con {PAGE_SIZES[1]}"
+    assert counts[1] <= budget
+
+
+def test_pages_are_full(client, auth_headers):
+    # sin esto las medidas de arriba podrían comparar dos páginas vacías
+    assert min(PRODUCTS, FIRST_CONVERSATION_MESSAGES) >= PAGE_SIZES[1]
+    for path, params, _ in LIST_ENDPOINTS:
+        r = client.get(path, params={**params, "limit": PAGE_SIZES[1]}, headers=auth_headers)
+        assert len(r.json()) == PAGE_SIZES[1], path
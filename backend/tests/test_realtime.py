@@ -0,0 +1,95 @@
+# tests/test_realtime.py
+# /chats/ws: el broker es una interfaz abstracta, sólo un usuario activo
+# puede abrir (y retener) un socket y un cliente lento no frena a los demás.
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import update
+from starlette.websockets import WebSocketDisconnect
+
+from conftest import auth_for, new_conversations, new_users
+from app.core.db import SessionLocal
+from app.core.realtime import Broker, ChatHub, InMemoryBroker
+from app.core.security import create_access_token
+from app.models.user import User
+
+
+def test_broker_is_abstract():
+    with pytest.raises(TypeError):
+        Broker()
+
+    class Incomplete(Broker):
+        async def start(self, deliver): ...
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    InMemoryBroker()   # la implementación completa sí se instancia
+
+
+def test_socket_receives_new_message(client):
+    sender, peer = new_users(2)
+    conv = new_conversations(sender, [peer], 0)[peer]
+    with client.websocket_connect(f"/chats/ws?token={create_access_token({'sub': str(peer)})}") as ws:
+        r = client.post(f"/chats/{conv}/messages", json={"body": "hola por socket"}, headers=auth_for(sender))
+        assert r.status_code in (200, 201), r.text
+        event = ws.receive_json()
+    assert event["type"] == "message"
+    assert event["message"]["body"] == "hola por socket"
+
+
+def test_socket_rejects_deactivated_user(client):
+    (user,) = new_users(1)
+    with SessionLocal() as db:
+        db.execute(update(User).where(User.id == user).values(is_active=False))
+        db.commit()
+    with pytest.raises(WebSocketDisconnect) as exc:
+        with client.websocket_connect(f"/chats/ws?token={create_access_token({'sub': str(user)})}") as ws:
+            ws.receive_json()
+    assert exc.value.code == 1008
+
+
+class FakeSocket:
+    """send_text se traba (TCP lleno) hasta que `unblock` se activa."""
+
+    def __init__(self, stalled: bool = False) -> None:
+        self.sent = []
+        self.closed_with = None
+        self.unblock = asyncio.Event()
+        if not stalled:
+            self.unblock.set()
+
+    async def send_text(self, data: str) -> None:
+        await self.unblock.wait()
+        self.sent.append(data)
+
+    async def close(self, code: int) -> None:
+        self.closed_with = code
+
+
+def test_stalled_socket_does_not_block_delivery():
+    async def scenario():
+        hub = ChatHub(InMemoryBroker(), send_queue=4)
+        await hub.start()
+        slow, fast = FakeSocket(stalled=True), FakeSocket()
+        hub.connect(1, slow)
+        hub.connect(2, fast)
+        signals = []
+        hub.on_signal("ping", signals.append)
+        try:
+            for i in range(20):
+                # si la entrega esperara al socket trabado, esto no terminaría
+                await asyncio.wait_for(hub.publish([1, 2], {"type": "message", "n": i}), 1)
+            await asyncio.wait_for(hub.signal("ping", [1]), 1)
+            for _ in range(5):
+                await asyncio.sleep(0)
+            return slow, fast, signals, hub
+        finally:
+            await hub.stop()
+
+    slow, fast, signals, hub = asyncio.run(scenario())
+    assert [json.loads(d)["n"] for d in fast.sent] == list(range(20))
+    assert signals == [[1]]
+    # el lento llenó su cola: fuera del hub y cerrado con 1013
+    assert slow.sent == [] and slow.closed_with == 1013
+    assert hub.evicted == 1 and hub.connections == 1
@@ -0,0 +1,135 @@
+# tests/test_recommender.py
+# Recomendador TF-IDF: tokenización, build → open del índice en disco y el
+# delta en memoria (productos editados o dados de baja después del build).
+import json
+import time
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import Session
+
+from app.core.db import Base
+from app.core.recommender import KEEP_VERSIONS, Recommender, TfidfIndex, build_index, term_counts, tokenize
+from app.models.product import Product
+from app.models.user import User
+
+PRODUCTS = {
+    1: ("Cámara réflex Canon", "cámara digital con lente y batería"),
+    2: ("Lente para cámara", "lente de 50mm para cámaras Canon"),
+    3: ("Libros de cálculo", "libros de cálculo diferencial e integral"),
+    4: ("Calculadora científica", "calculadora para cálculo y álgebra"),
+    5: ("Bicicleta de montaña", "bicicleta rodada 26 con frenos de disco"),
+}
+INACTIVE = 6
+
+
+@pytest.fixture(scope="module")
+def db(tmp_path_factory):
+    engine = create_engine(f"sqlite:///{tmp_path_factory.mktemp('rec') / 'rec.db'}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as s:
+        s.execute(insert(User), [{"id": 1, "username": "u", "email": "u@alumnos.udg.mx", "hashed_password": "x"}])
+        s.execute(insert(Product), [
+            {"id": pid, "title": t, "description": d, "owner_id": 1} for pid, (t, d) in PRODUCTS.items()
+        ] + [{"id": INACTIVE, "title": "Cámara vieja", "description": "cámara", "owner_id": 1, "is_active": False}])
+        s.commit()
+        yield s
+
+
+@pytest.fixture
+def recommender(db, tmp_path):
+    build_index(db, tmp_path)
+    rec = Recommender(tmp_path, rebuild_interval=0)
+    assert rec.load()
+    return rec
+
+
+# ---------- tokenización ----------
+def test_tokenize_folds_accents_and_drops_stopwords():
+    assert tokenize("La CÁMARA del Año, con 2 lentes") == ["camara", "ano", "lente"]
+    assert tokenize("a y o") == []
+
+
+@pytest.mark.parametrize("word,stem", [
+    ("cámaras", "camara"), ("libros", "libro"), ("cargadores", "cargador"),
+    ("lápices", "lapiz"), ("paredes", "pared"), ("clases", "clase"), ("express", "express"), ("mes", "mes"),   # corta: intacta
+])
+def test_plurals_are_reduced(word, stem):
+    assert tokenize(word) == [stem]
+
+
+def test_title_weighs_double():
+    counts = term_counts("Lámpara", "lámpara de escritorio")
+    assert counts["lampara"] == 3 and counts["escritorio"] == 1
+
+
+# ---------- índice en disco ----------
+def test_build_and_open_round_trip(db, tmp_path):
+    path = build_index(db, tmp_path)
+    assert (tmp_path / "CURRENT").read_text() == path.name
+    index = TfidfIndex.open(path)
+    meta = json.loads((path / "meta.json").read_text())
+    assert index.version == meta["version"] == path.name
+    # solo productos activos, ascendentes
+    assert index.ids.tolist() == sorted(PRODUCTS)
+    assert index.terms == sorted(index.terms) and meta["terms"] == len(index.terms)
+    for pid in PRODUCTS:
+        row = index.row(pid)
+        vec = index.vector(row)
+        assert set(vec) == set(term_counts(*PRODUCTS[pid]))
+        assert sum(w * w for w in vec.values()) == pytest.approx(1.0, rel=1e-5)   # L2: punto = coseno
+    assert index.row(INACTIVE) is None
+    assert index.rows([5, INACTIVE, 1, 999]).tolist() == [4, 0]
+    # el índice invertido es la transpuesta exacta del CSR por documento
+    for t, term in enumerate(index.terms):
+        s, e = index.term_indptr[t], index.term_indptr[t + 1]
+        for row, w in zip(index.term_indices[s:e], index.term_data[s:e]):
+            assert index.vector(int(row))[term] == pytest.approx(float(w))
+    assert isinstance(index.doc_data, np.memmap)   # abierto con mmap, sin copiar
+
+
+def test_old_versions_are_pruned(db, tmp_path):
+    paths = []
+    for _ in range(KEEP_VERSIONS + 2):
+        paths.append(build_index(db, tmp_path))
+        time.sleep(0.002)   # la versión es el instante del build en ms
+    kept = sorted(p.name for p in tmp_path.glob("v*"))
+    assert kept == sorted({p.name for p in paths[-KEEP_VERSIONS:]})
+
+
+# ---------- consultas y delta ----------
+def _ids(ranked):
+    return [pid for pid, _ in ranked]
+
+
+def test_similar_ranks_by_cosine(recommender):
+    ranked = recommender.similar(1, k=3)
+    assert _ids(ranked)[0] == 2
+    assert 1 not in _ids(ranked)
+    scores = [s for _, s in ranked]
+    assert scores == sorted(scores, reverse=True) and all(0 < s <= 1 for s in scores)
+    assert 5 not in _ids(recommender.similar(1, k=5))   # sin términos en común
+
+
+def test_updated_after_build_masks_base_row(recommender):
+    recommender.update(2, "Bicicleta urbana", "bicicleta rodada 28 con canasta")
+    # su fila del base (lente, cámara) ya no cuenta...
+    assert 2 not in _ids(recommender.similar(1, k=5))
+    # ...y el vector nuevo del delta sí, sin rebuild
+    ranked = recommender.similar(5, k=5)
+    assert _ids(ranked)[0] == 2
+    assert recommender.vector(2) == recommender.vectorize("Bicicleta urbana", "bicicleta rodada 28 con canasta")
+    assert 2 not in _ids(recommender.top(recommender.vector(5), k=5, exclude=(2, 5)))
+
+
+def test_removed_after_build_is_never_returned(recommender):
+    assert 3 in _ids(recommender.similar(4, k=5))
+    recommender.remove(3)
+    assert 3 not in _ids(recommender.similar(4, k=5))
+    assert recommender.vector(3) is None
+    # un producto nuevo en el delta y luego dado de baja tampoco
+    recommender.update(7, "Calculadora graficadora", "calculadora")
+    assert 7 in _ids(recommender.similar(4, k=5))
+    recommender.remove(7)
+    assert 7 not in _ids(recommender.similar(4, k=5))
@@ -0,0 +1,225 @@
+# tests/test_storage.py
+# Una ingesta que falla solo hace rollback: el archivo que escribió puede ser
+# el que otro request con los mismos bytes encontró en disco y registró.
+# El GC no borra un archivo que una ingesta en curso decidió no escribir.
+# Cada subida se lee una sola vez y un cuerpo de más se corta con 413.
+import asyncio
+import io
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import FastAPI, File, UploadFile
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, select
+
+from app.core import storage
+from app.core.body_limit import BodySizeLimit
+from app.core.db import AsyncSessionLocal, SessionLocal
+from app.models.media import MediaBlob
+
+
+def _upload() -> UploadFile:
+    # JPEG por magic bytes, con contenido único por prueba
+    return UploadFile(file=io.BytesIO(b"\xff\xd8\xff\xe0" + os.urandom(512)), filename="x.jpg")
+
+
+class Boom(Exception):
+    pass
+
+
+async def _ingest(upload: UploadFile) -> storage.StoredImage:
+    async with AsyncSessionLocal() as db:
+        async with storage.ingest_images(db, [upload]) as stored:
+            await db.commit()
+    return stored[0]
+
+
+async def _failed_ingest(upload: UploadFile) -> storage.StoredImage:
+    kept = []
+
+    async def scenario() -> None:
+        async with AsyncSessionLocal() as db:
+            async with storage.ingest_images(db, [upload]) as stored:
+                kept.extend(stored)
+                raise Boom
+
+    with pytest.raises(Boom):
+        await scenario()
+    return kept[0]
+
+
+def _blob_exists(sha: str) -> bool:
+    with SessionLocal() as db:
+        return db.scalar(select(MediaBlob.sha256).where(MediaBlob.sha256 == sha)) is not None
+
+
+@pytest.fixture
+def blob_root(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "BLOB_ROOT", tmp_path / "blobs")
+    monkeypatch.setattr(storage, "SPOOL_DIR", tmp_path / "spool")
+    return tmp_path / "blobs"
+
+
+def test_rollback_keeps_file_for_concurrent_upload(blob_root):
+    upload = _upload()
+    data = upload.file.getvalue()
+    failed = asyncio.run(_failed_ingest(upload))
+    # A escribió y falló: sin fila, pero el archivo sigue ahí
+    assert failed.path.exists() and not _blob_exists(failed.sha256)
+
+    # B (mismos bytes) vio el archivo en disco, no lo reescribe y hace commit
+    mtime = failed.path.stat().st_mtime_ns
+    ok = asyncio.run(_ingest(UploadFile(file=io.BytesIO(data), filename="y.jpg")))
+    assert ok.path == failed.path and ok.path.stat().st_mtime_ns == mtime
+    assert _blob_exists(ok.sha256)
+
+    # el barrido de huérfanos no toca un archivo con fila
+    with SessionLocal() as db:
+        stats = storage.collect_garbage(db, grace=timedelta(0), inactive_retention=None)
+    assert stats["orphan_files"] == 0 and ok.path.exists()
+
+
+def test_orphan_file_is_swept_after_grace(blob_root):
+    failed = asyncio.run(_failed_ingest(_upload()))
+    assert failed.path.exists()
+    with SessionLocal() as db:
+        # dentro del periodo de gracia: podría ser una subida en curso
+        assert storage.collect_garbage(db, inactive_retention=None)["orphan_files"] == 0
+        assert storage.collect_garbage(db, grace=timedelta(0), inactive_retention=None)["orphan_files"] == 1
+    assert not failed.path.exists()
+
+
+def _gc() -> dict:
+    with SessionLocal() as db:
+        return storage.collect_garbage(db, grace=timedelta(0), inactive_retention=None)
+
+
+def test_sweep_waits_for_ingest_that_reuses_orphan_file(blob_root):
+    upload = _upload()
+    data = upload.file.getvalue()
+    orphan = asyncio.run(_failed_ingest(upload)).path
+    os.utime(orphan, (0, 0))   # huérfano viejo: el barrido lo borraría
+
+    async def scenario() -> dict:
+        async with AsyncSessionLocal() as db:
+            async with storage.ingest_images(db, [UploadFile(file=io.BytesIO(data), filename="y.jpg")]):
+                # el archivo existe: la ingesta no lo escribe y todavía no hizo commit
+                gc = asyncio.ensure_future(asyncio.to_thread(_gc))
+                await asyncio.sleep(0.3)
+                assert not gc.done(), "el barrido no esperó a la ingesta en curso"
+                await db.commit()
+        return await gc
+
+    stats = asyncio.run(scenario())
+    assert stats["orphan_files"] == 0
+    assert orphan.exists()
+
+
+def test_blob_gc_and_ingest_of_same_bytes(blob_root, monkeypatch):
+    upload = _upload()
+    data = upload.file.getvalue()
+    path = asyncio.run(_failed_ingest(upload)).path
+    sha = path.name.split(".", 1)[0]
+    with SessionLocal() as db:
+        db.execute(insert(MediaBlob).values(sha256=sha, ext=path.suffix, size=len(data), refcount=0,
+                                            released_at=datetime.now(timezone.utc) - timedelta(days=1)))
+        db.commit()
+
+    # el GC se detiene justo antes de borrar el archivo del blob ya eliminado
+    inside, proceed = threading.Event(), threading.Event()
+    unlink = storage._unlink_blob
+
+    def paused_unlink(sha256, ext):
+        inside.set()
+        proceed.wait(5)
+        unlink(sha256, ext)
+
+    monkeypatch.setattr(storage, "_unlink_blob", paused_unlink)
+
+    async def scenario() -> dict:
+        gc = asyncio.ensure_future(asyncio.to_thread(_gc))
+        assert await asyncio.to_thread(inside.wait, 5)
+        ingest = asyncio.ensure_future(_ingest(UploadFile(file=io.BytesIO(data), filename="y.jpg")))
+        await asyncio.sleep(0.3)
+        proceed.set()
+        await ingest
+        return await gc
+
+    stats = asyncio.run(scenario())
+    assert stats["blobs"] == 1
+    # la ingesta re-registró el hash y su archivo está en disco
+    assert _blob_exists(sha) and path.exists()
+
+
+def test_ingest_reads_each_upload_once(blob_root, monkeypatch):
+    data = b"\xff\xd8\xff\xe0" + os.urandom(300 * 1024)
+    uploads = [UploadFile(file=io.BytesIO(data), filename=f"{i}.jpg") for i in range(2)]
+    reads = []
+    read = UploadFile.read
+
+    async def counted_read(self, size=-1):
+        chunk = await read(self, size)
+        reads.append(len(chunk))
+        return chunk
+
+    monkeypatch.setattr(UploadFile, "read", counted_read)
+    async def scenario() -> list:
+        async with AsyncSessionLocal() as db:
+            async with storage.ingest_images(db, uploads) as stored:
+                await db.commit()
+        return stored
+
+    a, b = asyncio.run(scenario())
+    # hash y copia en la misma pasada: cada byte se lee una vez
+    assert sum(reads) == 2 * len(data)
+    assert a.path == b.path and a.path.read_bytes() == data
+    assert list(storage.SPOOL_DIR.iterdir()) == []   # el `.part` duplicado se borró
+
+
+def test_stale_part_file_is_swept(blob_root):
+    storage.SPOOL_DIR.mkdir(parents=True)
+    stale, fresh = storage.SPOOL_DIR / "a.part", storage.SPOOL_DIR / "b.part"
+    stale.write_bytes(b"x")
+    fresh.write_bytes(b"x")
+    os.utime(stale, (0, 0))
+    with SessionLocal() as db:
+        stats = storage.collect_garbage(db, grace=timedelta(hours=1), inactive_retention=None)
+    assert stats["orphan_files"] == 1
+    assert not stale.exists() and fresh.exists()
+
+
+@pytest.fixture
+def limited_client():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    app.add_middleware(BodySizeLimit, max_bytes=64 * 1024)
+    with TestClient(app) as c:
+        yield c
+
+
+def test_body_over_limit_is_rejected_before_parsing(limited_client):
+    ok = limited_client.post("/upload", files={"file": ("a.jpg", b"x" * 1024)})
+    assert ok.status_code == 200 and ok.json() == {"size": 1024}
+
+    # con Content-Length: 413 sin leer el cuerpo
+    big = limited_client.post("/upload", files={"file": ("a.jpg", b"x" * 128 * 1024)})
+    assert big.status_code == 413
+
+    # chunked (sin Content-Length): corta al pasarse mientras llega
+    def chunked():
+        yield b"--b\r\nContent-Disposition: form-data; name=\"file\"; filename=\"a.jpg\"\r\n\r\n"
+        for _ in range(32):
+            yield b"x" * 8 * 1024
+        yield b"\r\n--b--\r\n"
+
+    streamed = limited_client.post(
+        "/upload", content=chunked(), headers={"Content-Type": "multipart/form-data; boundary=b"}
+    )
+    assert streamed.status_code == 413
+    assert "Content-Length" not in streamed.request.headers
@@ -0,0 +1,89 @@
+# tests/test_swipes.py
+# Swipes por lote: like mutuo = match (una conversación por PAR de usuarios),
+# rechazados, y volver a swipear un producto sobrescribe el anterior.
+from sqlalchemy import and_, func, or_, select
+
+from conftest import auth_for, new_conversations, new_products, new_users
+from app.core.db import SessionLocal
+from app.models.chat import Conversation
+from app.models.swipe import Swipe
+
+
+def _swipe(client, user: int, *swipes: tuple) -> dict:
+    r = client.post("/swipes", json={"swipes": [{"product_id": p, "liked": l} for p, l in swipes]},
+                    headers=auth_for(user))
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _conversations_between(a: int, b: int) -> int:
+    with SessionLocal() as db:
+        return db.scalar(select(func.count()).select_from(Conversation).where(or_(
+            and_(Conversation.user1_id == a, Conversation.user2_id == b),
+            and_(Conversation.user1_id == b, Conversation.user2_id == a),
+        )))
+
+
+def test_mutual_like_is_a_match(client):
+    a, b = new_users(2)
+    (pa,), (pb,) = new_products(a, 1), new_products(b, 1)
+    assert _swipe(client, a, (pb, True))["matches"] == []
+    result = _swipe(client, b, (pa, True))
+    assert result["accepted"] == 1
+    (match,) = result["matches"]
+    assert match["user_id"] == a and match["product_id"] == pa
+    assert _conversations_between(a, b) == 1
+
+
+def test_pass_is_not_a_match(client):
+    a, b = new_users(2)
+    (pa,), (pb,) = new_products(a, 1), new_products(b, 1)
+    _swipe(client, a, (pb, False))
+    assert _swipe(client, b, (pa, True))["matches"] == []
+    assert _conversations_between(a, b) == 0
+
+
+def test_rejected_products(client):
+    me, other = new_users(2)
+    (mine,) = new_products(me, 1)
+    (inactive,) = new_products(other, 1, is_active=False)
+    (ok,) = new_products(other, 1)
+    result = _swipe(client, me, (mine, True), (inactive, True), (10**9, True), (ok, False))
+    assert result["accepted"] == 1
+    assert sorted(result["rejected"]) == sorted([mine, inactive, 10**9])
+
+
+def test_reswipe_overwrites(client):
+    a, b = new_users(2)
+    (pa,), (pb,) = new_products(a, 1), new_products(b, 1)
+    _swipe(client, a, (pb, True))
+    _swipe(client, a, (pb, False))          # se arrepiente: ya no cuenta como like
+    with SessionLocal() as db:
+        assert db.scalars(select(Swipe.liked).where(Swipe.swiper_id == a)).all() == [False]
+    assert _swipe(client, b, (pa, True))["matches"] == []
+    # dentro de un lote gana el último swipe del producto
+    _swipe(client, a, (pb, False), (pb, True))
+    with SessionLocal() as db:
+        assert db.scalars(select(Swipe.liked).where(Swipe.swiper_id == a)).all() == [True]
+
+
+def test_one_match_per_pair(client):
+    a, b = new_users(2)
+    pa = new_products(a, 3)
+    pb = new_products(b, 2)
+    _swipe(client, a, (pb[0], True))
+    assert len(_swipe(client, b, (pa[0], True))["matches"]) == 1
+    # más likes entre los mismos dos (en cualquier dirección) no son matches nuevos
+    assert _swipe(client, b, (pa[1], True))["matches"] == []
+    assert _swipe(client, b, (pa[2], True), (pa[1], True))["matches"] == []
+    assert _swipe(client, a, (pb[1], True))["matches"] == []
+    assert _conversations_between(a, b) == 1
+
+
+def test_existing_chat_is_not_a_new_match(client):
+    a, b = new_users(2)
+    (pa,), (pb,) = new_products(a, 1), new_products(b, 1)
+    new_conversations(b, [a], 2)             # chat abierto a mano (b escribió primero, sin orden de par)
+    _swipe(client, a, (pb, True))
+    assert _swipe(client, b, (pa, True))["matches"] == []
+    assert _conversations_between(a, b) == 1